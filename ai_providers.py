@@ -3,12 +3,19 @@ Free AI API Providers
 Supports multiple free AI APIs as alternatives to OpenAI
 """
 import os
-import requests
+import re
+import time
 import json
-from typing import List, Dict, Optional
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Iterator, List, Dict, Optional
+import config  # noqa: F401 - loads .env once for every module
+from clients import (
+    get_http_session, get_openai_client, get_groq_client,
+    get_anthropic_client, get_gemini_model, load_sdk
+)
+from metrics import record_latency, record_outcome
+from health import get_health_registry
+from rate_limit import RATE_LIMIT_RETRIES, estimate_request_tokens, get_rate_limiter, is_rate_limited
+import response_cache
 
 # Provider configurations
 PROVIDERS = {
@@ -16,13 +23,15 @@ PROVIDERS = {
         "name": "OpenAI (GPT-3.5/GPT-4)",
         "requires_key": True,
         "free_tier": False,
-        "key_env": "OPENAI_API_KEY"
+        "key_env": "OPENAI_API_KEY",
+        "base_url_env": "OPENAI_BASE_URL"
     },
     "groq": {
         "name": "Groq (Free & Fast)",
         "requires_key": True,
         "free_tier": True,
         "key_env": "GROQ_API_KEY",
+        "base_url_env": "GROQ_BASE_URL",
         "models": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile", "mixtral-8x7b-32768", "gemma2-9b-it"]
     },
     "huggingface": {
@@ -30,6 +39,8 @@ PROVIDERS = {
         "requires_key": True,
         "free_tier": True,
         "key_env": "HUGGINGFACE_API_KEY",
+        "base_url_env": "HUGGINGFACE_BASE_URL",
+        "base_url": "https://api-inference.huggingface.co/models",
         "models": ["mistralai/Mistral-7B-Instruct-v0.2", "google/gemma-7b-it", "meta-llama/Llama-2-7b-chat-hf"]
     },
     "together": {
@@ -37,6 +48,8 @@ PROVIDERS = {
         "requires_key": True,
         "free_tier": True,
         "key_env": "TOGETHER_API_KEY",
+        "base_url_env": "TOGETHER_BASE_URL",
+        "base_url": "https://api.together.xyz/v1",
         "models": ["meta-llama/Llama-2-70b-chat-hf", "mistralai/Mixtral-8x7B-Instruct-v0.1"]
     },
     "anthropic": {
@@ -44,6 +57,7 @@ PROVIDERS = {
         "requires_key": True,
         "free_tier": True,
         "key_env": "ANTHROPIC_API_KEY",
+        "base_url_env": "ANTHROPIC_BASE_URL",
         "models": ["claude-3-haiku-20240307", "claude-3-sonnet-20240229"]
     },
     "google": {
@@ -62,16 +76,80 @@ def get_provider_key(provider: str) -> Optional[str]:
     key_env = PROVIDERS[provider]["key_env"]
     return os.getenv(key_env)
 
+def get_request_key(provider: str) -> Optional[str]:
+    """The API key requests to a provider are actually sent with (OpenAI calls use config.apikey)"""
+    if provider == "openai":
+        from config import apikey
+        return apikey
+    return get_provider_key(provider)
+
+def get_provider_base_url(provider: str) -> Optional[str]:
+    """Get API base URL for a provider (env override, e.g. to point at a local stub server)"""
+    if provider not in PROVIDERS:
+        return None
+    config = PROVIDERS[provider]
+    env_name = config.get("base_url_env")
+    return (os.getenv(env_name) if env_name else None) or config.get("base_url")
+
+def _to_prompt(messages: List[Dict]) -> str:
+    """Flatten chat messages into a plain text prompt (Hugging Face text generation)"""
+    prompt = ""
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        if role == "system":
+            prompt += f"System: {content}\n\n"
+        elif role == "user":
+            prompt += f"User: {content}\n\n"
+        elif role == "assistant":
+            prompt += f"Assistant: {content}\n\n"
+    prompt += "Assistant: "
+    return prompt
+
+def _to_claude_messages(messages: List[Dict]):
+    """Split chat messages into (system_message, claude_messages); every system message is kept, joined in order"""
+    system_parts = []
+    claude_messages = []
+    
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        if role == "system":
+            system_parts.append(content)
+        elif role in ["user", "assistant"]:
+            claude_messages.append({
+                "role": role,
+                "content": content
+            })
+    return "\n\n".join(system_parts) or None, claude_messages
+
+def _to_gemini_messages(messages: List[Dict]):
+    """Split chat messages into (system_instruction, gemini_messages); every system message is kept, joined in order"""
+    gemini_messages = []
+    system_parts = []
+    
+    for msg in messages:
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+        if role == "system":
+            system_parts.append(content)
+        else:
+            gemini_messages.append({
+                "role": "user" if role == "user" else "model",
+                "parts": [content]
+            })
+    return "\n\n".join(system_parts), gemini_messages
+
 def chat_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", temperature: float = 0.7) -> str:
     """Chat using Groq API (Free & Very Fast)"""
     try:
-        from groq import Groq
+        load_sdk("groq")  # surface a missing package as ImportError
         
         api_key = get_provider_key("groq")
         if not api_key:
             return "Error: GROQ_API_KEY not found in .env file. Get a free key from https://console.groq.com/"
         
-        client = Groq(api_key=api_key)
+        client = get_groq_client(api_key, get_provider_base_url("groq"))
         
         # Available models (llama-3.1-70b-versatile is deprecated, use llama-3.3-70b-versatile instead)
         available_models = ["llama-3.1-8b-instant", "llama-3.3-70b-versatile", "mixtral-8x7b-32768", "gemma2-9b-it"]
@@ -87,8 +165,12 @@ def chat_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", tempera
             # If model not in available list, use all available models
             models_to_try = available_models
         
+        health = get_health_registry()
         last_error = None
         for model_to_try in models_to_try:
+            # Skip models whose circuit is open (known deprecated or failing) without a round trip
+            if not health.allow("groq", model_to_try):
+                continue
             try:
                 response = client.chat.completions.create(
                     model=model_to_try,
@@ -96,10 +178,16 @@ def chat_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", tempera
                     temperature=temperature,
                     max_tokens=1000
                 )
+                health.record_success("groq", model_to_try)
                 return response.choices[0].message.content.strip()
             except Exception as e:
                 last_error = e
                 error_msg = str(e)
+                # Rate limits are not model failures: let chat_with_provider's limiter wait and retry
+                if is_rate_limited(f"Error: {error_msg}"):
+                    health.release("groq", model_to_try)
+                    break
+                health.record_failure("groq", model_to_try, error_msg)
                 # If it's not a model-specific error (like auth), break immediately
                 if "401" in error_msg or "unauthorized" in error_msg.lower():
                     break
@@ -109,8 +197,11 @@ def chat_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", tempera
                 # For other errors, break
                 break
         
+        if last_error is None:
+            return f"Error: All Groq models are temporarily unavailable after repeated failures. Tried: {', '.join(models_to_try)}. Please try again shortly or use a different provider."
+        
         # If all models failed, return helpful error
-        error_msg = str(last_error) if last_error else "Unknown error"
+        error_msg = str(last_error)
         if "401" in error_msg or "unauthorized" in error_msg.lower():
             return "Error: Invalid Groq API key. Please check your GROQ_API_KEY in the .env file."
         elif "400" in error_msg or "model" in error_msg.lower() or "deprecated" in error_msg.lower():
@@ -133,23 +224,9 @@ def chat_huggingface(messages: List[Dict], model: str = "mistralai/Mistral-7B-In
             return "Error: HUGGINGFACE_API_KEY not found in .env file. Get a free key from https://huggingface.co/settings/tokens"
         
         # Convert messages to prompt format
-        prompt = ""
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            if role == "system":
-                prompt += f"System: {content}\n\n"
-            elif role == "user":
-                prompt += f"User: {content}\n\n"
-            elif role == "assistant":
-                prompt += f"Assistant: {content}\n\n"
-        prompt += "Assistant: "
+        prompt = _to_prompt(messages)
         
-        api_url = f"https://api-inference.huggingface.co/models/{model}"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        api_url = f"{get_provider_base_url('huggingface')}/{model}"
         
         payload = {
             "inputs": prompt,
@@ -160,7 +237,8 @@ def chat_huggingface(messages: List[Dict], model: str = "mistralai/Mistral-7B-In
             }
         }
         
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+        session = get_http_session("huggingface", api_key)
+        response = session.post(api_url, json=payload, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -181,11 +259,7 @@ def chat_together(messages: List[Dict], model: str = "meta-llama/Llama-2-70b-cha
         if not api_key:
             return "Error: TOGETHER_API_KEY not found in .env file. Get a free key from https://api.together.xyz/"
         
-        api_url = "https://api.together.xyz/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        api_url = f"{get_provider_base_url('together')}/chat/completions"
         
         payload = {
             "model": model,
@@ -194,7 +268,8 @@ def chat_together(messages: List[Dict], model: str = "meta-llama/Llama-2-70b-cha
             "max_tokens": 1000
         }
         
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
+        session = get_http_session("together", api_key)
+        response = session.post(api_url, json=payload, timeout=30)
         
         if response.status_code == 200:
             result = response.json()
@@ -207,28 +282,16 @@ def chat_together(messages: List[Dict], model: str = "meta-llama/Llama-2-70b-cha
 def chat_anthropic(messages: List[Dict], model: str = "claude-3-haiku-20240307", temperature: float = 0.7) -> str:
     """Chat using Anthropic Claude API (Free Trial)"""
     try:
-        import anthropic
+        load_sdk("anthropic")  # surface a missing package as ImportError
         
         api_key = get_provider_key("anthropic")
         if not api_key:
             return "Error: ANTHROPIC_API_KEY not found in .env file. Get a free key from https://console.anthropic.com/"
         
-        client = anthropic.Anthropic(api_key=api_key)
+        client = get_anthropic_client(api_key, get_provider_base_url("anthropic"))
         
         # Convert messages format for Claude
-        system_message = None
-        claude_messages = []
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            if role == "system":
-                system_message = content
-            elif role in ["user", "assistant"]:
-                claude_messages.append({
-                    "role": role,
-                    "content": content
-                })
+        system_message, claude_messages = _to_claude_messages(messages)
         
         response = client.messages.create(
             model=model,
@@ -247,33 +310,16 @@ def chat_anthropic(messages: List[Dict], model: str = "claude-3-haiku-20240307",
 def chat_gemini(messages: List[Dict], model: str = "gemini-1.5-flash", temperature: float = 0.7) -> str:
     """Chat using Google Gemini API (Free Tier)"""
     try:
-        import google.generativeai as genai
+        genai = load_sdk("google.generativeai")
         
         api_key = get_provider_key("google")
         if not api_key:
             return "Error: GOOGLE_API_KEY not found in .env file. Get a free key from https://aistudio.google.com/"
         
-        genai.configure(api_key=api_key)
-        
         # Convert messages format for Gemini
-        gemini_messages = []
-        system_instruction = ""
+        system_instruction, gemini_messages = _to_gemini_messages(messages)
         
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            if role == "system":
-                system_instruction = content
-            else:
-                gemini_messages.append({
-                    "role": "user" if role == "user" else "model",
-                    "parts": [content]
-                })
-        
-        model_instance = genai.GenerativeModel(
-            model_name=model,
-            system_instruction=system_instruction if system_instruction else None
-        )
+        model_instance = get_gemini_model(api_key, model, system_instruction if system_instruction else None)
         
         response = model_instance.generate_content(
             contents=gemini_messages,
@@ -292,13 +338,12 @@ def chat_gemini(messages: List[Dict], model: str = "gemini-1.5-flash", temperatu
 def chat_openai(messages: List[Dict], model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
     """Chat using OpenAI API"""
     try:
-        import openai
         from config import apikey
         
         if not apikey or apikey == "your_api_key_here" or len(apikey) < 20:
             return "Error: Invalid OpenAI API key. Please set a valid OPENAI_API_KEY in your .env file."
         
-        client = openai.OpenAI(api_key=apikey)
+        client = get_openai_client(apikey, get_provider_base_url("openai"))
         
         response = client.chat.completions.create(
             model=model,
@@ -311,28 +356,270 @@ def chat_openai(messages: List[Dict], model: str = "gpt-3.5-turbo", temperature:
     except Exception as e:
         return f"Error with OpenAI API: {str(e)}"
 
-def chat_with_provider(provider: str, messages: List[Dict], model: str = None, temperature: float = 0.7) -> str:
-    """Main function to chat with any provider"""
-    if provider == "groq":
-        default_model = "llama-3.1-8b-instant"  # Fast and reliable default
-        return chat_groq(messages, model or default_model, temperature)
-    elif provider == "huggingface":
-        default_model = "mistralai/Mistral-7B-Instruct-v0.2"
-        return chat_huggingface(messages, model or default_model, temperature)
-    elif provider == "together":
-        default_model = "meta-llama/Llama-2-70b-chat-hf"
-        return chat_together(messages, model or default_model, temperature)
-    elif provider == "anthropic":
-        default_model = "claude-3-haiku-20240307"
-        return chat_anthropic(messages, model or default_model, temperature)
-    elif provider == "google":
-        default_model = "gemini-1.5-flash"
-        return chat_gemini(messages, model or default_model, temperature)
-    elif provider == "openai":
-        default_model = "gpt-3.5-turbo"
-        return chat_openai(messages, model or default_model, temperature)
-    else:
+DEFAULT_MODELS = {
+    "groq": "llama-3.1-8b-instant",  # Fast and reliable default
+    "huggingface": "mistralai/Mistral-7B-Instruct-v0.2",
+    "together": "meta-llama/Llama-2-70b-chat-hf",
+    "anthropic": "claude-3-haiku-20240307",
+    "google": "gemini-1.5-flash",
+    "openai": "gpt-3.5-turbo",
+}
+
+# Providers whose chat function walks its own model list and records model health itself
+MODEL_FALLBACK_PROVIDERS = {"groq"}
+
+def chat_with_provider(provider: str, messages: List[Dict], model: str = None, temperature: float = 0.7,
+                       cache_nondeterministic: bool = False) -> str:
+    """Main function to chat with any provider (deterministic requests are served from the response cache)"""
+    chat_functions = {
+        "groq": chat_groq,
+        "huggingface": chat_huggingface,
+        "together": chat_together,
+        "anthropic": chat_anthropic,
+        "google": chat_gemini,
+        "openai": chat_openai,
+    }
+    if provider not in chat_functions:
         return f"Error: Unknown provider '{provider}'"
+    model = model or DEFAULT_MODELS[provider]
+    key, cached = response_cache.lookup(provider, model, messages, temperature, 1000, cache_nondeterministic)
+    if cached is not None:
+        return cached
+    health = get_health_registry()
+    self_managed = provider in MODEL_FALLBACK_PROVIDERS
+    if not self_managed and not health.allow(provider, model):
+        return health.unavailable_message(provider, model)
+    limiter = get_rate_limiter(provider, get_request_key(provider))
+    tokens = estimate_request_tokens(messages)
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        # Queue locally (up to the limiter's max wait) rather than spend a request on a 429
+        if not limiter.acquire(tokens):
+            if not self_managed:
+                health.release(provider, model)
+            return limiter.rejection_message()
+        start = time.perf_counter()
+        response = chat_functions[provider](messages, model, temperature)
+        if not is_rate_limited(response):
+            break
+        if limiter.blocked_until <= time.monotonic():
+            # No rate-limit headers were seen (e.g. Gemini): back off using the error message
+            limiter.note_rate_limited(response)
+    if not self_managed:
+        if is_rate_limited(response):
+            health.release(provider, model)
+        else:
+            health.record_response(provider, model, response)
+    record_outcome(provider, model, not response.startswith("Error"))
+    if not response.startswith("Error"):
+        elapsed = time.perf_counter() - start
+        record_latency("latency", provider, model, elapsed)
+        response_cache.store(key, response, elapsed, messages)
+    return response
+
+def _chunk_text(text: str) -> Iterator[str]:
+    """Split a finished response into word-sized chunks (streaming fallback)"""
+    for piece in re.findall(r"\s*\S+\s*", text) or [text]:
+        yield piece
+
+def _stream_openai_style(client, messages: List[Dict], model: str, temperature: float) -> Iterator[str]:
+    """Stream deltas from an OpenAI-compatible SDK client (OpenAI, Groq)"""
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=1000,
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+def stream_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", temperature: float = 0.7) -> Iterator[str]:
+    """Stream a Groq chat completion"""
+    api_key = get_provider_key("groq")
+    if not api_key:
+        yield "Error: GROQ_API_KEY not found in .env file. Get a free key from https://console.groq.com/"
+        return
+    if model == "llama-3.1-70b-versatile":
+        model = "llama-3.3-70b-versatile"
+    client = get_groq_client(api_key, get_provider_base_url("groq"))
+    yield from _stream_openai_style(client, messages, model, temperature)
+
+def stream_openai(messages: List[Dict], model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> Iterator[str]:
+    """Stream an OpenAI chat completion"""
+    from config import apikey
+    
+    if not apikey or apikey == "your_api_key_here" or len(apikey) < 20:
+        yield "Error: Invalid OpenAI API key. Please set a valid OPENAI_API_KEY in your .env file."
+        return
+    client = get_openai_client(apikey, get_provider_base_url("openai"))
+    yield from _stream_openai_style(client, messages, model, temperature)
+
+def stream_together(messages: List[Dict], model: str = "meta-llama/Llama-2-70b-chat-hf", temperature: float = 0.7) -> Iterator[str]:
+    """Stream a Together AI chat completion (server-sent events)"""
+    api_key = get_provider_key("together")
+    if not api_key:
+        yield "Error: TOGETHER_API_KEY not found in .env file. Get a free key from https://api.together.xyz/"
+        return
+    
+    api_url = f"{get_provider_base_url('together')}/chat/completions"
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": 1000,
+        "stream": True
+    }
+    
+    session = get_http_session("together", api_key)
+    with session.post(api_url, json=payload, timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            yield f"Error: Together AI API returned status {response.status_code}: {response.text}"
+            return
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+def stream_anthropic(messages: List[Dict], model: str = "claude-3-haiku-20240307", temperature: float = 0.7) -> Iterator[str]:
+    """Stream an Anthropic Claude message"""
+    api_key = get_provider_key("anthropic")
+    if not api_key:
+        yield "Error: ANTHROPIC_API_KEY not found in .env file. Get a free key from https://console.anthropic.com/"
+        return
+    
+    client = get_anthropic_client(api_key, get_provider_base_url("anthropic"))
+    system_message, claude_messages = _to_claude_messages(messages)
+    with client.messages.stream(
+        model=model,
+        max_tokens=1000,
+        temperature=temperature,
+        system=system_message if system_message else "You are a helpful AI assistant.",
+        messages=claude_messages
+    ) as stream:
+        for text in stream.text_stream:
+            if text:
+                yield text
+
+def stream_gemini(messages: List[Dict], model: str = "gemini-1.5-flash", temperature: float = 0.7) -> Iterator[str]:
+    """Stream a Google Gemini response"""
+    genai = load_sdk("google.generativeai")
+    
+    api_key = get_provider_key("google")
+    if not api_key:
+        yield "Error: GOOGLE_API_KEY not found in .env file. Get a free key from https://aistudio.google.com/"
+        return
+    
+    system_instruction, gemini_messages = _to_gemini_messages(messages)
+    model_instance = get_gemini_model(api_key, model, system_instruction if system_instruction else None)
+    response = model_instance.generate_content(
+        contents=gemini_messages,
+        generation_config=genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=1000
+        ),
+        stream=True
+    )
+    for chunk in response:
+        text = chunk.text
+        if text:
+            yield text
+
+def stream_huggingface(messages: List[Dict], model: str = "mistralai/Mistral-7B-Instruct-v0.2", temperature: float = 0.7) -> Iterator[str]:
+    """Hugging Face Inference API has no chat streaming here; deliver the finished answer in chunks"""
+    yield from _chunk_text(chat_huggingface(messages, model, temperature))
+
+def chat_with_provider_stream(provider: str, messages: List[Dict], model: str = None, temperature: float = 0.7,
+                              cache_nondeterministic: bool = False) -> Iterator[str]:
+    """Stream a chat response from any provider as text chunks.
+    
+    Records time-to-first-token ("ttft") and total latency in metrics. If the stream fails before
+    the first chunk, falls back to chat_with_provider (which also handles Groq model fallback).
+    """
+    stream_functions = {
+        "groq": stream_groq,
+        "huggingface": stream_huggingface,
+        "together": stream_together,
+        "anthropic": stream_anthropic,
+        "google": stream_gemini,
+        "openai": stream_openai,
+    }
+    if provider not in stream_functions:
+        yield f"Error: Unknown provider '{provider}'"
+        return
+    model = model or DEFAULT_MODELS[provider]
+    key, cached = response_cache.lookup(provider, model, messages, temperature, 1000, cache_nondeterministic)
+    if cached is not None:
+        yield from _chunk_text(cached)
+        return
+    
+    health = get_health_registry()
+    if not health.allow(provider, model):
+        if provider in MODEL_FALLBACK_PROVIDERS:
+            # The non-streaming call skips to a healthy model
+            yield from _chunk_text(chat_with_provider(provider, messages, model, temperature, cache_nondeterministic))
+        else:
+            yield health.unavailable_message(provider, model)
+        return
+    
+    limiter = get_rate_limiter(provider, get_request_key(provider))
+    if not limiter.acquire(estimate_request_tokens(messages)):
+        health.release(provider, model)
+        yield limiter.rejection_message()
+        return
+    
+    start = time.perf_counter()
+    received = False
+    failed = False
+    settled = False  # an outcome was recorded for this request's breaker slot
+    chunks = []
+    try:
+        try:
+            for chunk in stream_functions[provider](messages, model, temperature):
+                if not received:
+                    received = True
+                    failed = chunk.startswith("Error")
+                    if not failed:
+                        record_latency("ttft", provider, model, time.perf_counter() - start)
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            failed = settled = True
+            health.record_failure(provider, model, str(e))
+            record_outcome(provider, model, False)
+            if received:
+                yield f"\n\nError: stream interrupted ({str(e)})"
+            else:
+                # Nothing delivered yet: fall back to the non-streaming call (which caches its own result)
+                response = chat_with_provider(provider, messages, model, temperature, cache_nondeterministic)
+                failed = response.startswith("Error")
+                if not failed:
+                    record_latency("ttft", provider, model, time.perf_counter() - start)
+                yield from _chunk_text(response)
+                return
+        if failed and received and chunks and chunks[0].startswith("Error"):
+            settled = True
+            health.record_failure(provider, model, chunks[0])
+            record_outcome(provider, model, False)
+        if received and not failed:
+            settled = True
+            health.record_success(provider, model)
+            record_outcome(provider, model, True)
+            elapsed = time.perf_counter() - start
+            record_latency("latency", provider, model, elapsed)
+            response_cache.store(key, "".join(chunks).strip(), elapsed, messages)
+    finally:
+        if not settled:
+            # Closed mid-stream (rerun, client disconnect) or empty: give back a half-open probe slot
+            health.release(provider, model)
 
 def get_available_providers() -> List[str]:
     """Get list of available providers based on API keys"""
@@ -1,18 +1,21 @@
 import streamlit as st
-import speech_recognition as sr
-import os
-import webbrowser
 import datetime
+import inspect
 import json
-from utils import (
-    ai_chat, ai_completion, save_ai_response, 
-    get_weather, calculate, get_news, save_note, read_notes
-)
-from config import apikey
-import openai
+from utils import weather_cache, news_cache, start_news_refresher
 from ai_providers import get_available_providers, get_provider_models, PROVIDERS
-
-openai.api_key = apikey
+from metrics import latency_report
+from response_cache import get_response_cache
+from health import get_health_registry
+from router import DEFAULT_POLICY, POLICIES, rank_providers
+from context import CONTEXT_BUDGET
+from rate_limit import limiter_report
+from clients import prewarm_sdks
+from chat_view import PAGE_SIZE, render_chat, reset_window
+from conversation_store import get_conversation_store, new_session_id
+from session_memory import memory_report
+from engine import Session, process_command
+from tts import get_synthesizer
 
 # Page configuration
 st.set_page_config(
@@ -56,6 +59,11 @@ st.markdown("""
     .chat-message {
         color: #000000;
     }
+    .chat-time {
+        font-size: 0.8rem;
+        color: #808495;
+        margin: -0.25rem 0 0.5rem 0;
+    }
     /* Make text input text black */
     .stTextInput>div>div>input {
         color: #000000;
@@ -74,10 +82,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
-if "command_history" not in st.session_state:
-    st.session_state.command_history = []
+# Conversations are persisted; the session id rides in the URL, so a reload (or another replica) resumes it
+conversations = get_conversation_store()
+
+def start_session(session_id):
+    """Attach a conversation: a bounded ring of its newest turns, older ones stay in the store until needed"""
+    st.session_state.session = Session(session_id, conversations)
+    st.query_params["session"] = session_id
+
+if "session" not in st.session_state:
+    requested = st.query_params.get("session", "")
+    start_session(requested if requested.isalnum() and len(requested) <= 64 else new_session_id())
 if "is_listening" not in st.session_state:
     st.session_state.is_listening = False
 if "notes" not in st.session_state:
@@ -85,163 +100,63 @@ if "notes" not in st.session_state:
 
 # Helper functions
 def say_text(text):
-    """Text-to-speech using system command"""
+    """Queue the reply for speech synthesis; the page reruns right away and the player appears when audio is ready"""
+    st.session_state.speech = {"future": get_synthesizer().synthesize_async(text), "played": False}
+
+def _wait_for_speech():
+    """Placeholder while the worker synthesizes; reruns the page once the audio exists"""
+    if st.session_state.speech["future"].done():
+        st.rerun()
+    st.caption("🔊 Preparing audio...")
+
+# Poll in a fragment (Streamlit >= 1.37) so only the placeholder reruns; older versions show the player next run
+wait_for_speech = st.fragment(run_every=0.5)(_wait_for_speech) if hasattr(st, "fragment") else _wait_for_speech
+# st.audio only takes autoplay in newer Streamlit releases; older ones show a player the user starts
+AUDIO_AUTOPLAY = "autoplay" in inspect.signature(st.audio).parameters
+
+def render_speech():
+    """Audio player for the last spoken reply; autoplays once, then stays as a plain player"""
+    speech = st.session_state.get("speech")
+    if not speech:
+        return
+    future = speech["future"]
+    if not future.done():
+        wait_for_speech()
+        return
     try:
-        os.system(f'say "{text}"')
+        path = future.result()
     except Exception as e:
-        st.error(f"TTS Error: {str(e)}")
+        st.caption(f"🔇 Text-to-speech unavailable: {e}")
+        st.session_state.speech = None
+        return
+    if AUDIO_AUTOPLAY:
+        st.audio(path, format="audio/wav", autoplay=not speech["played"])
+    else:
+        st.audio(path, format="audio/wav")
+    speech["played"] = True
 
-def take_voice_command():
+def take_voice_command(language="en-in"):
     """Capture voice command from microphone"""
+    # Imported on first use: the voice stack is not needed to render the page
     try:
-        r = sr.Recognizer()
-        with sr.Microphone() as source:
-            r.adjust_for_ambient_noise(source, duration=0.5)
-            audio = r.listen(source, timeout=5, phrase_time_limit=10)
-        
-        query = r.recognize_google(audio, language="en-in")
-        return query
-    except sr.WaitTimeoutError:
+        from stt import listen_microphone
+        text = listen_microphone(language=language, timeout=5, phrase_time_limit=10)
+    except ImportError:
+        return "Error: SpeechRecognition is not installed. Run: pip install SpeechRecognition pyaudio"
+    except TimeoutError:
         return "Timeout: No speech detected"
-    except sr.UnknownValueError:
-        return "Could not understand audio"
     except Exception as e:
         return f"Error: {str(e)}"
+    return text or "Could not understand audio"
 
-def process_command(query, ai_model="gpt-3.5-turbo", temperature=0.7, ai_provider="openai"):
-    """Process user command and return response"""
-    query_lower = query.lower()
-    response = ""
-    command_type = "chat"
-    
-    # Website opening
-    sites = [
-        ["youtube", "https://www.youtube.com"],
-        ["wikipedia", "https://www.wikipedia.com"],
-        ["google", "https://www.google.com"],
-        ["github", "https://www.github.com"],
-        ["stackoverflow", "https://www.stackoverflow.com"],
-        ["instagram", "https://www.instagram.com"],
-        ["facebook", "https://www.facebook.com"],
-        ["twitter", "https://www.twitter.com"],
-        ["linkedin", "https://www.linkedin.com"],
-        ["reddit", "https://www.reddit.com"],
-        ["whatsapp", "https://web.whatsapp.com"],
-        ["gmail", "https://mail.google.com"],
-        ["netflix", "https://www.netflix.com"],
-        ["spotify", "https://open.spotify.com"],
-    ]
-    
-    for site in sites:
-        # Check for "open [site]" command - more flexible matching
-        site_patterns = [f"open {site[0]}", f"open {site[0]}.com", f"open {site[0]}.net"]
-        if any(pattern in query_lower for pattern in site_patterns):
-            response = f"Opening {site[0]}..."
-            try:
-                webbrowser.open(site[1])
-                command_type = "website"
-                return response, command_type
-            except Exception as e:
-                return f"Error opening {site[0]}: {str(e)}", "error"
-    
-    # Time
-    if "the time" in query_lower or "what time" in query_lower:
-        hour = datetime.datetime.now().strftime("%H")
-        minute = datetime.datetime.now().strftime("%M")
-        response = f"Sir, the time is {hour}:{minute}"
-        command_type = "time"
-        return response, command_type
-    
-    # Date
-    if "the date" in query_lower or "what date" in query_lower:
-        date = datetime.datetime.now().strftime("%B %d, %Y")
-        response = f"Today's date is {date}"
-        command_type = "date"
-        return response, command_type
-    
-    # Weather
-    if "weather" in query_lower:
-        city = "London"  # Default city
-        # Try to extract city name from query
-        words = query.split()
-        for i, word in enumerate(words):
-            if word.lower() == "weather" and i + 1 < len(words):
-                city = words[i + 1]
-                break
-        response = get_weather(city)
-        command_type = "weather"
-        return response, command_type
-    
-    # Calculator
-    if "calculate" in query_lower or "what is" in query_lower and any(op in query_lower for op in ["+", "-", "*", "/", "plus", "minus", "times", "divided"]):
-        response = calculate(query)
-        command_type = "calculator"
-        return response, command_type
-    
-    # News
-    if "news" in query_lower:
-        topic = "technology"
-        words = query.split()
-        for i, word in enumerate(words):
-            if word.lower() == "news" and i + 1 < len(words):
-                topic = words[i + 1]
-                break
-        response = get_news(topic)
-        command_type = "news"
-        return response, command_type
-    
-    # Notes
-    if "save note" in query_lower or "remember" in query_lower:
-        note_content = query
-        if "save note" in query_lower:
-            note_content = query.replace("save note", "").strip()
-        elif "remember" in query_lower:
-            note_content = query.replace("remember", "").strip()
-        response = save_note(note_content)
-        command_type = "note"
-        return response, command_type
-    
-    if "read notes" in query_lower or "show notes" in query_lower:
-        response = read_notes()
-        command_type = "note"
-        return response, command_type
-    
-    # AI completion
-    if "using artificial intelligence" in query_lower:
-        prompt = query
-        ai_response = ai_completion(prompt)
-        save_ai_response(prompt, ai_response)
-        response = ai_response
-        command_type = "ai_completion"
-        return response, command_type
-    
-    # Default: Chat with AI
-    # Build conversation context with more history for better conversations
-    messages = [{"role": "system", "content": "You are Jarvis, a helpful AI assistant. Be conversational, friendly, and helpful. Keep responses concise but engaging. You can have natural conversations with the user."}]
-    
-    # Include more chat history for context (last 10 messages = 5 exchanges)
-    for prev_chat in st.session_state.chat_history[-10:]:
-        if prev_chat["role"] == "user":
-            messages.append({"role": "user", "content": prev_chat["content"]})
-        elif prev_chat["role"] == "assistant":
-            messages.append({"role": "assistant", "content": prev_chat["content"]})
-    
-    messages.append({"role": "user", "content": query})
-    
-    try:
-        response = ai_chat(messages, model=ai_model, temperature=temperature, provider=ai_provider)
-        command_type = "chat"
-    except Exception as e:
-        response = f"Error: {str(e)}"
-        command_type = "error"
-    
-    return response, command_type
+# Keep popular news topics prefetched in the background (shared by every session)
+start_news_refresher()
 
 # Main UI
 st.markdown('<h1 class="main-header">🤖 Jarvis AI Assistant</h1>', unsafe_allow_html=True)
 
 # Welcome message on first run
-if not st.session_state.chat_history:
+if not st.session_state.session.history.total_messages():
     st.info("👋 Welcome to Jarvis AI Assistant! You can interact with me using text or voice commands. Check out the sidebar for settings and quick commands.")
 
 # Sidebar
@@ -260,6 +175,8 @@ with st.sidebar:
     available_providers = get_available_providers()
     if not available_providers:
         available_providers = ["openai"]  # Default fallback
+    # Load the configured providers' SDKs in the background while the page is idle
+    prewarm_sdks(available_providers)
     
     # Provider selection
     provider_names = [PROVIDERS[p]["name"] for p in available_providers if p in PROVIDERS]
@@ -268,6 +185,12 @@ with st.sidebar:
     if not provider_names:
         provider_names = ["OpenAI (GPT-3.5/GPT-4)"]
         provider_keys = ["openai"]
+    routable_providers = list(provider_keys)
+    
+    # With several providers, let the router pick per request
+    if len(provider_keys) >= 2:
+        provider_names = ["🧭 Auto (router picks best)"] + provider_names
+        provider_keys = ["auto"] + provider_keys
     
     selected_provider_name = st.selectbox(
         "AI Provider",
@@ -288,6 +211,56 @@ with st.sidebar:
     ai_model = st.selectbox("AI Model", model_options)
     temperature = st.slider("Temperature", 0.0, 1.0, 0.7, 0.1)
     
+    # Routing policy for "Auto", fallbacks and hedging backups
+    routing_policy = st.selectbox(
+        "Routing policy",
+        list(POLICIES.keys()),
+        index=list(POLICIES.keys()).index(DEFAULT_POLICY) if DEFAULT_POLICY in POLICIES else 0,
+        format_func=lambda name: name.replace("_", " ").capitalize()
+    )
+    
+    # Prompt size: history beyond this budget is folded into a rolling summary
+    context_budget = st.slider("Context budget (tokens)", 500, 8000, CONTEXT_BUDGET, 250)
+    
+    # Retrieval: notes, saved responses and earlier chats that match the query are added to the prompt
+    use_memory = st.checkbox(
+        "Use memory (notes & past chats)",
+        value=True,
+        help="Adds the most relevant notes, saved AI responses and earlier messages to the prompt."
+    )
+    
+    # Response cache: temperature 0 requests are always cached
+    cache_all_responses = st.checkbox(
+        "Cache responses at temperature > 0",
+        value=False,
+        help="Reuse earlier answers to identical prompts even when sampling is random."
+    )
+    
+    # Hedged requests: race a second provider to cut tail latency
+    hedge_requests = st.checkbox(
+        "Hedge requests (race a backup provider)",
+        value=False,
+        disabled=len(routable_providers) < 2,
+        help="Fires the same request at a second provider if the first is slow; the first good answer wins."
+    )
+    hedge_delay = None
+    if hedge_requests:
+        hedge_delay = st.number_input("Hedge delay (seconds, 0 = auto from p95 latency)", 0.0, 30.0, 0.0, 0.1) or None
+    
+    # Options shared by every process_command call in this run
+    chat_options = {
+        "ai_model": ai_model,
+        "temperature": temperature,
+        "ai_provider": selected_provider,
+        "stream": st.write_stream,
+        "hedge": hedge_requests,
+        "hedge_delay": hedge_delay,
+        "cache_nondeterministic": cache_all_responses,
+        "routing_policy": routing_policy,
+        "context_budget": context_budget,
+        "use_memory": use_memory,
+    }
+    
     # Show provider info
     if selected_provider in PROVIDERS:
         provider_info = PROVIDERS[selected_provider]
@@ -307,13 +280,18 @@ with st.sidebar:
     # Quick actions
     st.subheader("Quick Actions")
     if st.button("🗑️ Clear Chat History"):
-        st.session_state.chat_history = []
-        st.session_state.command_history = []
+        st.session_state.session.clear()
+        reset_window(st)
         st.success("Chat history cleared!")
     
+    if st.button("🆕 New Conversation"):
+        start_session(new_session_id())
+        reset_window(st)
+        st.rerun()
+    
     if st.button("📥 Export Chat"):
-        if st.session_state.chat_history:
-            chat_data = json.dumps(st.session_state.chat_history, indent=2)
+        if st.session_state.session.history.total_messages():
+            chat_data = json.dumps(list(conversations.iter_messages(st.session_state.session.session_id)), indent=2)
             st.download_button(
                 label="Download Chat History",
                 data=chat_data,
@@ -327,6 +305,89 @@ with st.sidebar:
         st.error("🎤 Listening...")
     else:
         st.success("✅ Ready")
+    
+    # Live router scores (lower is better under the selected policy)
+    if len(routable_providers) >= 2:
+        with st.expander("🧭 Provider Router"):
+            st.table([
+                {
+                    "Provider": row["provider"],
+                    "Latency (ms)": round(row["latency"] * 1000) if row["latency"] is not None else "–",
+                    "TTFT (ms)": round(row["ttft"] * 1000) if row["ttft"] is not None else "–",
+                    "Errors": f"{row['error_rate']:.0%}",
+                    "Requests": row["requests"],
+                    "Score": round(row["score"], 3),
+                }
+                for row in rank_providers(routable_providers, routing_policy)
+            ])
+    
+    # Models currently skipped by the health registry
+    unhealthy = [row for row in get_health_registry().report() if row["state"] != "closed"]
+    if unhealthy:
+        with st.expander(f"🩺 Model Health ({len(unhealthy)} unavailable)"):
+            for row in unhealthy:
+                retry = f", retry in {row['retry_in']:.0f}s" if row["retry_in"] else ""
+                st.caption(f"{row['provider']} / {row['model']}: {row['state']}{retry}")
+    
+    # Response cache savings
+    cache_stats = get_response_cache().get_stats()
+    if cache_stats["hits"] or cache_stats["misses"]:
+        with st.expander("🗄️ Response Cache"):
+            st.write(f"Hits: {cache_stats['hits']} / Misses: {cache_stats['misses']} "
+                     f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['bypassed']} bypassed)")
+            st.write(f"Saved: {cache_stats['saved_seconds']:.1f}s of latency, ~{cache_stats['saved_tokens']} tokens")
+    
+    # Upstream lookups (weather, news) answered from the TTL caches
+    for label, cache, unit in (("🌦️ Weather Cache", weather_cache, "cities"), ("📰 News Cache", news_cache, "topics")):
+        cache_stats = cache.get_stats()
+        if cache_stats["upstream_calls"]:
+            with st.expander(label):
+                st.write(f"Fresh hits: {cache_stats['hits']} / Stale hits: {cache_stats['stale_hits']} / "
+                         f"Shared calls: {cache_stats['coalesced']}")
+                st.write(f"API calls: {cache_stats['upstream_calls']} ({cache_stats['refreshes']} background refreshes, "
+                         f"{cache_stats['errors']} errors), {cache_stats['entries']} {unit} cached")
+    
+    # Per-session memory: in-memory ring sizes against the per-session and global caps
+    with st.expander("🧠 Session Memory"):
+        report = memory_report()
+        st.write(f"{len(report['sessions'])} sessions, {report['total_kb']:.0f} KB of {report['cap_kb']:.0f} KB")
+        st.write(f"Released: {report['released_idle']} idle, {report['released_for_memory']} for memory")
+        for row in report["sessions"][:10]:
+            current = " (this session)" if st.session_state.session.session_id.startswith(row["session"]) else ""
+            st.write(f"`{row['session']}`{current}: {row['turns']} turns, {row['kb']:.1f} KB, "
+                     f"{row['spilled']} spilled to disk, idle {row['idle_s']:.0f}s")
+    
+    # Client-side rate limiters (requests queue locally instead of hitting 429s)
+    limiter_rows = [row for row in limiter_report() if row["queued"] or row["rejected"] or row["rate_limited"]]
+    if limiter_rows:
+        with st.expander("🚦 Rate Limits"):
+            st.table([
+                {
+                    "Provider": row["provider"],
+                    "Requests left": row["requests_left"] if row["requests_left"] is not None else "–",
+                    "Tokens left": row["tokens_left"] if row["tokens_left"] is not None else "–",
+                    "Queued": row["queued"],
+                    "Waited (s)": row["waited"],
+                    "Rejected": row["rejected"],
+                    "429s": row["rate_limited"],
+                }
+                for row in limiter_rows
+            ])
+    
+    # Streaming latency (time to first token) per provider
+    ttft_rows = latency_report("ttft")
+    if ttft_rows:
+        with st.expander("⏱️ Time to First Token"):
+            st.table([
+                {
+                    "Provider": row["provider"],
+                    "Model": row["model"],
+                    "Requests": row["count"],
+                    "p50 (ms)": round(row["p50"] * 1000),
+                    "p95 (ms)": round(row["p95"] * 1000),
+                }
+                for row in ttft_rows
+            ])
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -334,16 +395,13 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.header("💬 Chat")
     
-    # Chat history display
+    # Chat history display: newest page only, older messages load on demand
     chat_container = st.container()
     with chat_container:
-        for chat in st.session_state.chat_history:
-            if chat["role"] == "user":
-                st.markdown(f'<div class="chat-message user-message"><b>You:</b> {chat["content"]}</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="chat-message assistant-message"><b>Jarvis:</b> {chat["content"]}</div>', unsafe_allow_html=True)
-                if "timestamp" in chat:
-                    st.caption(f"Time: {chat['timestamp']}")
+        history = st.session_state.session.history
+        history.page_in(st.session_state.get("chat_window", PAGE_SIZE))
+        render_chat(st, history.earlier + history.messages(), total=history.total_messages())
+        render_speech()
     
     # Input methods
     st.subheader("Input Method")
@@ -356,26 +414,8 @@ with col1:
             if st.button("🚀 Send", use_container_width=True):
                 if user_input:
                     with st.spinner("Processing..."):
-                        response, command_type = process_command(user_input, ai_model=ai_model, temperature=temperature, ai_provider=selected_provider)
-                        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                        
-                        st.session_state.chat_history.append({
-                            "role": "user",
-                            "content": user_input,
-                            "timestamp": timestamp
-                        })
-                        st.session_state.chat_history.append({
-                            "role": "assistant",
-                            "content": response,
-                            "timestamp": timestamp,
-                            "type": command_type
-                        })
-                        st.session_state.command_history.append({
-                            "command": user_input,
-                            "response": response,
-                            "type": command_type,
-                            "timestamp": timestamp
-                        })
+                        response, command_type = process_command(st.session_state.session, user_input, **chat_options)
+                        st.session_state.session.record_turn(user_input, response, command_type)
                         
                         if enable_tts:
                             say_text(response)
@@ -387,30 +427,12 @@ with col1:
                 st.session_state.is_listening = True
                 with st.spinner("Listening... Speak now!"):
                     try:
-                        query = take_voice_command()
+                        query = take_voice_command(language)
                         if query and "Error" not in query and "Timeout" not in query and "Could not understand" not in query:
                             # Process the voice command directly
                             with st.spinner("Processing your command..."):
-                                response, command_type = process_command(query, ai_model=ai_model, temperature=temperature, ai_provider=selected_provider)
-                                timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                                
-                                st.session_state.chat_history.append({
-                                    "role": "user",
-                                    "content": query,
-                                    "timestamp": timestamp
-                                })
-                                st.session_state.chat_history.append({
-                                    "role": "assistant",
-                                    "content": response,
-                                    "timestamp": timestamp,
-                                    "type": command_type
-                                })
-                                st.session_state.command_history.append({
-                                    "command": query,
-                                    "response": response,
-                                    "type": command_type,
-                                    "timestamp": timestamp
-                                })
+                                response, command_type = process_command(st.session_state.session, query, **chat_options)
+                                st.session_state.session.record_turn(query, response, command_type)
                                 
                                 if enable_tts:
                                     say_text(response)
@@ -432,29 +454,11 @@ with col1:
             st.session_state.is_listening = True
             with st.spinner("Listening... Speak now!"):
                 try:
-                    query = take_voice_command()
+                    query = take_voice_command(language)
                     if query and "Error" not in query and "Timeout" not in query:
                         with st.spinner("Processing your command..."):
-                            response, command_type = process_command(query, ai_model=ai_model, temperature=temperature)
-                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                            
-                            st.session_state.chat_history.append({
-                                "role": "user",
-                                "content": query,
-                                "timestamp": timestamp
-                            })
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": response,
-                                "timestamp": timestamp,
-                                "type": command_type
-                            })
-                            st.session_state.command_history.append({
-                                "command": query,
-                                "response": response,
-                                "type": command_type,
-                                "timestamp": timestamp
-                            })
+                            response, command_type = process_command(st.session_state.session, query, **chat_options)
+                            st.session_state.session.record_turn(query, response, command_type)
                             
                             if enable_tts:
                                 say_text(response)
@@ -493,20 +497,8 @@ with col2:
     for cmd in quick_commands:
         if st.button(cmd, key=f"quick_{cmd}", use_container_width=True):
             with st.spinner("Processing..."):
-                response, command_type = process_command(cmd, ai_model=ai_model, temperature=temperature, ai_provider=selected_provider)
-                timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                
-                st.session_state.chat_history.append({
-                    "role": "user",
-                    "content": cmd,
-                    "timestamp": timestamp
-                })
-                st.session_state.chat_history.append({
-                    "role": "assistant",
-                    "content": response,
-                    "timestamp": timestamp,
-                    "type": command_type
-                })
+                response, command_type = process_command(st.session_state.session, cmd, **chat_options)
+                st.session_state.session.record_turn(cmd, response, command_type, log_command=False)
                 
                 if enable_tts:
                     say_text(response)
@@ -514,9 +506,10 @@ with col2:
                 st.rerun()
     
     # Command history
-    if show_history and st.session_state.command_history:
+    recent_commands = st.session_state.session.history.commands(5) if show_history else []
+    if recent_commands:
         st.subheader("📜 Recent Commands")
-        for cmd in st.session_state.command_history[-5:]:
+        for cmd in recent_commands:
             with st.expander(f"{cmd['timestamp']} - {cmd['type']}"):
                 st.write(f"**Command:** {cmd['command']}")
                 st.write(f"**Response:** {cmd['response'][:100]}...")
@@ -539,5 +532,7 @@ with col3:
     st.write("• Calculate [expression]")
     st.write("• Save note [content]")
     st.write("• Read notes")
+    st.write("• Search notes [keywords]")
+    st.write("• Delete note [number]")
     st.write("• Chat naturally with Jarvis")
 
@@ -0,0 +1,42 @@
+"""
+Async Bridge
+Runs coroutines from synchronous code (the Streamlit script thread) on one shared background event loop
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, List, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide background event loop (started on first use)"""
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="nova-async-loop", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_async(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the background loop and block until it finishes"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def gather_async(*coros: Awaitable, timeout: Optional[float] = None) -> List[Any]:
+    """Run several coroutines concurrently; exceptions are returned in place of results"""
+    async def _gather():
+        return await asyncio.gather(*coros, return_exceptions=True)
+    return run_async(_gather(), timeout)
@@ -0,0 +1,259 @@
+"""
+Async AI Providers
+Asyncio twins of the chat functions in ai_providers.py, built on shared per-loop async clients
+"""
+import time
+from typing import Dict, List
+
+from ai_providers import (
+    DEFAULT_MODELS, MODEL_FALLBACK_PROVIDERS, PROVIDERS, get_provider_key, get_provider_base_url, get_request_key,
+    _to_prompt, _to_claude_messages, _to_gemini_messages
+)
+from clients import (
+    get_async_http_client, get_async_openai_client, get_async_groq_client,
+    get_async_anthropic_client, get_gemini_model, load_sdk
+)
+from metrics import record_latency, record_outcome
+from health import get_health_registry
+from rate_limit import RATE_LIMIT_RETRIES, estimate_request_tokens, get_rate_limiter, is_rate_limited
+import response_cache
+
+
+async def achat_groq(messages: List[Dict], model: str = "llama-3.1-8b-instant", temperature: float = 0.7) -> str:
+    """Chat using Groq API (async)"""
+    try:
+        api_key = get_provider_key("groq")
+        if not api_key:
+            return "Error: GROQ_API_KEY not found in .env file. Get a free key from https://console.groq.com/"
+
+        client = get_async_groq_client(api_key, get_provider_base_url("groq"))
+        available_models = PROVIDERS["groq"]["models"]
+        if model == "llama-3.1-70b-versatile":
+            model = "llama-3.3-70b-versatile"
+        models_to_try = [model] + [m for m in available_models if m != model] if model in available_models else available_models
+
+        health = get_health_registry()
+        last_error = None
+        for model_to_try in models_to_try:
+            if not health.allow("groq", model_to_try):
+                continue
+            settled = False  # an outcome was recorded for this model's breaker slot
+            try:
+                response = await client.chat.completions.create(
+                    model=model_to_try,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=1000
+                )
+                settled = True
+                health.record_success("groq", model_to_try)
+                return response.choices[0].message.content.strip()
+            except Exception as e:
+                last_error = e
+                error_msg = str(e)
+                if is_rate_limited(f"Error: {error_msg}"):
+                    break
+                settled = True
+                health.record_failure("groq", model_to_try, error_msg)
+                if "401" in error_msg or "unauthorized" in error_msg.lower():
+                    break
+                if "400" in error_msg or "model" in error_msg.lower() or "deprecated" in error_msg.lower():
+                    continue
+                break
+            finally:
+                if not settled:
+                    # Rate limited, or cancelled (e.g. the losing side of a hedged request): free a half-open probe slot
+                    health.release("groq", model_to_try)
+
+        if last_error is None:
+            return f"Error: All Groq models are temporarily unavailable after repeated failures. Tried: {', '.join(models_to_try)}."
+        error_msg = str(last_error)
+        if "401" in error_msg or "unauthorized" in error_msg.lower():
+            return "Error: Invalid Groq API key. Please check your GROQ_API_KEY in the .env file."
+        return f"Error with Groq API: {error_msg}"
+    except ImportError:
+        return "Error: groq package not installed. Run: pip install groq"
+    except Exception as e:
+        return f"Error with Groq API: {str(e)}"
+
+
+async def achat_huggingface(messages: List[Dict], model: str = "mistralai/Mistral-7B-Instruct-v0.2", temperature: float = 0.7) -> str:
+    """Chat using Hugging Face Inference API (async)"""
+    try:
+        api_key = get_provider_key("huggingface")
+        if not api_key:
+            return "Error: HUGGINGFACE_API_KEY not found in .env file. Get a free key from https://huggingface.co/settings/tokens"
+
+        payload = {
+            "inputs": _to_prompt(messages),
+            "parameters": {
+                "max_new_tokens": 1000,
+                "temperature": temperature,
+                "return_full_text": False
+            }
+        }
+        response = await get_async_http_client().post(
+            f"{get_provider_base_url('huggingface')}/{model}",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json=payload,
+            timeout=30
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            if isinstance(result, list) and len(result) > 0:
+                return result[0].get("generated_text", "").strip()
+            elif isinstance(result, dict):
+                return result.get("generated_text", str(result)).strip()
+            return str(result).strip()
+        return f"Error: Hugging Face API returned status {response.status_code}: {response.text}"
+    except Exception as e:
+        return f"Error with Hugging Face API: {str(e)}"
+
+
+async def achat_together(messages: List[Dict], model: str = "meta-llama/Llama-2-70b-chat-hf", temperature: float = 0.7) -> str:
+    """Chat using Together AI API (async)"""
+    try:
+        api_key = get_provider_key("together")
+        if not api_key:
+            return "Error: TOGETHER_API_KEY not found in .env file. Get a free key from https://api.together.xyz/"
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": 1000
+        }
+        response = await get_async_http_client().post(
+            f"{get_provider_base_url('together')}/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json=payload,
+            timeout=30
+        )
+
+        if response.status_code == 200:
+            return response.json()["choices"][0]["message"]["content"].strip()
+        return f"Error: Together AI API returned status {response.status_code}: {response.text}"
+    except Exception as e:
+        return f"Error with Together AI API: {str(e)}"
+
+
+async def achat_anthropic(messages: List[Dict], model: str = "claude-3-haiku-20240307", temperature: float = 0.7) -> str:
+    """Chat using Anthropic Claude API (async)"""
+    try:
+        api_key = get_provider_key("anthropic")
+        if not api_key:
+            return "Error: ANTHROPIC_API_KEY not found in .env file. Get a free key from https://console.anthropic.com/"
+
+        client = get_async_anthropic_client(api_key, get_provider_base_url("anthropic"))
+        system_message, claude_messages = _to_claude_messages(messages)
+        response = await client.messages.create(
+            model=model,
+            max_tokens=1000,
+            temperature=temperature,
+            system=system_message if system_message else "You are a helpful AI assistant.",
+            messages=claude_messages
+        )
+        return response.content[0].text.strip()
+    except ImportError:
+        return "Error: anthropic package not installed. Run: pip install anthropic"
+    except Exception as e:
+        return f"Error with Anthropic API: {str(e)}"
+
+
+async def achat_gemini(messages: List[Dict], model: str = "gemini-1.5-flash", temperature: float = 0.7) -> str:
+    """Chat using Google Gemini API (async)"""
+    try:
+        genai = load_sdk("google.generativeai")
+
+        api_key = get_provider_key("google")
+        if not api_key:
+            return "Error: GOOGLE_API_KEY not found in .env file. Get a free key from https://aistudio.google.com/"
+
+        system_instruction, gemini_messages = _to_gemini_messages(messages)
+        model_instance = get_gemini_model(api_key, model, system_instruction if system_instruction else None)
+        response = await model_instance.generate_content_async(
+            contents=gemini_messages,
+            generation_config=genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=1000
+            )
+        )
+        return response.text.strip()
+    except ImportError:
+        return "Error: google-generativeai package not installed. Run: pip install google-generativeai"
+    except Exception as e:
+        return f"Error with Gemini API: {str(e)}"
+
+
+async def achat_openai(messages: List[Dict], model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
+    """Chat using OpenAI API (async)"""
+    try:
+        from config import apikey
+
+        if not apikey or apikey == "your_api_key_here" or len(apikey) < 20:
+            return "Error: Invalid OpenAI API key. Please set a valid OPENAI_API_KEY in your .env file."
+
+        client = get_async_openai_client(apikey, get_provider_base_url("openai"))
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=1000
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        return f"Error with OpenAI API: {str(e)}"
+
+
+async def achat_with_provider(provider: str, messages: List[Dict], model: str = None, temperature: float = 0.7,
+                              cache_nondeterministic: bool = False) -> str:
+    """Async twin of chat_with_provider (shares its response cache)"""
+    chat_functions = {
+        "groq": achat_groq,
+        "huggingface": achat_huggingface,
+        "together": achat_together,
+        "anthropic": achat_anthropic,
+        "google": achat_gemini,
+        "openai": achat_openai,
+    }
+    if provider not in chat_functions:
+        return f"Error: Unknown provider '{provider}'"
+    model = model or DEFAULT_MODELS[provider]
+    key, cached = response_cache.lookup(provider, model, messages, temperature, 1000, cache_nondeterministic)
+    if cached is not None:
+        return cached
+    health = get_health_registry()
+    self_managed = provider in MODEL_FALLBACK_PROVIDERS
+    if not self_managed and not health.allow(provider, model):
+        return health.unavailable_message(provider, model)
+    limiter = get_rate_limiter(provider, get_request_key(provider))
+    tokens = estimate_request_tokens(messages)
+    try:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            if not await limiter.aacquire(tokens):
+                if not self_managed:
+                    health.release(provider, model)
+                return limiter.rejection_message()
+            start = time.perf_counter()
+            response = await chat_functions[provider](messages, model, temperature)
+            if not is_rate_limited(response):
+                break
+            if limiter.blocked_until <= time.monotonic():
+                limiter.note_rate_limited(response)
+    except BaseException:
+        # Cancelled (e.g. the losing side of a hedged request): free a half-open probe slot
+        if not self_managed:
+            health.release(provider, model)
+        raise
+    if not self_managed:
+        if is_rate_limited(response):
+            health.release(provider, model)
+        else:
+            health.record_response(provider, model, response)
+    record_outcome(provider, model, not response.startswith("Error"))
+    if not response.startswith("Error"):
+        elapsed = time.perf_counter() - start
+        record_latency("latency", provider, model, elapsed)
+        response_cache.store(key, response, elapsed, messages)
+    return response
@@ -0,0 +1,210 @@
+"""
+Batch Chat
+Run many conversations at once with bounded per-provider concurrency, or through a provider's native batch endpoint
+
+Usage: python batch.py [--provider groq] [--concurrency 4] [--native] [--save] FILE...
+       (one prompt per line; saved responses from the Openai/ folder are re-run from their "Prompt:" line)
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+from typing import Dict, List, Optional, Union
+
+from ai_providers import DEFAULT_MODELS, get_available_providers, get_provider_base_url, get_provider_key
+from async_bridge import run_async
+from async_providers import achat_with_provider
+from router import DEFAULT_POLICY, choose_provider
+
+# In-flight requests per provider; free tiers get small caps so a batch does not trip their rate limits
+PROVIDER_CONCURRENCY = {
+    "groq": 4,
+    "google": 2,
+    "huggingface": 4,
+    "together": 8,
+    "anthropic": 4,
+    "openai": 8,
+}
+DEFAULT_CONCURRENCY = int(os.getenv("NOVA_BATCH_CONCURRENCY", "8"))
+# Providers with an OpenAI-compatible /v1/batches endpoint
+NATIVE_BATCH_PROVIDERS = {"openai", "groq"}
+NATIVE_POLL_INTERVAL = 10.0
+
+BatchRequest = Union[str, List[Dict], Dict]
+
+
+def _normalize(request: BatchRequest) -> Dict:
+    """Accept a prompt string, a message list, or {"messages", "provider", "model", "temperature"}"""
+    if isinstance(request, str):
+        return {"messages": [{"role": "user", "content": request}]}
+    if isinstance(request, list):
+        return {"messages": request}
+    return dict(request)
+
+
+def _result(index: int, provider: Optional[str], model: Optional[str], response: str, latency: float) -> Dict:
+    failed = response.startswith("Error")
+    return {
+        "index": index,
+        "provider": provider,
+        "model": model,
+        "response": None if failed else response,
+        "error": response if failed else None,
+        "latency": latency,
+    }
+
+
+async def achat_batch(requests: List[BatchRequest], provider: str = "auto", model: str = None,
+                      temperature: float = 0.7, max_concurrency: int = None,
+                      routing_policy: str = DEFAULT_POLICY) -> List[Dict]:
+    """Run every request concurrently; results keep input order.
+
+    Each result is {"index", "provider", "model", "response", "error", "latency"}; exactly one of
+    response / error is set. Items may override provider, model and temperature. provider="auto"
+    lets the router pick per item, which spreads a batch across providers as their scores change.
+    At most max_concurrency requests run at once, and never more than PROVIDER_CONCURRENCY per provider.
+    """
+    overall = asyncio.Semaphore(max_concurrency or DEFAULT_CONCURRENCY)
+    per_provider: Dict[str, asyncio.Semaphore] = {}
+    available = get_available_providers()
+
+    async def run_one(index: int, request: BatchRequest) -> Dict:
+        item = _normalize(request)
+        item_provider = item.get("provider", provider)
+        item_model = item.get("model", model)
+        if item_provider == "auto":
+            item_provider = choose_provider(available, routing_policy)
+            item_model = item.get("model")  # a model name only makes sense for an explicit provider
+            if item_provider is None:
+                return _result(index, None, None, "Error: No AI provider is configured.", 0.0)
+        limit = min(max_concurrency or DEFAULT_CONCURRENCY, PROVIDER_CONCURRENCY.get(item_provider, DEFAULT_CONCURRENCY))
+        semaphore = per_provider.setdefault(item_provider, asyncio.Semaphore(limit))
+        # Provider slot first, so items queued for a busy provider do not hold overall slots
+        async with semaphore, overall:
+            start = time.perf_counter()
+            try:
+                response = await achat_with_provider(
+                    item_provider, item["messages"], item_model, item.get("temperature", temperature)
+                )
+            except Exception as e:
+                response = f"Error: {str(e)}"
+            return _result(index, item_provider, item_model or DEFAULT_MODELS.get(item_provider),
+                           response, time.perf_counter() - start)
+
+    return list(await asyncio.gather(*(run_one(i, r) for i, r in enumerate(requests))))
+
+
+def _native_client(provider: str):
+    from clients import get_groq_client, get_openai_client
+    from config import apikey
+
+    if provider == "openai":
+        return get_openai_client(apikey, get_provider_base_url("openai"))
+    return get_groq_client(get_provider_key("groq"), get_provider_base_url("groq"))
+
+
+def native_batch(requests: List[BatchRequest], provider: str = "openai", model: str = None,
+                 temperature: float = 0.7, timeout: float = 3600.0,
+                 poll_interval: float = NATIVE_POLL_INTERVAL) -> List[Dict]:
+    """Submit requests to the provider's /v1/batches endpoint (cheaper, but minutes-to-hours latency).
+
+    Waits up to timeout seconds; items without an answer by then carry an error naming the batch id,
+    so the job can be collected later from the provider's dashboard.
+    """
+    model = model or DEFAULT_MODELS[provider]
+    items = [_normalize(r) for r in requests]
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": item.get("model", model),
+                "messages": item["messages"],
+                "temperature": item.get("temperature", temperature),
+                "max_tokens": 1000,
+            },
+        })
+        for i, item in enumerate(items)
+    ]
+    start = time.perf_counter()
+    try:
+        client = _native_client(provider)
+        upload = client.files.create(file=("batch.jsonl", io.BytesIO("\n".join(lines).encode())), purpose="batch")
+        batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.perf_counter() - start > timeout:
+                break
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+
+        answers = {}
+        if batch.status == "completed" and batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    body = (record.get("response") or {}).get("body") or {}
+                    if body.get("choices"):
+                        answers[record["custom_id"]] = body["choices"][0]["message"]["content"].strip()
+                    else:
+                        answers[record["custom_id"]] = f"Error: {record.get('error') or body.get('error')}"
+        pending = f"Error: {provider} batch {batch.id} is {batch.status}"
+    except Exception as e:
+        answers, pending = {}, f"Error with {provider} batch API: {str(e)}"
+
+    elapsed = time.perf_counter() - start
+    return [
+        _result(i, provider, item.get("model", model), answers.get(str(i), pending), elapsed)
+        for i, item in enumerate(items)
+    ]
+
+
+def chat_batch(requests: List[BatchRequest], provider: str = "auto", model: str = None, temperature: float = 0.7,
+               max_concurrency: int = None, native: bool = False, routing_policy: str = DEFAULT_POLICY) -> List[Dict]:
+    """Synchronous batch entry point: native provider batches when requested and supported, else achat_batch"""
+    if native and provider in NATIVE_BATCH_PROVIDERS:
+        return native_batch(requests, provider, model, temperature)
+    return run_async(achat_batch(requests, provider, model, temperature, max_concurrency, routing_policy))
+
+
+def _read_prompts(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.startswith("Prompt:"):
+        # A response saved by utils.save_ai_response
+        return [text.splitlines()[0][len("Prompt:"):].strip()]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run prompts through the chat providers in parallel")
+    parser.add_argument("files", nargs="+", help="text files with one prompt per line, or saved Openai/ responses")
+    parser.add_argument("--provider", default="auto")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--native", action="store_true", help="use the provider's batch endpoint (openai, groq)")
+    parser.add_argument("--save", action="store_true", help="save each answer to the Openai/ folder")
+    args = parser.parse_args()
+
+    prompts = [prompt for path in args.files for prompt in _read_prompts(path)]
+    start = time.perf_counter()
+    results = chat_batch(prompts, args.provider, args.model, args.temperature, args.concurrency, args.native)
+    elapsed = time.perf_counter() - start
+
+    if args.save:
+        from utils import save_ai_response
+
+    for prompt, result in zip(prompts, results):
+        status = "error" if result["error"] else f"{result['latency'] * 1000:.0f} ms"
+        print(f"[{result['index']}] {result['provider']} ({status}): {prompt[:60]}")
+        if args.save and not result["error"]:
+            save_ai_response(prompt, result["response"], filename=f"batch_{result['index']}")
+    errors = sum(1 for r in results if r["error"])
+    print(f"\n{len(results)} requests in {elapsed:.1f}s, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
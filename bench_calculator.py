@@ -0,0 +1,57 @@
+"""
+Calculator Benchmark
+Time to reject hostile inputs that made the old eval-based calculator hang, plus per-expression cost of
+evaluate() (cold and cached parse) vs evaluate_batch() with NumPy
+
+Usage: python bench_calculator.py [expressions]
+"""
+import random
+import sys
+import time
+
+from calculator import evaluate, evaluate_batch, parse_expression
+
+HOSTILE = ["9**9**9", "2**2**2**2**2", "10**10**10", "factorial(100000)", "(10**5000)*(10**5000)",
+           "9" * 400 + "**9", "1" + "+1" * 300, "__import__('os').system('true')"]
+SHAPES = ["{a} * {b} + {c}", "sqrt({a}) / ({b} + 1)", "({a} + {b}) ** 2 - {c}", "log({a} + 1) * sin({b})"]
+
+
+def _expressions(count: int):
+    rng = random.Random(3)
+    return [rng.choice(SHAPES).format(a=rng.randint(1, 999), b=rng.randint(1, 999), c=rng.randint(1, 999))
+            for _ in range(count)]
+
+
+def run(count: int = 100000):
+    print("hostile inputs (the eval-based calculator ran the first three for minutes or forever)")
+    for expression in HOSTILE:
+        start = time.perf_counter()
+        try:
+            outcome = f"value with {len(str(evaluate(expression)))} digits"
+        except Exception as e:
+            outcome = f"rejected: {e}"
+        print(f"  {expression[:32]:<32} {(time.perf_counter() - start) * 1e6:>8.0f} us  {outcome}")
+
+    expressions = _expressions(count)
+    parse_expression.cache_clear()
+    start = time.perf_counter()
+    for expression in expressions[:2000]:
+        evaluate(expression)
+    cold = (time.perf_counter() - start) / 2000 * 1e6
+    start = time.perf_counter()
+    for expression in expressions[:2000]:
+        evaluate(expression)
+    warm = (time.perf_counter() - start) / 2000 * 1e6
+    start = time.perf_counter()
+    results = evaluate_batch(expressions)
+    batch = (time.perf_counter() - start) / count * 1e6
+    errors = sum(isinstance(r, Exception) for r in results)
+
+    print(f"\n{'mode':<26} {'us/expression':>14}")
+    print(f"{'evaluate (parse)':<26} {cold:>14.1f}")
+    print(f"{'evaluate (cached parse)':<26} {warm:>14.1f}")
+    print(f"{'evaluate_batch ' + str(count):<26} {batch:>14.1f}   ({errors} errors)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,66 @@
+"""
+Client Pooling Benchmark
+Per-turn latency with fresh clients per call vs the pooled client registry, against a local stub server
+
+Usage: python bench_clients.py [turns]
+"""
+import os
+import statistics
+import sys
+import time
+
+from stub_provider import start_stub_server, stop_stub_server
+
+
+def _summarize(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.mean(samples) * 1000, statistics.median(samples) * 1000, p95 * 1000
+
+
+def run(turns: int = 200):
+    server, base_url = start_stub_server()
+    # Point every OpenAI-compatible provider at the stub (set before importing the provider modules)
+    os.environ["TOGETHER_API_KEY"] = "stub-key"
+    os.environ["TOGETHER_BASE_URL"] = base_url
+    os.environ["HUGGINGFACE_API_KEY"] = "stub-key"
+    os.environ["HUGGINGFACE_BASE_URL"] = base_url + "/models"
+    os.environ["OPENAI_API_KEY"] = "sk-stub-0000000000000000000000"
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    import clients
+    from ai_providers import chat_with_provider
+
+    messages = [{"role": "user", "content": "Hello"}]
+    providers = ["together", "huggingface"]
+    try:
+        import openai  # noqa: F401
+        providers.append("openai")
+    except ImportError:
+        print("openai package not installed; skipping the openai provider")
+
+    print(f"{turns} turns per provider against {base_url}")
+    print(f"{'provider':<12} {'mode':<9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    try:
+        for provider in providers:
+            for mode in ("per-call", "pooled"):
+                clients.clear_clients()
+                samples = []
+                for _ in range(turns):
+                    if mode == "per-call":
+                        clients.clear_clients()
+                    start = time.perf_counter()
+                    reply = chat_with_provider(provider, messages)
+                    samples.append(time.perf_counter() - start)
+                    if reply.startswith("Error"):
+                        raise RuntimeError(reply)
+                mean, p50, p95 = _summarize(samples)
+                print(f"{provider:<12} {mode:<9} {mean:>9.2f} {p50:>9.2f} {p95:>9.2f}")
+    finally:
+        clients.clear_clients()
+        stop_stub_server(server)
+    print("Note: the stub is plain HTTP on loopback; TLS handshakes make the per-call cost much larger in production.")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,61 @@
+"""
+Conversation Store Benchmark
+Write cost per turn with a commit per turn vs the batching writer, and session resume time (newest window only
+vs every message) as a conversation grows. Runs in a temporary directory.
+
+Usage: python bench_conversations.py [turns]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from chat_view import new_message
+from conversation_store import RESUME_WINDOW, ConversationStore
+
+SIZES = [1000, 10000, 50000]
+
+
+def _turn(i: int):
+    return [new_message("user", f"Question {i}: what is on my calendar today?", "12:00:00"),
+            new_message("assistant", f"Answer {i}: " + "You have a meeting at ten and lunch at noon. " * 3,
+                        "12:00:01", type="chat")]
+
+
+def run(turns: int = 2000):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{turns} turns appended")
+        print(f"{'writer':<22} {'us/turn':>9} {'commits':>8}")
+        for label, flush_each in (("commit per turn", True), ("batched writer", False)):
+            store = ConversationStore(os.path.join(directory, f"{label.split()[0]}.sqlite3"))
+            start = time.perf_counter()
+            for i in range(turns):
+                store.append_messages("bench", _turn(i))
+                if flush_each:
+                    store.flush()
+            store.flush()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<22} {elapsed / turns * 1e6:>9.1f} {store.get_stats()['commits']:>8}")
+            store.close()
+
+        print(f"\n{'messages':>9} {'resume window ms':>17} {'load all ms':>12}")
+        store = ConversationStore(os.path.join(directory, "resume.sqlite3"))
+        written = 0
+        for size in SIZES:
+            while written < size:
+                store.append_messages("long", _turn(written // 2))
+                written += 2
+            store.flush()
+            start = time.perf_counter()
+            window = store.recent("long", RESUME_WINDOW)
+            recent_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            everything = list(store.iter_messages("long"))
+            all_ms = (time.perf_counter() - start) * 1000
+            assert len(window) == min(RESUME_WINDOW, size) and len(everything) == size
+            print(f"{size:>9} {recent_ms:>17.2f} {all_ms:>12.1f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
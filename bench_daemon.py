@@ -0,0 +1,63 @@
+"""
+Daemon Benchmark
+Per-turn cost over a long headless session: the old main.py transcript (the whole chatStr is the prompt and is
+printed every turn) vs the engine behind daemon.py (bounded Turn ring + rolling summary, reply-only output).
+Drives the engine against a local stub server in a temporary data directory.
+
+Usage: python bench_daemon.py [turns]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from stub_provider import start_stub_server, stop_stub_server
+
+CHECKPOINTS = [10, 100, 500, 1000]
+
+
+def run(turns: int = 1000):
+    server, base_url = start_stub_server(reply="Sure. " + "Here is a short, friendly answer to that question. " * 3)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.update({
+            "OPENAI_API_KEY": "sk-stub-0000000000000000000000", "OPENAI_BASE_URL": base_url, "NOVA_PROVIDER": "openai",
+            "NOVA_RATE_LIMIT_OPENAI": "0,0",  # the stub has no quota to protect
+            "NOVA_CONVERSATION_DB": os.path.join(directory, "conversations.sqlite3"),
+            "NOVA_RETRIEVAL_DIR": os.path.join(directory, "retrieval"),
+            "NOVA_NOTES_DB": os.path.join(directory, "notes.sqlite3"),
+        })
+        import engine
+        from daemon import Daemon
+
+        prompt_chars = []
+        original = engine.ai_chat
+
+        def measured_chat(messages, **kwargs):
+            prompt_chars.append(sum(len(m["content"]) for m in messages))
+            return original(messages, **kwargs)
+
+        engine.ai_chat = measured_chat
+        daemon = Daemon({"use_memory": False})
+        session = daemon.session()
+        chat_str, old_printed, new_printed = "", 0, 0
+        print(f"{'turn':>6} {'ms/turn':>8} {'prompt chars':>13} {'old prompt chars':>17} {'printed KB':>11} "
+              f"{'old printed KB':>15}")
+        block_start, done = time.perf_counter(), 0
+        for turn in range(1, turns + 1):
+            query = f"Tell me something interesting about topic number {turn}"
+            response, _ = daemon.handle(session, query)
+            new_printed += len(response) + 1
+            # main.py before: chatStr grew by every exchange and was printed in full each turn
+            chat_str += f"Harry: {query}\n Jarvis: {response}\n"
+            old_printed += len(chat_str)
+            if turn in CHECKPOINTS or turn == turns:
+                ms = (time.perf_counter() - block_start) * 1000 / (turn - done)
+                print(f"{turn:>6} {ms:>8.2f} {prompt_chars[-1]:>13} {len(chat_str):>17} {new_printed / 1024:>11.1f} "
+                      f"{old_printed / 1024:>15.1f}")
+                block_start, done = time.perf_counter(), turn
+        engine.ai_chat = original
+    stop_stub_server(server)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
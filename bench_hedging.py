@@ -0,0 +1,62 @@
+"""
+Hedged Request Benchmark
+Latency percentiles for single-provider vs hedged requests against two local stub servers with a slow tail
+
+Usage: python bench_hedging.py [requests]
+"""
+import os
+import sys
+import time
+
+from stub_provider import start_stub_server, stop_stub_server
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda pct: ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))] * 1000
+    return pick(50), pick(95), pick(99)
+
+
+def run(requests_count: int = 200):
+    # Both providers answer in 30 ms, but 5% of requests stall for 1.5 s (free-tier tail)
+    primary_server, primary_url = start_stub_server(latency=0.03, tail_latency=1.5, tail_probability=0.05)
+    backup_server, backup_url = start_stub_server(latency=0.03, tail_latency=1.5, tail_probability=0.05)
+    os.environ["TOGETHER_API_KEY"] = "stub-key"
+    os.environ["TOGETHER_BASE_URL"] = primary_url
+    os.environ["HUGGINGFACE_API_KEY"] = "stub-key"
+    os.environ["HUGGINGFACE_BASE_URL"] = backup_url + "/models"
+
+    from async_bridge import run_async
+    from async_providers import achat_with_provider
+    from hedging import get_hedge_stats, hedged_chat
+
+    messages = [{"role": "user", "content": "Hello"}]
+    results = {}
+    try:
+        samples = []
+        for _ in range(requests_count):
+            start = time.perf_counter()
+            run_async(achat_with_provider("together", messages))
+            samples.append(time.perf_counter() - start)
+        results["single provider"] = samples
+
+        samples = []
+        for _ in range(requests_count):
+            start = time.perf_counter()
+            hedged_chat(messages, "together", "huggingface", delay=0.1)
+            samples.append(time.perf_counter() - start)
+        results["hedged (100 ms)"] = samples
+    finally:
+        stop_stub_server(primary_server)
+        stop_stub_server(backup_server)
+
+    print(f"{requests_count} requests; 5% of upstream calls take 1.5 s")
+    print(f"{'mode':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for mode, samples in results.items():
+        p50, p95, p99 = _percentiles(samples)
+        print(f"{mode:<18} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+    print(f"hedge stats: {get_hedge_stats()}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
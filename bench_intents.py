@@ -0,0 +1,83 @@
+"""
+Intent Matching Micro-benchmark
+Per-query cost of the old linear substring chain vs the compiled intent index, as site shortcuts grow
+
+Usage: python bench_intents.py [iterations]
+"""
+import sys
+import time
+
+import intents
+
+QUERIES = [
+    "open youtube",
+    "please open github.com for me",
+    "what's the time?",
+    "what is the date today",
+    "weather in London and Paris",
+    "calculate 25 + 17",
+    "latest news sports",
+    "save note buy milk",
+    "read notes",
+    "tell me a story about a dragon who learns to code",
+    "what is the meaning of life",
+    "how do I open a jar that is stuck",
+]
+
+
+def legacy_match(query, sites):
+    """The pre-index process_command chain (intent name only, no side effects)"""
+    query_lower = query.lower()
+    for site in sites:
+        site_patterns = [f"open {site[0]}", f"open {site[0]}.com", f"open {site[0]}.net"]
+        if any(pattern in query_lower for pattern in site_patterns):
+            return "website"
+    if "the time" in query_lower or "what time" in query_lower:
+        return "time"
+    if "the date" in query_lower or "what date" in query_lower:
+        return "date"
+    if "weather" in query_lower:
+        return "weather"
+    if "calculate" in query_lower or "what is" in query_lower and any(op in query_lower for op in ["+", "-", "*", "/", "plus", "minus", "times", "divided"]):
+        return "calculator"
+    if "news" in query_lower:
+        return "news"
+    if "save note" in query_lower or "remember" in query_lower:
+        return "save_note"
+    if "read notes" in query_lower or "show notes" in query_lower:
+        return "read_notes"
+    if "using artificial intelligence" in query_lower:
+        return "ai_completion"
+    return None
+
+
+def _per_query_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) / (iterations * len(QUERIES)) * 1e6
+
+
+def run(iterations: int = 2000):
+    base_sites = dict(intents.SITES)
+    print(f"{'sites':>6} {'legacy us/query':>16} {'index us/query':>15}")
+    for extra in (0, 100, 1000, 10000):
+        intents.SITES.clear()
+        intents.SITES.update(base_sites)
+        intents.register_sites({f"site{i}": f"https://site{i}.example" for i in range(extra)})
+        # The legacy chain rebuilt its list on every call; building it once here favours it
+        sites = [[name, url] for name, url in intents.SITES.items()]
+        # Sanity check: both agree on the built-in queries
+        for query in QUERIES:
+            found = intents.match_intent(query)
+            assert (found[0] if found else None) == legacy_match(query, sites), query
+        legacy = _per_query_us(lambda q: legacy_match(q, sites), max(1, iterations // (1 + extra // 100)))
+        index = _per_query_us(intents.match_intent, iterations)
+        print(f"{len(intents.SITES):>6} {legacy:>16.1f} {index:>15.1f}")
+    intents.SITES.clear()
+    intents.SITES.update(base_sites)
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
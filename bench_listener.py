@@ -0,0 +1,118 @@
+"""
+Continuous Listener Benchmark
+Utterances heard while the assistant is busy answering: the old listen -> recognize -> respond loop (audio that
+arrives while it is busy is lost, like an overflowing microphone buffer) vs the continuous listener. Replays a WAV
+file in real time, by default a generated one with one tone burst per "utterance", and uses a stub recognizer
+unless NOVA_BENCH_REAL_STT=1 and a backend is installed.
+
+Usage: python bench_listener.py [wav_file] [respond_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from listener import ContinuousListener
+from stt import (FRAME_MS, SAMPLE_RATE, NoiseCalibration, RecognizerStream, SpeechBackend, get_backend, listen,
+                 wav_frames)
+
+UTTERANCES = 8
+RECOGNIZE_SECONDS = 0.2
+
+
+class _StubStream(RecognizerStream):
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.bytes = 0
+
+    def accept(self, pcm: bytes) -> str:
+        self.bytes += len(pcm)
+        return ""
+
+    def finish(self) -> str:
+        time.sleep(RECOGNIZE_SECONDS)
+        return f"{self.bytes / 2 / self.sample_rate:.1f}s of speech"
+
+
+class _StubBackend(SpeechBackend):
+    """Takes RECOGNIZE_SECONDS per utterance and returns its duration"""
+
+    name = "stub"
+
+    def available(self) -> bool:
+        return True
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> RecognizerStream:
+        return _StubStream(sample_rate)
+
+
+def _make_clip(path: str) -> None:
+    rng = np.random.default_rng(0)
+    parts = [rng.normal(0, 40, SAMPLE_RATE)]
+    for i in range(UTTERANCES):
+        t = np.arange(int((0.6 + 0.1 * (i % 3)) * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(3000 * np.sin(2 * np.pi * 220 * t))
+        parts.append(rng.normal(0, 40, int(1.2 * SAMPLE_RATE)))
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+
+def _live(frames, lost):
+    """Frames at real-time pace; frames nobody read in time are lost, as when the microphone buffer overflows"""
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        due = start + i * FRAME_MS / 1000
+        now = time.perf_counter()
+        if now < due:
+            time.sleep(due - now)
+        elif now - due > 0.1:
+            lost.append(frame)
+            continue
+        yield frame
+
+
+def _serial(path: str, backend: SpeechBackend, respond: float):
+    heard, lost = [], []
+    frames = _live(wav_frames(path), lost)
+    calibration = NoiseCalibration()
+    while True:
+        try:
+            heard.append(listen(frames, backend=backend, calibration=calibration).text)
+        except TimeoutError:
+            break
+        time.sleep(respond)
+    return heard, len(lost)
+
+
+def _continuous(path: str, backend: SpeechBackend, respond: float):
+    lost = []
+    listener = ContinuousListener(_live(wav_frames(path), lost), backend=backend, calibration=NoiseCalibration())
+    heard = []
+    for transcript in listener.start().transcripts():
+        heard.append(transcript.text)
+        time.sleep(respond)
+    return heard, len(lost)
+
+
+def run(path: str = "", respond: float = 1.5):
+    backend = (get_backend() if os.getenv("NOVA_BENCH_REAL_STT") else None) or _StubBackend()
+    with tempfile.TemporaryDirectory() as directory:
+        if not path:
+            path = os.path.join(directory, "utterances.wav")
+            _make_clip(path)
+        print(f"backend: {backend.name}, {respond:.1f}s to respond to each command")
+        print(f"{'loop':<22} {'utterances heard':>17} {'audio lost (s)':>15} {'wall s':>7}")
+        for label, loop in (("listen/respond (old)", _serial), ("continuous listener", _continuous)):
+            start = time.perf_counter()
+            heard, lost = loop(path, backend, respond)
+            print(f"{label:<22} {len(heard):>17} {lost * FRAME_MS / 1000:>15.1f} {time.perf_counter() - start:>7.1f}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else "", float(sys.argv[2]) if len(sys.argv) > 2 else 1.5)
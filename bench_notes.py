@@ -0,0 +1,64 @@
+"""
+Notes Benchmark
+"read notes" / "save note" latency as notes accumulate: the old notes.txt (append, read the whole file) vs the
+SQLite store in notes_store.py (insert, newest page by id, FTS5 keyword search). Runs in a temporary directory.
+
+Usage: python bench_notes.py [iterations]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from notes_store import NOTES_PAGE_SIZE, NotesStore, format_notes
+
+SIZES = [100, 1000, 10000, 50000]
+WORDS = ["milk", "meeting", "python", "dentist", "invoice", "birthday", "flight", "gym", "report", "garden"]
+
+
+def _note(i: int) -> str:
+    return f"Note {i}: remember the {WORDS[i % len(WORDS)]} and the {WORDS[(i * 7) % len(WORDS)]} on day {i % 28}"
+
+
+def _median_ms(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _append_text(path: str, content: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\n[2024-01-01 12:00:00]\n{content}\n")
+
+
+def run(iterations: int = 50):
+    print(f"median of {iterations} calls, ms")
+    print(f"{'notes':>7} {'txt read':>9} {'txt save':>9} {'db latest':>10} {'db save':>8} {'db search':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            text_path = os.path.join(directory, f"notes-{size}.txt")
+            with open(text_path, "w", encoding="utf-8") as f:
+                f.writelines(f"\n[2024-01-01 12:00:00]\n{_note(i)}\n" for i in range(size))
+            store = NotesStore(os.path.join(directory, f"notes-{size}.sqlite3"))
+            imported = store.import_legacy(text_path)
+            assert imported == size, imported
+
+            txt_read = _median_ms(lambda: _read_text(text_path), iterations)
+            txt_save = _median_ms(lambda: _append_text(text_path, "benchmark note"), iterations)
+            db_latest = _median_ms(lambda: format_notes(store.latest(NOTES_PAGE_SIZE)), iterations)
+            db_save = _median_ms(lambda: store.add("benchmark note"), iterations)
+            db_search = _median_ms(lambda: store.search("dentist invoice"), iterations)
+            print(f"{size:>7} {txt_read:>9.3f} {txt_save:>9.3f} {db_latest:>10.3f} {db_save:>8.3f} {db_search:>10.3f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,78 @@
+"""
+Chat Rendering Benchmark
+Streamlit rerun time and payload as the chat history grows: one markdown element per message (the old loop)
+vs the windowed, memoized view in chat_view.py. Uses Streamlit's AppTest runner, no browser needed.
+
+Usage: python bench_render.py [reruns]
+"""
+import logging
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from chat_view import new_message
+
+# AppTest drives the script from this thread; Streamlit warns about the missing script context on each run
+# (a filter, because Streamlit resets its loggers' levels when it loads its config)
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage()
+)
+
+SIZES = [100, 500, 1000, 2000, 5000]
+
+
+def full_history_page():
+    import streamlit as st
+
+    for chat in st.session_state.chat_history:
+        if chat["role"] == "user":
+            st.markdown(f'<div class="chat-message user-message"><b>You:</b> {chat["content"]}</div>', unsafe_allow_html=True)
+        else:
+            st.markdown(f'<div class="chat-message assistant-message"><b>Jarvis:</b> {chat["content"]}</div>', unsafe_allow_html=True)
+            if "timestamp" in chat:
+                st.caption(f"Time: {chat['timestamp']}")
+
+
+def windowed_page():
+    import streamlit as st
+    from chat_view import render_chat
+
+    render_chat(st, st.session_state.chat_history)
+
+
+def _history(size: int):
+    history = []
+    for i in range(size // 2):
+        history.append(new_message("user", f"Question number {i}: what is the weather like today?", "12:00:00"))
+        history.append(new_message("assistant", f"Answer {i}: " + "It is sunny with a light breeze. " * 6, "12:00:01"))
+    return history
+
+
+def _measure(page, history, reruns: int):
+    app = AppTest.from_function(page, default_timeout=120)
+    app.session_state["chat_history"] = history
+    app.run()  # first run compiles the script (and fills the render cache)
+    samples = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - start)
+    payload = sum(len(m.value) for m in app.markdown) + sum(len(c.value) for c in app.caption)
+    elements = len(app.markdown) + len(app.caption)
+    return statistics.median(samples) * 1000, elements, payload
+
+
+def run(reruns: int = 5):
+    print(f"median of {reruns} reruns per size")
+    print(f"{'messages':>9} {'mode':<9} {'rerun ms':>9} {'elements':>9} {'payload KB':>11}")
+    for size in SIZES:
+        history = _history(size)
+        for mode, page in (("full", full_history_page), ("windowed", windowed_page)):
+            ms, elements, payload = _measure(page, history, reruns)
+            print(f"{size:>9} {mode:<9} {ms:>9.1f} {elements:>9} {payload / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
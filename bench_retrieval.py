@@ -0,0 +1,58 @@
+"""
+Retrieval Benchmark
+Indexing throughput and query latency of the memory-mapped hashing index as documents grow, plus the cost of
+an incremental sync when nothing changed. Runs in a temporary directory.
+
+Usage: python bench_retrieval.py [max_documents]
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from retrieval import RetrievalIndex
+
+TOPICS = ["dentist appointment", "flight to berlin", "python generators", "quarterly invoice", "birthday gift",
+          "gym schedule", "garden tomatoes", "kubernetes deployment", "tax return", "piano lessons"]
+FILLER = "remember to check the details and follow up later with everyone involved in this".split()
+QUERIES = ["when is my dentist appointment", "python generator question", "what did I buy for the birthday",
+           "kubernetes rollout notes", "berlin flight time"]
+
+
+def _document(rng: random.Random, i: int) -> str:
+    topic = TOPICS[i % len(TOPICS)]
+    return f"{topic} {i}: " + " ".join(rng.choice(FILLER) for _ in range(rng.randint(10, 40)))
+
+
+def run(max_documents: int = 100000, queries: int = 50):
+    rng = random.Random(7)
+    print(f"{'docs':>8} {'index docs/s':>13} {'query p50 ms':>13} {'query p95 ms':>13} {'noop sync ms':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        index = RetrievalIndex(directory)
+        indexed = 0
+        sizes = sorted({size for size in (1000, 10000, 100000) if size < max_documents} | {max_documents})
+        for size in sizes:
+            start = time.perf_counter()
+            index.add_many((f"doc:{i}", _document(rng, i), "Document") for i in range(indexed, size))
+            rate = (size - indexed) / (time.perf_counter() - start)
+            indexed = size
+
+            samples = []
+            for q in range(queries):
+                start = time.perf_counter()
+                hits = index.search(QUERIES[q % len(QUERIES)])
+                samples.append(time.perf_counter() - start)
+                assert hits, QUERIES[q % len(QUERIES)]
+            samples.sort()
+            p50 = statistics.median(samples) * 1000
+            p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+
+            start = time.perf_counter()
+            index.sync_files(directory, force=True)
+            noop = (time.perf_counter() - start) * 1000
+            print(f"{size:>8} {rate:>13.0f} {p50:>13.2f} {p95:>13.2f} {noop:>13.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
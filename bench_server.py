@@ -0,0 +1,159 @@
+"""
+HTTP Server Load Test
+Requests/sec and p50/p99 latency of server.py at increasing numbers of concurrent clients, each with its own
+session. The mix is 60% chat commands, 20% streamed chat (SSE, timed to the last event) and 20% notes/time
+commands. The stub provider and the server (python server.py) run as separate processes, so the load generator
+does not share their interpreter, with a temporary data directory. "server CPU ms/req" is the server's own cost
+per request (about 7.5 ms once turns overlap, so roughly 130 req/s per core), and "client CPU %" is the share of
+the machine the load generator itself uses. When that share grows on a small machine, throughput falls because
+the clients take the CPU, not because the server serializes. Before chat turns were indexed on a background
+writer, the retrieval index lock (one commit per message, searches under the lock) capped a 32-worker pool at
+about 60 turns/s in-process.
+
+Usage: python bench_server.py [seconds_per_level] [clients ...]
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+LEVELS = [10, 100, 200]
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _client(base_url: str, http: httpx.AsyncClient, deadline: float, results: list, rng: random.Random):
+    session = None
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        headers = {"X-Session-Id": session} if session else {}
+        start = time.perf_counter()
+        try:
+            if roll < 0.6:
+                response = await http.post(f"{base_url}/v1/command", headers=headers,
+                                           json={"query": f"Tell me a fun fact about the number {rng.randint(1, 999)}"})
+            elif roll < 0.8:
+                async with http.stream("POST", f"{base_url}/v1/chat", headers=headers,
+                                       json={"message": "Say hello", "stream": True}) as response:
+                    async for _ in response.aiter_lines():
+                        pass
+            elif roll < 0.9:
+                response = await http.post(f"{base_url}/v1/command", headers=headers, json={"query": "what's the time"})
+            else:
+                response = await http.get(f"{base_url}/v1/notes", params={"limit": 5})
+            session = response.headers.get("x-session-id", session)
+            results.append((time.perf_counter() - start, response.status_code))
+            if response.status_code == 503:
+                await asyncio.sleep(float(response.headers.get("retry-after", 1)))
+        except httpx.HTTPError:
+            results.append((time.perf_counter() - start, 0))
+
+
+async def _level(base_url: str, clients: int, seconds: float):
+    results = []
+    # Drop idle connections before uvicorn's 5s keep-alive timeout does, or a reused one can be closed mid-request
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients, keepalive_expiry=2)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        deadline = time.perf_counter() + seconds
+        start = time.perf_counter()
+        await asyncio.gather(*[_client(base_url, http, deadline, results, random.Random(i)) for i in range(clients)])
+        elapsed = time.perf_counter() - start
+    ok = [latency for latency, status in results if status in (200, 201)]
+    busy = sum(1 for _, status in results if status == 503)
+    failed = len(results) - len(ok) - busy
+    return len(ok) / elapsed, _percentile(ok, 0.5), _percentile(ok, 0.99), len(results), busy, failed
+
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    """CPU time used by a process so far (Linux /proc; None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise SystemExit(f"{url} did not start within {timeout:.0f}s")
+
+
+async def _warm(base_url: str, clients: int) -> None:
+    async with httpx.AsyncClient(timeout=60) as http:
+        await asyncio.gather(*[http.post(f"{base_url}/v1/command", json={"query": "Say hello"})
+                               for _ in range(min(clients, 32))])
+
+
+def run(seconds: float = 5, levels=LEVELS):
+    stub_port, server_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}/v1"
+    base_url = f"http://127.0.0.1:{server_port}"
+    processes = []
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": "sk-stub-0000000000000000000000", "OPENAI_BASE_URL": stub_url, "NOVA_PROVIDER": "openai",
+            "NOVA_RATE_LIMIT_OPENAI": "0,0",  # the stub has no quota to protect
+            "NOVA_CONVERSATION_DB": os.path.join(directory, "conversations.sqlite3"),
+            "NOVA_RETRIEVAL_DIR": os.path.join(directory, "retrieval"),
+            "NOVA_NOTES_DB": os.path.join(directory, "notes.sqlite3"),
+        }
+        try:
+            processes.append(subprocess.Popen([sys.executable, "stub_provider.py", str(stub_port), "50", "2"],
+                                              env=env, stdout=subprocess.DEVNULL))
+            _wait_ready(stub_url.rsplit("/v1", 1)[0], processes[-1])
+            processes.append(subprocess.Popen([sys.executable, "server.py", "--port", str(server_port)], env=env))
+            _wait_ready(f"{base_url}/v1/health", processes[-1])
+            asyncio.run(_warm(base_url, max(levels)))
+
+            workers = httpx.get(f"{base_url}/v1/health").json()["workers"]
+            print(f"{workers} engine workers, stub provider at 50 ms, {seconds:.0f}s per level")
+            # Server CPU per request shows what a dedicated core would sustain; load-generator CPU shows how much of
+            # a shared machine the clients themselves take
+            print(f"{'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'requests':>9} {'503s':>6} {'errors':>7} "
+                  f"{'server CPU ms/req':>18} {'client CPU %':>13}")
+            server_pid = processes[-1].pid
+            for clients in levels:
+                server_cpu, client_cpu, start = _cpu_seconds(server_pid), sum(os.times()[:2]), time.perf_counter()
+                rps, p50, p99, total, busy, failed = asyncio.run(_level(base_url, clients, seconds))
+                elapsed = time.perf_counter() - start
+                client_share = (sum(os.times()[:2]) - client_cpu) / elapsed * 100
+                server_ms = "n/a"
+                if server_cpu is not None and total:
+                    server_ms = f"{(_cpu_seconds(server_pid) - server_cpu) / total * 1000:.1f}"
+                print(f"{clients:>8} {rps:>8.1f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f} {total:>9} {busy:>6} {failed:>7} "
+                      f"{server_ms:>18} {client_share:>13.0f}")
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(float(args[0]) if args else 5, [int(a) for a in args[1:]] or LEVELS)
@@ -0,0 +1,76 @@
+"""
+Session Memory Benchmark
+Python heap held by many concurrent sessions: the old unbounded chat_history + command_history lists of dicts
+vs the bounded Turn ring buffers in session_memory.py (measured with tracemalloc, no Streamlit needed)
+
+Usage: python bench_session_memory.py [sessions] [turns]
+"""
+import sys
+import tracemalloc
+
+from chat_view import new_message, new_message_id
+from session_memory import RING_TURNS, SessionHistory, Turn
+
+
+class _EmptyStore:
+    """Stands in for the conversation store: spilled turns are already on disk, nothing to reload"""
+
+    def count(self, session):
+        return 0
+
+    def recent(self, session, limit):
+        return []
+
+    def before(self, session, message_id, limit):
+        return []
+
+
+def _texts(i: int):
+    return f"Question {i}: what should I cook tonight?", f"Answer {i}: " + "Try a quick vegetable stir fry with rice. " * 8
+
+
+def _old_layout(sessions: int, turns: int):
+    states = []
+    for s in range(sessions):
+        chat_history, command_history = [], []
+        for i in range(turns):
+            query, response = _texts(i)
+            chat_history.append(new_message("user", query, "12:00:00"))
+            chat_history.append(new_message("assistant", response, "12:00:00", type="chat"))
+            command_history.append({"command": query, "response": response, "type": "chat", "timestamp": "12:00:00"})
+        states.append((chat_history, command_history))
+    return states
+
+
+def _ring_layout(sessions: int, turns: int):
+    store = _EmptyStore()
+    states = []
+    for s in range(sessions):
+        history = SessionHistory(f"bench-{s}", store)
+        for i in range(turns):
+            query, response = _texts(i)
+            history.append(Turn(new_message_id(), query, new_message_id(), response, "chat", "12:00:00"))
+        states.append(history)
+    return states
+
+
+def _measure(build, sessions: int, turns: int) -> float:
+    tracemalloc.start()
+    states = build(sessions, turns)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del states
+    return current / 1024 / 1024
+
+
+def run(sessions: int = 100, turns: int = 500):
+    print(f"{sessions} sessions x {turns} turns")
+    print(f"{'layout':<28} {'MB':>8} {'KB/session':>11}")
+    for label, build in (("lists of dicts (old)", _old_layout), (f"Turn rings ({RING_TURNS} turns)", _ring_layout)):
+        mb = _measure(build, sessions, turns)
+        print(f"{label:<28} {mb:>8.1f} {mb * 1024 / sessions:>11.1f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    run(*args)
@@ -0,0 +1,110 @@
+"""
+Cold-start Benchmark
+Fresh-interpreter import times (python -X importtime) and time to the first chat response against a local stub
+
+Usage: python bench_startup.py [runs] [--budget-ms N]
+       exits with status 1 if the median cold import of utils exceeds the budget (default 500 ms)
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from stub_provider import start_stub_server, stop_stub_server
+
+MODULES = ["config", "ai_providers", "utils"]
+DEFAULT_BUDGET_MS = 500.0
+
+_IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"import": time.perf_counter() - start}}))
+"""
+
+_FIRST_RESPONSE_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import utils
+ready = time.perf_counter()
+reply = utils.ai_chat([{{"role": "user", "content": "Hello"}}], provider="{provider}", model=None)
+done = time.perf_counter()
+assert not reply.startswith("Error"), reply
+print(json.dumps({{"import": ready - start, "first_response": done - ready}}))
+"""
+
+
+def _run(code: str, env: dict, importtime: bool = False):
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    result = subprocess.run(args, capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "child failed")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _slowest_imports(report: str, count: int = 8):
+    """Top modules by self time from an -X importtime report"""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def run(runs: int = 5, budget_ms: float = DEFAULT_BUDGET_MS) -> bool:
+    server, base_url = start_stub_server()
+    env = dict(os.environ)
+    env.update({
+        "TOGETHER_API_KEY": "stub-key",
+        "TOGETHER_BASE_URL": base_url,
+        "OPENAI_API_KEY": "sk-stub-0000000000000000000000",
+        "OPENAI_BASE_URL": base_url,
+        "NOVA_PREWARM": "0",
+    })
+    env.pop("NOVA_CACHE_DB", None)
+
+    try:
+        print(f"cold import, median of {runs} fresh interpreters")
+        print(f"{'module':<14} {'ms':>8}")
+        medians = {}
+        for module in MODULES:
+            samples = [_run(_IMPORT_SNIPPET.format(module=module), env)[0]["import"] for _ in range(runs)]
+            medians[module] = statistics.median(samples) * 1000
+            print(f"{module:<14} {medians[module]:>8.1f}")
+
+        _, report = _run(_IMPORT_SNIPPET.format(module="utils"), env, importtime=True)
+        print("\nslowest imports under utils (self time)")
+        for self_us, cumulative_us, name in _slowest_imports(report):
+            print(f"  {name:<40} {self_us / 1000:>7.1f} ms self {cumulative_us / 1000:>8.1f} ms total")
+
+        print(f"\ntime to first response, median of {runs} fresh interpreters")
+        print(f"{'provider':<10} {'import ms':>10} {'first reply ms':>15}")
+        for provider in ("together", "openai"):
+            try:
+                samples = [_run(_FIRST_RESPONSE_SNIPPET.format(provider=provider), env)[0] for _ in range(runs)]
+            except RuntimeError as e:
+                print(f"{provider:<10} skipped ({e})")
+                continue
+            imports = statistics.median(s["import"] for s in samples) * 1000
+            first = statistics.median(s["first_response"] for s in samples) * 1000
+            print(f"{provider:<10} {imports:>10.1f} {first:>15.1f}")
+        print("(the first reply includes lazily imported SDKs; the Streamlit app prewarms them in the background)")
+    finally:
+        stop_stub_server(server)
+
+    within = medians["utils"] <= budget_ms
+    print(f"\nbudget: utils cold import {medians['utils']:.1f} ms / {budget_ms:.0f} ms -> {'ok' if within else 'OVER BUDGET'}")
+    return within
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    budget = DEFAULT_BUDGET_MS
+    if "--budget-ms" in args:
+        index = args.index("--budget-ms")
+        budget = float(args[index + 1])
+        del args[index:index + 2]
+    sys.exit(0 if run(int(args[0]) if args else 5, budget) else 1)
@@ -0,0 +1,55 @@
+"""
+Streaming Benchmark
+Time-to-first-token vs full-response latency per provider, against a local stub server
+
+Usage: python bench_streaming.py [turns]
+"""
+import os
+import sys
+
+from stub_provider import start_stub_server, stop_stub_server
+
+
+def run(turns: int = 20):
+    # 50 ms before the first byte, then 15 ms between tokens
+    server, base_url = start_stub_server(latency=0.05, token_delay=0.015)
+    os.environ["TOGETHER_API_KEY"] = "stub-key"
+    os.environ["TOGETHER_BASE_URL"] = base_url
+    os.environ["HUGGINGFACE_API_KEY"] = "stub-key"
+    os.environ["HUGGINGFACE_BASE_URL"] = base_url + "/models"
+    os.environ["OPENAI_API_KEY"] = "sk-stub-0000000000000000000000"
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    from ai_providers import chat_with_provider_stream
+    from metrics import get_latency, reset_metrics
+
+    messages = [{"role": "user", "content": "Hello"}]
+    providers = ["together", "huggingface"]
+    try:
+        import openai  # noqa: F401
+        providers.append("openai")
+    except ImportError:
+        print("openai package not installed; skipping the openai provider")
+
+    reset_metrics()
+    try:
+        for provider in providers:
+            for _ in range(turns):
+                text = "".join(chat_with_provider_stream(provider, messages))
+                if text.startswith("Error"):
+                    raise RuntimeError(text)
+    finally:
+        stop_stub_server(server)
+
+    print(f"{turns} streamed turns per provider against {base_url}")
+    print(f"{'provider':<12} {'ttft p50':>9} {'ttft p95':>9} {'total p50':>10} {'total p95':>10}  (ms)")
+    for provider in providers:
+        ttft = get_latency("ttft", provider)
+        total = get_latency("latency", provider)
+        print(f"{provider:<12} {ttft.percentile(50) * 1000:>9.1f} {ttft.percentile(95) * 1000:>9.1f} "
+              f"{total.percentile(50) * 1000:>10.1f} {total.percentile(95) * 1000:>10.1f}")
+    print("huggingface has no streaming endpoint here, so its first chunk arrives with the full answer.")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
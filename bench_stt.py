@@ -0,0 +1,97 @@
+"""
+Speech-to-Text Benchmark
+Word error rate and end-of-speech-to-text latency per installed recognizer over recorded WAV fixtures: each
+fixtures/speech/<name>.wav has its reference transcript in <name>.txt. "streamed" is the delay after the
+endpointer detects end of speech when frames were decoded while they arrived; "whole clip" decodes the recording
+only after it ended (what recognize_google on a finished recording does).
+
+Usage: python bench_stt.py [fixtures_dir] [--make-fixtures]
+  --make-fixtures renders the built-in phrases with the installed text-to-speech engine (tts.py), padded with
+  noisy silence, when no recordings are at hand. It needs espeak/espeak-ng, pyttsx3 or macOS say; synthetic
+  speech flatters recognizers, so prefer real recordings when comparing WER
+"""
+import glob
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+from stt import BACKENDS, SAMPLE_RATE, NoiseCalibration, get_backend, listen, wav_frames, word_error_rate
+
+FIXTURES_DIR = os.path.join("fixtures", "speech")
+
+PHRASES = [
+    "what is the time",
+    "open youtube",
+    "what's the weather in london",
+    "calculate twenty five plus seventeen",
+    "take a note buy milk and eggs",
+    "search my notes for the dentist appointment",
+    "tell me the latest news about technology",
+    "open google",
+]
+
+
+def make_fixtures(directory: str) -> None:
+    from tts import get_synthesizer
+
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(0)
+    synthesizer = get_synthesizer()
+    for i, phrase in enumerate(PHRASES):
+        try:
+            audio = synthesizer.synthesize(phrase)
+        except RuntimeError as e:
+            sys.exit(f"cannot make fixtures: {e}")
+        speech = np.frombuffer(b"".join(wav_frames(audio)), dtype=np.int16)
+        silence = np.zeros(SAMPLE_RATE, dtype=np.int16)
+        clip = np.concatenate([silence, speech, silence]).astype(np.float32)
+        clip += rng.normal(0, 40, len(clip))
+        name = os.path.join(directory, f"phrase_{i:02d}")
+        with wave.open(name + ".wav", "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            out.writeframes(np.clip(clip, -32768, 32767).astype(np.int16).tobytes())
+        with open(name + ".txt", "w") as f:
+            f.write(phrase + "\n")
+    print(f"wrote {len(PHRASES)} fixtures to {directory}")
+
+
+def run(directory: str = FIXTURES_DIR):
+    clips = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    if not clips:
+        print(f"no fixtures in {directory}: record <name>.wav + <name>.txt pairs, or run with --make-fixtures")
+        return
+    backends = [backend for backend in (get_backend(name) for name in BACKENDS) if backend is not None]
+    if not backends:
+        print("no speech recognizer installed (pip install vosk and download a model, or pip install pocketsphinx)")
+        return
+    print(f"{len(clips)} clips from {directory}")
+    print(f"{'backend':<14} {'WER':>6} {'streamed p50 ms':>16} {'whole clip p50 ms':>18} {'audio s':>8}")
+    for backend in backends:
+        errors, streamed, whole, audio = [], [], [], 0.0
+        for clip in clips:
+            with open(os.path.splitext(clip)[0] + ".txt") as f:
+                reference = f.read().strip()
+            # A fresh calibration per clip: the first 250 ms of each fixture are its ambient noise
+            transcript = listen(wav_frames(clip), backend=backend, calibration=NoiseCalibration())
+            errors.append(word_error_rate(reference, transcript.text))
+            streamed.append(transcript.latency)
+            audio += transcript.speech_seconds
+            pcm = b"".join(wav_frames(clip))
+            start = time.perf_counter()
+            backend.transcribe(pcm)
+            whole.append(time.perf_counter() - start)
+        print(f"{backend.name:<14} {sum(errors) / len(errors):>6.1%} {np.median(streamed) * 1000:>16.1f} "
+              f"{np.median(whole) * 1000:>18.1f} {audio:>8.1f}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    target = args[0] if args else FIXTURES_DIR
+    if "--make-fixtures" in sys.argv:
+        make_fixtures(target)
+    run(target)
@@ -0,0 +1,82 @@
+"""
+Text-to-Speech Benchmark
+Time until the page can rerun after a reply: blocking synthesis (the old say_text) vs queueing to the tts worker,
+and the cost of repeated phrases once they are cached. Uses the installed engine, or a stub engine that sleeps
+like one (NOVA_BENCH_TTS_MS per 100 characters) when none is installed. Runs in a temporary cache directory.
+
+Usage: python bench_tts.py [replies]
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+from tts import SpeechSynthesizer, TTSEngine
+
+STUB_MS = float(os.getenv("NOVA_BENCH_TTS_MS", "150"))
+
+PHRASES = [
+    "The current time is 10:42:07",
+    "Opening YouTube...",
+    "Opening Google...",
+    "The result is: 42",
+    "Weather in London: 14°C, light rain, humidity 81%.",
+    "I've saved that note for you.",
+]
+
+
+class _StubEngine(TTSEngine):
+    """Sleeps for a synthesis-like duration and writes a short silent WAV"""
+
+    name = "stub"
+
+    def available(self) -> bool:
+        return True
+
+    def synthesize(self, text: str, voice: str, path: str) -> None:
+        time.sleep(STUB_MS / 1000 * max(1, len(text) / 100))
+        with wave.open(path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(16000)
+            out.writeframes(struct.pack("<h", 0) * 1600)
+
+
+def run(replies: int = 30):
+    with tempfile.TemporaryDirectory() as directory:
+        probe = SpeechSynthesizer(cache_dir=directory)
+        engine = probe._engine() or _StubEngine()
+        print(f"engine: {engine.name}, {replies} replies drawn from {len(PHRASES)} phrases")
+        print(f"{'mode':<26} {'ms until rerun':>15} {'synthesized':>12}")
+        texts = [PHRASES[i % len(PHRASES)] for i in range(replies)]
+
+        # Old behaviour: synthesize every reply in the request, nothing cached
+        synth = SpeechSynthesizer(engine, cache_dir=os.path.join(directory, "blocking"))
+        start = time.perf_counter()
+        for i, text in enumerate(texts):
+            synth.synthesize(f"{text} ({i})")
+        blocking = (time.perf_counter() - start) * 1000 / replies
+        print(f"{'blocking, uncached':<26} {blocking:>15.2f} {synth.get_stats()['synthesized']:>12}")
+
+        synth = SpeechSynthesizer(engine, cache_dir=os.path.join(directory, "queued"))
+        futures, waited = [], 0.0
+        for text in texts:
+            start = time.perf_counter()
+            futures.append(synth.synthesize_async(text))
+            waited += time.perf_counter() - start
+        for future in futures:
+            future.result()
+        stats = synth.get_stats()
+        print(f"{'queued + cache':<26} {waited * 1000 / replies:>15.3f} {stats['synthesized']:>12}")
+
+        start = time.perf_counter()
+        for text in texts:
+            synth.synthesize(text)
+        print(f"{'repeat, all cached':<26} {(time.perf_counter() - start) * 1000 / replies:>15.3f} "
+              f"{synth.get_stats()['synthesized'] - stats['synthesized']:>12}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
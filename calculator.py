@@ -0,0 +1,289 @@
+"""
+Calculator
+Safe arithmetic for the "calculate" command, without eval. Expressions are parsed with ast and checked against a
+whitelist of operators, functions and constants. A tree walker then evaluates them with limits on exponents,
+integer size and wall-clock time, so inputs like 9**9**9 are rejected in microseconds. Parsed expressions are
+cached. evaluate_batch evaluates many same-shaped expressions at once with NumPy.
+"""
+import ast
+import math
+import operator
+import os
+import re
+import time
+from functools import lru_cache, reduce
+from typing import Dict, List, Tuple, Union
+
+MAX_LENGTH = int(os.getenv("NOVA_CALC_MAX_LENGTH", "500"))              # characters per expression
+MAX_EXPONENT = int(os.getenv("NOVA_CALC_MAX_EXPONENT", "10000"))        # largest integer exponent
+MAX_INT_BITS = int(os.getenv("NOVA_CALC_MAX_BITS", "10000"))            # largest integer result (~3000 digits)
+TIME_BUDGET = float(os.getenv("NOVA_CALC_TIME_BUDGET", "0.05"))         # seconds per expression
+MAX_NODES = 256
+VECTOR_MIN_GROUP = 8  # same-shaped expressions needed before evaluate_batch switches to NumPy
+_EXACT_LIMIT = 2.0 ** 53  # floats at or above this may differ from exact integer arithmetic
+
+Number = Union[int, float]
+
+
+class CalculationError(ValueError):
+    """Expression rejected: unsupported syntax, or a limit would be exceeded"""
+
+
+def _cbrt(x: float) -> float:
+    return math.copysign(abs(x) ** (1 / 3), x)
+
+
+def _factorial(n: int) -> int:
+    if isinstance(n, int) and n > 1 and math.lgamma(n + 1) / math.log(2) > MAX_INT_BITS:
+        raise CalculationError(f"factorial({n}) is too large")
+    return math.factorial(n)
+
+
+# name -> (function, allowed argument counts; None = one or more)
+FUNCTIONS = {
+    "sqrt": (math.sqrt, (1,)), "cbrt": (_cbrt, (1,)), "exp": (math.exp, (1,)),
+    "log": (math.log, (1, 2)), "ln": (math.log, (1,)), "log10": (math.log10, (1,)), "log2": (math.log2, (1,)),
+    "sin": (math.sin, (1,)), "cos": (math.cos, (1,)), "tan": (math.tan, (1,)),
+    "asin": (math.asin, (1,)), "acos": (math.acos, (1,)), "atan": (math.atan, (1,)),
+    "sinh": (math.sinh, (1,)), "cosh": (math.cosh, (1,)), "tanh": (math.tanh, (1,)),
+    "degrees": (math.degrees, (1,)), "radians": (math.radians, (1,)), "hypot": (math.hypot, None),
+    "abs": (abs, (1,)), "round": (round, (1,)), "floor": (math.floor, (1,)), "ceil": (math.ceil, (1,)),
+    "min": (min, None), "max": (max, None), "factorial": (_factorial, (1,)), "gcd": (math.gcd, None),
+}
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+_BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+}
+_UNARY = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+# Spoken forms, applied before tokenizing
+_WORDS = [
+    (re.compile(r"(?<=\d),(?=\d{3}\b)"), ""),                    # 1,000 -> 1000
+    (re.compile(r"\bto the power of\b|\braised to\b"), " ** "),
+    (re.compile(r"\bsquared\b"), " ** 2"),
+    (re.compile(r"\bcubed\b"), " ** 3"),
+    (re.compile(r"\bsquare root of\b"), " sqrt "),
+    (re.compile(r"(?:%|\bpercent)\s+of\b"), " / 100 * "),
+    (re.compile(r"\bplus\b"), "+"),
+    (re.compile(r"\bminus\b"), "-"),
+    (re.compile(r"\btimes\b|\bmultiplied by\b|(?<=\d)\s*x\s*(?=\d)"), "*"),
+    (re.compile(r"\bdivided by\b|\bdivide\b|\bover\b"), "/"),
+    (re.compile(r"\bmod(?:ulo)?\b"), "%"),
+    (re.compile(r"\^"), "**"),
+]
+_TOKEN = re.compile(r"(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?|\*\*|//|[-+*/%(),]|[a-z_][a-z0-9_]*")
+
+
+def extract_expression(text: str) -> str:
+    """The arithmetic in a spoken/typed query ("what is 2 plus 3 squared?" -> "2 + 3 ** 2"); other words are dropped"""
+    text = text.lower()
+    for pattern, replacement in _WORDS:
+        text = pattern.sub(replacement, text)
+    tokens = [t for t in _TOKEN.findall(text) if t in FUNCTIONS or t in CONSTANTS or not (t[0].isalpha() or t[0] == "_")]
+    # "square root of 16" leaves "sqrt 16": give bare function names their parentheses
+    for i, token in enumerate(tokens[:-1]):
+        if token in FUNCTIONS and tokens[i + 1] != "(":
+            tokens[i + 1] = f"({tokens[i + 1]})"
+    return " ".join(tokens)
+
+
+@lru_cache(maxsize=1024)
+def parse_expression(expression: str) -> ast.Expression:
+    """Validated syntax tree for an expression (cached); raises CalculationError or SyntaxError"""
+    if len(expression) > MAX_LENGTH:
+        raise CalculationError(f"expression is longer than {MAX_LENGTH} characters")
+    tree = ast.parse(expression.strip(), mode="eval")
+    callees = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    nodes = 0
+    for node in ast.walk(tree):
+        nodes += 1
+        if nodes > MAX_NODES:
+            raise CalculationError("expression is too long")
+        if isinstance(node, (ast.Expression, ast.Load)) or type(node) in _BINARY or type(node) in _UNARY:
+            continue
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY or isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+            continue
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            continue
+        if isinstance(node, ast.Name) and (node.id in CONSTANTS or node.id in FUNCTIONS and id(node) in callees):
+            continue
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+            arities = FUNCTIONS[node.func.id][1]
+            if arities is None and node.args or arities is not None and len(node.args) in arities:
+                continue
+            raise CalculationError(f"wrong number of arguments for {node.func.id}()")
+        raise CalculationError(f"unsupported syntax: {type(node).__name__}")
+    return tree
+
+
+def _check(value: Number) -> Number:
+    """Reject integers over MAX_INT_BITS and floats that overflowed to inf/nan"""
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS or isinstance(value, float) and not math.isfinite(value):
+        raise CalculationError("result is too large")
+    return value
+
+
+def _power(base: Number, exponent: Number) -> Number:
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1 and exponent > 0:
+        # Decide from the sizes before computing: the result has about exponent * log2(base) bits
+        if exponent > MAX_EXPONENT or exponent * math.log2(abs(base)) > MAX_INT_BITS:
+            raise CalculationError("exponent is too large")
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise CalculationError("result is not a real number")
+    return _check(result)
+
+
+def _multiply(a: Number, b: Number) -> Number:
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > MAX_INT_BITS + 1:
+        raise CalculationError("result is too large")
+    return _check(a * b)
+
+
+def _evaluate(node: ast.AST, deadline: float) -> Number:
+    if time.perf_counter() > deadline:
+        raise CalculationError("calculation took too long")
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp):
+        return _UNARY[type(node.op)](_evaluate(node.operand, deadline))
+    if isinstance(node, ast.BinOp):
+        left, right = _evaluate(node.left, deadline), _evaluate(node.right, deadline)
+        if isinstance(node.op, ast.Pow):
+            return _power(left, right)
+        if isinstance(node.op, ast.Mult):
+            return _multiply(left, right)
+        return _check(_BINARY[type(node.op)](left, right))
+    function = FUNCTIONS[node.func.id][0]
+    return _check(function(*[_evaluate(arg, deadline) for arg in node.args]))
+
+
+def evaluate(expression: str, time_budget: float = TIME_BUDGET) -> Number:
+    """Value of an arithmetic expression; raises CalculationError, SyntaxError or ArithmeticError"""
+    tree = parse_expression(expression)
+    try:
+        return _evaluate(tree.body, time.perf_counter() + time_budget)
+    except OverflowError:
+        raise CalculationError("result is too large")
+    except CalculationError:
+        raise
+    except ValueError as e:
+        raise CalculationError(str(e))  # e.g. sqrt(-1): math domain error
+    except TypeError as e:
+        raise CalculationError(str(e))  # e.g. factorial(2.5)
+
+
+def format_result(value: Number) -> str:
+    """Readable answer: integral floats without ".0", others to 12 significant digits"""
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < _EXACT_LIMIT:
+            return str(int(value))
+        return f"{value:.12g}"
+    return str(value)
+
+
+# NumPy twins for vectorized batches; functions missing here (factorial, gcd) keep their group on the scalar path
+_NUMPY_FUNCTIONS = {
+    "sqrt": "sqrt", "cbrt": "cbrt", "exp": "exp", "ln": "log", "log10": "log10", "log2": "log2",
+    "sin": "sin", "cos": "cos", "tan": "tan", "asin": "arcsin", "acos": "arccos", "atan": "arctan",
+    "sinh": "sinh", "cosh": "cosh", "tanh": "tanh", "degrees": "degrees", "radians": "radians",
+    "abs": "abs", "round": "round", "floor": "floor", "ceil": "ceil",
+}
+_NUMPY_BINARY = {
+    ast.Add: "add", ast.Sub: "subtract", ast.Mult: "multiply", ast.Div: "true_divide",
+    ast.FloorDiv: "floor_divide", ast.Mod: "mod", ast.Pow: "power",
+}
+
+
+# Numeric literals, not digits inside names such as log10
+_NUMBER = re.compile(r"(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?(?![\w.])")
+
+
+@lru_cache(maxsize=256)
+def _template(key: str) -> Tuple[ast.Expression, int, bool]:
+    """(validated tree, number of literals, vectorizable?) for a structure key with every literal written as "#";
+    parsed once per structure however many expressions share it"""
+    tree = parse_expression(key.replace("#", "1"))
+    literals = sum(isinstance(node, ast.Constant) for node in ast.walk(tree))
+    vectorizable = all(
+        node.func.id in _NUMPY_FUNCTIONS or node.func.id in ("log", "hypot", "min", "max")
+        for node in ast.walk(tree) if isinstance(node, ast.Call)
+    )
+    return tree, literals, vectorizable
+
+
+def _evaluate_vector(node: ast.AST, columns: list, inexact: list, np) -> "object":
+    """Walk one template tree, taking each numeric literal from the next column of the batch.
+
+    inexact[0] accumulates the rows where an intermediate value was not finite or too large for exact float64
+    integers; those rows are recomputed by evaluate().
+    """
+    if isinstance(node, ast.Constant):
+        return columns.pop(0)
+    if isinstance(node, ast.Name):
+        return CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate_vector(node.operand, columns, inexact, np)
+        return -operand if isinstance(node.op, ast.USub) else operand
+    if isinstance(node, ast.BinOp):
+        left = _evaluate_vector(node.left, columns, inexact, np)
+        right = _evaluate_vector(node.right, columns, inexact, np)
+        value = getattr(np, _NUMPY_BINARY[type(node.op)])(left, right)
+    else:
+        args = [_evaluate_vector(arg, columns, inexact, np) for arg in node.args]
+        name = node.func.id
+        if name == "log":
+            value = np.log(args[0]) / np.log(args[1]) if len(args) == 2 else np.log(args[0])
+        elif name in ("hypot", "min", "max"):
+            value = reduce({"hypot": np.hypot, "min": np.minimum, "max": np.maximum}[name], args)
+        else:
+            value = getattr(np, _NUMPY_FUNCTIONS[name])(args[0])
+    inexact[0] = inexact[0] | ~(np.abs(value) < _EXACT_LIMIT)
+    return value
+
+
+def evaluate_batch(expressions: List[str]) -> List[Union[Number, Exception]]:
+    """Values for many expressions, with an exception in place of each one that fails.
+
+    Expressions with the same structure (e.g. "a * b + c") are evaluated together as NumPy arrays. Rows with a
+    value that is not finite or too large for exact float64 arithmetic are recomputed by evaluate(), so errors
+    and big integers match the one-at-a-time path; vectorized values come back as floats.
+    """
+    import numpy as np
+
+    results: List[Union[Number, Exception, None]] = [None] * len(expressions)
+    # Group by structure with a regex, so ast.parse runs once per structure rather than once per expression
+    groups: Dict[str, List[int]] = {}
+    for i, expression in enumerate(expressions):
+        groups.setdefault(_NUMBER.sub("#", expression), []).append(i)
+
+    for key, members in groups.items():
+        numbers = [_NUMBER.findall(expressions[i]) for i in members]
+        template = None
+        if len(members) >= VECTOR_MIN_GROUP:
+            try:
+                template = _template(key)
+            except (CalculationError, SyntaxError):
+                template = None  # evaluated one by one below, for exact per-expression errors
+        if template is not None and template[2] and template[1] == len(numbers[0]):
+            tree, literals, _ = template
+            table = np.array(numbers, dtype=np.float64).reshape(len(members), literals)
+            # Literals float64 cannot hold exactly go through the scalar path
+            inexact = [(np.abs(table) >= _EXACT_LIMIT).any(axis=1)]
+            with np.errstate(all="ignore"):
+                values = np.broadcast_to(_evaluate_vector(tree.body, list(table.T), inexact, np), (len(members),))
+            exact = np.broadcast_to(~inexact[0], (len(members),)) & np.isfinite(values)
+            for i, value, ok in zip(members, values.tolist(), exact.tolist()):
+                if ok:
+                    results[i] = value
+            members = [i for i, ok in zip(members, exact.tolist()) if not ok]
+        for i in members:
+            try:
+                results[i] = evaluate(expressions[i])
+            except (CalculationError, SyntaxError, ArithmeticError) as e:
+                results[i] = e
+    return results
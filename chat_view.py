@@ -0,0 +1,87 @@
+"""
+Chat History View
+Windowed rendering of the chat history: only the newest messages are sent to the browser, each message's
+HTML is built once and memoized by message id, and older messages are paged in on demand
+"""
+import hashlib
+import os
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+PAGE_SIZE = int(os.getenv("NOVA_CHAT_PAGE_SIZE", "50"))  # messages shown initially and added per "load earlier"
+
+
+def new_message_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def new_message(role: str, content: str, timestamp: str, **extra) -> Dict:
+    """A chat history entry with a stable id (used as the render cache key)"""
+    message = {"id": new_message_id(), "role": role, "content": content, "timestamp": timestamp}
+    message.update(extra)
+    return message
+
+
+def message_id(message: Dict) -> str:
+    """Stable id; entries saved before ids existed fall back to a content-derived key (sha1, so it is the same in
+    every process, unlike hash())"""
+    if message.get("id"):
+        return message["id"]
+    digest = hashlib.sha1(str(message["content"]).encode("utf-8")).hexdigest()[:16]
+    return f"{message.get('timestamp', '')}:{digest}"
+
+
+@lru_cache(maxsize=4096)
+def _message_html(key: str, role: str, content: str, timestamp: str) -> str:
+    # key is part of the cache key so two identical messages still get their own entry
+    if role == "user":
+        return f'<div class="chat-message user-message"><b>You:</b> {content}</div>'
+    html = f'<div class="chat-message assistant-message"><b>Jarvis:</b> {content}</div>'
+    if timestamp:
+        html += f'<div class="chat-time">Time: {timestamp}</div>'
+    return html
+
+
+def render_message_html(message: Dict) -> str:
+    """HTML for one message, built once per message id"""
+    return _message_html(message_id(message), message["role"], message["content"], message.get("timestamp", ""))
+
+
+def visible_window(history: List[Dict], shown: int) -> Tuple[int, List[Dict]]:
+    """(number of hidden older messages, the newest `shown` messages)"""
+    start = max(0, len(history) - shown)
+    return start, history[start:]
+
+
+def window_html(history: List[Dict], shown: int = PAGE_SIZE) -> Tuple[int, str]:
+    """(hidden count, one HTML block for the visible window); cost depends on the window, not the history"""
+    hidden, messages = visible_window(history, shown)
+    # Blank lines keep each message its own HTML block, as when they were separate markdown elements
+    return hidden, "\n\n".join(render_message_html(m) for m in messages)
+
+
+def render_chat(st, history: List[Dict], state_key: str = "chat_window", total: Optional[int] = None) -> None:
+    """Draw the visible window as a single markdown element, with a "load earlier" button when messages are hidden.
+
+    total counts messages not loaded into history yet (e.g. still in the conversation store); defaults to len(history)
+    """
+    shown = st.session_state.get(state_key, PAGE_SIZE)
+    hidden, html = window_html(history, shown)
+    total = max(total or 0, len(history))
+    hidden += total - len(history)
+    if hidden:
+        col_more, col_count = st.columns([1, 2])
+        with col_more:
+            if st.button(f"⬆️ Load earlier ({min(hidden, PAGE_SIZE)})", key=f"{state_key}_more"):
+                st.session_state[state_key] = shown + PAGE_SIZE
+                st.rerun()
+        with col_count:
+            st.caption(f"Showing the last {total - hidden} of {total} messages")
+    if html:
+        st.markdown(html, unsafe_allow_html=True)
+
+
+def reset_window(st, state_key: str = "chat_window") -> None:
+    """Back to the newest page (after clearing the chat or starting a new conversation)"""
+    st.session_state[state_key] = PAGE_SIZE
@@ -0,0 +1,64 @@
+"""
+TTL Cache Cancellation Check
+Cancels coalesced waiters and owners of a single-flight load and checks that everyone else still gets a value
+and that the key is not left stuck in flight. Exits non-zero on failure.
+
+Usage: python check_ttl_cache.py
+"""
+import asyncio
+import sys
+import threading
+
+from ttl_cache import TTLCache
+
+
+async def _slow(value, seconds=0.3):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def cancelled_waiter() -> None:
+    """A waiter cancelled by its timeout must not affect the owner, other async waiters or sync waiters"""
+    cache = TTLCache("check", ttl=60)
+    owner = asyncio.ensure_future(cache.aget("k", lambda: _slow("sunny")))
+    await asyncio.sleep(0.01)
+    other = asyncio.ensure_future(cache.aget("k", lambda: _slow("unused")))
+    sync_result = []
+    thread = threading.Thread(target=lambda: sync_result.append(cache.get("k", lambda: "unused")))
+    thread.start()
+    try:
+        await asyncio.wait_for(cache.aget("k", lambda: _slow("unused")), 0.05)
+        raise AssertionError("waiter should have timed out")
+    except asyncio.TimeoutError:
+        pass
+    assert await owner == "sunny", "owner lost its value"
+    assert await other == "sunny", "other async waiter lost its value"
+    await asyncio.get_running_loop().run_in_executor(None, thread.join)
+    assert sync_result == ["sunny"], f"sync waiter got {sync_result}"
+
+
+async def cancelled_owner() -> None:
+    """An owner cancelled mid-load frees the key, so the next caller loads again instead of hanging"""
+    cache = TTLCache("check", ttl=60)
+    try:
+        await asyncio.wait_for(cache.aget("k", lambda: _slow("late", 10)), 0.05)
+        raise AssertionError("owner should have timed out")
+    except asyncio.TimeoutError:
+        pass
+    assert await asyncio.wait_for(cache.aget("k", lambda: _slow("fresh", 0)), 1) == "fresh"
+    assert cache.get("k", lambda: "unused") == "fresh"
+
+
+def main() -> int:
+    for check in (cancelled_waiter, cancelled_owner):
+        try:
+            asyncio.run(check())
+        except Exception as e:
+            print(f"FAIL {check.__name__}: {type(e).__name__}: {e}")
+            return 1
+        print(f"ok   {check.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Provider Client Registry
+Process-wide, long-lived SDK clients and HTTP sessions shared across Streamlit sessions
+"""
+import asyncio
+import importlib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import observe_response
+
+# Connection pool sizing (keep-alive connections per host)
+POOL_CONNECTIONS = int(os.getenv("NOVA_POOL_CONNECTIONS", "10"))
+POOL_MAXSIZE = int(os.getenv("NOVA_POOL_MAXSIZE", "20"))
+HTTP_TIMEOUT = float(os.getenv("NOVA_HTTP_TIMEOUT", "30"))
+# Gemini takes the system prompt at model construction, so one model is kept per (model, system text)
+GEMINI_MODELS = int(os.getenv("NOVA_GEMINI_MODELS", "16"))
+
+# Provider SDKs are imported on first use (or prewarmed in the background) to keep cold start fast
+PROVIDER_SDKS = {
+    "openai": "openai",
+    "groq": "groq",
+    "anthropic": "anthropic",
+    "google": "google.generativeai",
+}
+PREWARM = os.getenv("NOVA_PREWARM", "1").lower() in ("1", "true", "yes")
+
+_clients: Dict[Tuple[str, str, Any], Any] = {}
+_lock = threading.RLock()
+_shared_httpx_client = None
+_gemini_configured_key: Optional[str] = None
+_gemini_models: "OrderedDict[Tuple[str, Optional[str]], Any]" = OrderedDict()
+
+
+def http2_enabled() -> bool:
+    """Return True if HTTP/2 is requested (NOVA_HTTP2=1) and the h2 package is installed"""
+    if os.getenv("NOVA_HTTP2", "0").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def load_sdk(module: str):
+    """Import a provider SDK once; ImportError is not cached, so installing the package later works"""
+    return importlib.import_module(module)
+
+
+_prewarmed = False
+
+
+def prewarm_sdks(providers) -> None:
+    """Import the SDKs of the given providers on a background thread, so the first chat does not pay for them"""
+    global _prewarmed
+    if _prewarmed or not PREWARM:
+        return
+    _prewarmed = True
+
+    def warm():
+        for provider in providers:
+            module = PROVIDER_SDKS.get(provider)
+            if module:
+                try:
+                    load_sdk(module)
+                except Exception:
+                    pass
+
+    threading.Thread(target=warm, name="nova-sdk-prewarm", daemon=True).start()
+
+
+def get_client(provider: str, api_key: str, factory: Callable[[], Any], variant: Any = None) -> Any:
+    """Return the cached client for (provider, api_key, variant), building it once with factory"""
+    key = (provider, api_key or "", variant)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def _observe_httpx(response) -> None:
+    observe_response(response.request.headers, response.headers, response.status_code)
+
+
+async def _aobserve_httpx(response) -> None:
+    observe_response(response.request.headers, response.headers, response.status_code)
+
+
+def _observe_requests(response, *args, **kwargs) -> None:
+    observe_response(response.request.headers, response.headers, response.status_code)
+
+
+def get_httpx_client():
+    """Shared httpx client (keep-alive pool, optional HTTP/2) used by the OpenAI-style SDKs"""
+    global _shared_httpx_client
+    if _shared_httpx_client is not None:
+        return _shared_httpx_client
+    with _lock:
+        if _shared_httpx_client is None:
+            import httpx
+            _shared_httpx_client = httpx.Client(
+                http2=http2_enabled(),
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=POOL_MAXSIZE * 5,
+                    max_keepalive_connections=POOL_MAXSIZE,
+                ),
+                # Rate-limit headers recalibrate the client-side limiters
+                event_hooks={"response": [_observe_httpx]},
+            )
+        return _shared_httpx_client
+
+
+def get_http_session(provider: str, api_key: str) -> requests.Session:
+    """Keep-alive requests session with bearer auth for REST providers (Hugging Face, Together)"""
+    def build():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        session.hooks["response"].append(_observe_requests)
+        return session
+    return get_client(provider, api_key, build, "session")
+
+
+def get_openai_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled OpenAI client"""
+    def build():
+        import openai
+        return openai.OpenAI(api_key=api_key, base_url=base_url, http_client=get_httpx_client())
+    return get_client("openai", api_key, build, base_url)
+
+
+def get_groq_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled Groq client"""
+    def build():
+        from groq import Groq
+        return Groq(api_key=api_key, base_url=base_url, http_client=get_httpx_client())
+    return get_client("groq", api_key, build, base_url)
+
+
+def get_anthropic_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled Anthropic client"""
+    def build():
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key, base_url=base_url, http_client=get_httpx_client())
+    return get_client("anthropic", api_key, build, base_url)
+
+
+def get_gemini_model(api_key: str, model: str, system_instruction: Optional[str] = None):
+    """Cached Gemini GenerativeModel (LRU of GEMINI_MODELS, since the system text varies per query); genai.configure
+    is global, so only re-run it when the key changes"""
+    global _gemini_configured_key
+    import google.generativeai as genai
+
+    with _lock:
+        if _gemini_configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _gemini_configured_key = api_key
+            # Models built for the previous key are bound to the old configuration
+            _gemini_models.clear()
+        key = (model, system_instruction)
+        instance = _gemini_models.get(key)
+        if instance is None:
+            instance = _gemini_models[key] = genai.GenerativeModel(model_name=model,
+                                                                   system_instruction=system_instruction)
+        _gemini_models.move_to_end(key)
+        while len(_gemini_models) > GEMINI_MODELS:
+            _gemini_models.popitem(last=False)
+        return instance
+
+
+def _loop_id() -> int:
+    """Async clients are bound to the event loop that created them"""
+    return id(asyncio.get_running_loop())
+
+
+def get_async_http_client():
+    """Shared httpx.AsyncClient for the running event loop (keep-alive pool, optional HTTP/2)"""
+    def build():
+        import httpx
+        return httpx.AsyncClient(
+            http2=http2_enabled(),
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=POOL_MAXSIZE * 5,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+            event_hooks={"response": [_aobserve_httpx]},
+        )
+    return get_client("httpx-async", "", build, _loop_id())
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled AsyncOpenAI client for the running event loop"""
+    def build():
+        import openai
+        return openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=get_async_http_client())
+    return get_client("openai-async", api_key, build, (base_url, _loop_id()))
+
+
+def get_async_groq_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled AsyncGroq client for the running event loop"""
+    def build():
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key, base_url=base_url, http_client=get_async_http_client())
+    return get_client("groq-async", api_key, build, (base_url, _loop_id()))
+
+
+def get_async_anthropic_client(api_key: str, base_url: Optional[str] = None):
+    """Pooled AsyncAnthropic client for the running event loop"""
+    def build():
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=api_key, base_url=base_url, http_client=get_async_http_client())
+    return get_client("anthropic-async", api_key, build, (base_url, _loop_id()))
+
+
+def client_count() -> int:
+    """Number of live pooled clients"""
+    return len(_clients)
+
+
+def clear_clients():
+    """Close and drop every pooled client (used by tests, benchmarks and key rotation)"""
+    global _shared_httpx_client, _gemini_configured_key
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            # Async clients can only be closed on their own loop; dropping them is enough here
+            if callable(close) and not asyncio.iscoroutinefunction(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+        _clients.clear()
+        _gemini_models.clear()
+        if _shared_httpx_client is not None:
+            _shared_httpx_client.close()
+            _shared_httpx_client = None
+        _gemini_configured_key = None
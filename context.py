@@ -0,0 +1,175 @@
+"""
+Context Window Manager
+Token-budgeted prompt packing with a cached rolling summary of older turns
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Context windows in tokens (prompt + completion); unknown models fall back to DEFAULT_CONTEXT_WINDOW
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "gemma2-9b-it": 8192,
+    "mistralai/Mistral-7B-Instruct-v0.2": 32768,
+    "google/gemma-7b-it": 8192,
+    "meta-llama/Llama-2-7b-chat-hf": 4096,
+    "meta-llama/Llama-2-70b-chat-hf": 4096,
+    "mistralai/Mixtral-8x7B-Instruct-v0.1": 32768,
+    "claude-3-haiku-20240307": 200000,
+    "claude-3-sonnet-20240229": 200000,
+    "gemini-1.5-flash": 1048576,
+    "gemini-1.5-pro": 2097152,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+COMPLETION_TOKENS = 1000   # max_tokens requested by the chat functions
+MESSAGE_OVERHEAD = 4       # per-message role/formatting tokens
+# Prompt budget cap: large windows are still capped to keep latency and cost bounded
+CONTEXT_BUDGET = int(os.getenv("NOVA_CONTEXT_BUDGET", "3000"))
+SUMMARY_SHARE = 0.25       # fraction of the budget the rolling summary may use
+# "extractive" (local, default) or "llm" (ask the chat provider to summarize older turns)
+SUMMARIZER = os.getenv("NOVA_SUMMARIZER", "extractive")
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """tiktoken encoder if installed, else None (fast estimator is used)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Token count: tiktoken's cl100k_base when available, else ~4 characters / 0.75 words per token"""
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(len(text) // 4, int(len(text.split()) * 1.3), 1)
+
+
+def message_tokens(message: Dict) -> int:
+    return count_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD
+
+
+def context_budget(model: Optional[str], budget: Optional[int] = None) -> int:
+    """Prompt tokens available for model: min(budget cap, window - completion tokens)"""
+    window = MODEL_CONTEXT_WINDOWS.get(model or "", DEFAULT_CONTEXT_WINDOW)
+    cap = budget if budget else CONTEXT_BUDGET
+    return max(256, min(cap, window - COMPLETION_TOKENS))
+
+
+def _first_sentence(text: str, max_words: int = 25) -> str:
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+
+
+def extractive_summarizer(previous: str, turns: List[Dict]) -> str:
+    """Local summarizer: appends the first sentence of each folded turn (no network call)"""
+    lines = [previous] if previous else []
+    for turn in turns:
+        speaker = "User" if turn.get("role") == "user" else "Jarvis"
+        lines.append(f"{speaker}: {_first_sentence(str(turn.get('content', '')))}")
+    return "\n".join(lines)
+
+
+def llm_summarizer(provider: str, model: Optional[str] = None) -> Callable[[str, List[Dict]], str]:
+    """Summarizer that asks a provider (temperature 0, so results are cached); falls back to extractive"""
+    def summarize(previous: str, turns: List[Dict]) -> str:
+        from ai_providers import chat_with_provider
+
+        transcript = "\n".join(
+            f"{'User' if t.get('role') == 'user' else 'Jarvis'}: {t.get('content', '')}" for t in turns
+        )
+        prompt = [
+            {"role": "system", "content": "Summarize the conversation in a few short bullet points. Keep names, facts and decisions."},
+            {"role": "user", "content": f"Existing summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"},
+        ]
+        summary = chat_with_provider(provider, prompt, model, 0.0)
+        if summary.startswith("Error"):
+            return extractive_summarizer(previous, turns)
+        return summary
+    return summarize
+
+
+def get_summarizer(provider: Optional[str] = None, model: Optional[str] = None) -> Callable[[str, List[Dict]], str]:
+    """Summarizer selected by NOVA_SUMMARIZER"""
+    if SUMMARIZER == "llm" and provider and provider != "auto":
+        return llm_summarizer(provider, model)
+    return extractive_summarizer
+
+
+def _trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the most recent lines of a summary within max_tokens"""
+    lines = text.split("\n")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def build_messages(system_prompt: str, history: List[Dict], query: str, model: Optional[str] = None,
+                   budget: Optional[int] = None, summary_state: Optional[Dict] = None,
+                   summarizer: Callable[[str, List[Dict]], str] = extractive_summarizer,
+                   memory: str = "") -> Tuple[List[Dict], Dict]:
+    """Pack system prompt, rolling summary, recent history and the query into the model's token budget.
+
+    history is a list of {"role", "content"} dicts, oldest first. Turns that no longer fit are folded into
+    a rolling summary; summary_state ({"folded": n, "text": str}) caches it between calls so each turn is
+    summarized once. memory (retrieved snippets) is sent just before the query and taken off the budget.
+    Returns (messages, summary_state).
+    """
+    limit = context_budget(model, budget)
+    turns = [h for h in history if h.get("role") in ("user", "assistant")]
+    state = dict(summary_state or {})
+    if state.get("folded", 0) > len(turns):
+        state = {}  # history was cleared or replaced
+    folded = state.get("folded", 0)
+    summary = state.get("text", "")
+    summary_cap = int(limit * SUMMARY_SHARE)
+
+    system = {"role": "system", "content": system_prompt}
+    user = {"role": "user", "content": query}
+    recalled = {"role": "system", "content": memory} if memory else None
+    available = limit - message_tokens(system) - message_tokens(user) - (summary_cap if folded or turns else 0)
+    if recalled:
+        available -= message_tokens(recalled)
+
+    # Newest turns first, never re-including turns already folded (keeps the prompt prefix stable)
+    start = len(turns)
+    used = 0
+    while start > folded:
+        cost = message_tokens(turns[start - 1])
+        if used + cost > available:
+            break
+        used += cost
+        start -= 1
+
+    if start > folded:
+        summary = _trim_to_tokens(summarizer(summary, turns[folded:start]), summary_cap)
+        folded = start
+    state = {"folded": folded, "text": summary}
+
+    messages = [system]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    messages.extend({"role": t["role"], "content": t["content"]} for t in turns[start:])
+    if recalled:
+        # After the history, so the cacheable prompt prefix does not change with every query
+        messages.append(recalled)
+    messages.append(user)
+    return messages, state
+
+
+def prompt_tokens(messages: List[Dict]) -> int:
+    """Total prompt tokens for a message list"""
+    return sum(message_tokens(m) for m in messages)
@@ -0,0 +1,218 @@
+"""
+Conversation Store
+Durable chat history per session, in SQLite. Turns are queued in memory and committed by a background
+writer every NOVA_CONVERSATION_FLUSH_MS, so a burst of turns costs one transaction (one fsync)
+rather than one per message. Sessions load lazily: only the newest window is read when a session resumes, and
+older messages are paged in by sequence number on demand. The session id lives in the page URL (?session=...),
+so it survives reloads. Replicas on one host can share sessions through the same NOVA_CONVERSATION_DB file; SQLite
+WAL does not work on network filesystems (NFS, SMB), so a shared network mount is not a supported way to share
+sessions across machines.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CONVERSATION_DB = os.getenv("NOVA_CONVERSATION_DB", os.path.join(".cache", "conversations.sqlite3"))
+FLUSH_INTERVAL = float(os.getenv("NOVA_CONVERSATION_FLUSH_MS", "200")) / 1000  # group-commit window
+RESUME_WINDOW = int(os.getenv("NOVA_CONVERSATION_WINDOW", "100"))             # messages loaded on resume
+RETRY_DELAY = 1.0                                                              # seconds before retrying a failed commit
+MAX_RETRIES = 5                                                                # locked/busy retries before a batch is dropped
+
+# Message keys stored in their own columns; anything else (e.g. "type") goes into the extra JSON
+_COLUMNS = ("id", "role", "content", "timestamp")
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _row_to_message(row: Tuple) -> Dict:
+    message = {"id": row[0], "role": row[1], "content": row[2], "timestamp": row[3]}
+    if row[4]:
+        message.update(json.loads(row[4]))
+    return message
+
+
+class ConversationStore:
+    """Sessions and their messages, written through a batching background writer"""
+
+    def __init__(self, db_path: str = CONVERSATION_DB, flush_interval: float = FLUSH_INTERVAL):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.flush_interval = flush_interval
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        if db_path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, title TEXT, created REAL, updated REAL);"
+            "CREATE TABLE IF NOT EXISTS messages (seq INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, "
+            "id TEXT, role TEXT, content TEXT, timestamp TEXT, extra TEXT);"
+            "CREATE INDEX IF NOT EXISTS messages_session ON messages (session, seq);"
+            "CREATE INDEX IF NOT EXISTS messages_id ON messages (id);"
+        )
+        self._db.commit()
+        self._db_lock = threading.Lock()
+        self._pending: List[Tuple[str, tuple]] = []  # (statement, parameters), in arrival order
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self.stats = {"messages": 0, "commits": 0, "errors": 0, "dropped": 0, "last_error": ""}
+        self._retries = 0  # consecutive failed commits of the batch at the head of the queue
+        self._writer = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+        self._writer.start()
+
+    def _queue(self, statements: List[Tuple[str, tuple]]) -> None:
+        with self._pending_lock:
+            self._pending.extend(statements)
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait()
+            time.sleep(self.flush_interval)  # let the rest of the burst arrive, then commit it together
+            self._wake.clear()
+            if not self.flush():
+                time.sleep(RETRY_DELAY)  # e.g. "database is locked": the batch was requeued, try again shortly
+                self._wake.set()
+
+    def flush(self) -> bool:
+        """Commit everything queued so far (one transaction); False if it failed. A locked or busy database puts
+        the batch back at the head of the queue (up to MAX_RETRIES times); any other error drops it. Failures are
+        counted in stats"""
+        # Take the queue under the db lock, so a reader that flushes concurrently waits for these rows
+        with self._db_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return True
+            try:
+                for statement, parameters in pending:
+                    self._db.execute(statement, parameters)
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+                message = str(e).lower()
+                self._retries += 1
+                if ("locked" in message or "busy" in message) and self._retries <= MAX_RETRIES:
+                    with self._pending_lock:
+                        self._pending[:0] = pending
+                else:
+                    # Permanent (no such table, read-only, I/O error) or still locked after MAX_RETRIES: give up
+                    self._retries = 0
+                    self.stats["dropped"] += len(pending)
+                return False
+            self._retries = 0
+            self.stats["commits"] += 1
+            return True
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+    def append_messages(self, session: str, messages: List[Dict]) -> None:
+        """Queue chat messages (new_message dicts) for the session"""
+        now = time.time()
+        statements = [(
+            "INSERT INTO sessions (id, title, created, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET updated = excluded.updated",
+            (session, next((m["content"][:60] for m in messages if m.get("role") == "user"), ""), now, now),
+        )]
+        for message in messages:
+            extra = {k: v for k, v in message.items() if k not in _COLUMNS}
+            statements.append((
+                "INSERT INTO messages (session, id, role, content, timestamp, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                (session, message.get("id"), message.get("role"), message.get("content"), message.get("timestamp"),
+                 json.dumps(extra) if extra else None),
+            ))
+        self.stats["messages"] += len(messages)
+        self._queue(statements)
+
+    def recent(self, session: str, limit: int = RESUME_WINDOW) -> List[Dict]:
+        """Newest `limit` messages of a session, oldest first"""
+        return self.before(session, None, limit)
+
+    def before(self, session: str, message_id: Optional[str], limit: int) -> List[Dict]:
+        """Up to `limit` messages older than message_id (None = newest), oldest first"""
+        self.flush()
+        with self._db_lock:
+            bound = 2 ** 63 - 1
+            if message_id is not None:
+                row = self._db.execute("SELECT seq FROM messages WHERE id = ? AND session = ?", (message_id, session)).fetchone()
+                if row is None:
+                    return []
+                bound = row[0]
+            rows = self._db.execute(
+                "SELECT id, role, content, timestamp, extra FROM messages WHERE session = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session, bound, limit),
+            ).fetchall()
+        return [_row_to_message(row) for row in reversed(rows)]
+
+    def count(self, session: str) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages WHERE session = ?", (session,)).fetchone()[0]
+
+    def iter_messages(self, session: str, batch: int = 500) -> Iterator[Dict]:
+        """Every message of a session, oldest first, read in batches (for export)"""
+        self.flush()
+        seq = 0
+        while True:
+            with self._db_lock:
+                rows = self._db.execute(
+                    "SELECT seq, id, role, content, timestamp, extra FROM messages WHERE session = ? AND seq > ? "
+                    "ORDER BY seq LIMIT ?",
+                    (session, seq, batch),
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _row_to_message(row[1:])
+            seq = rows[-1][0]
+
+    def clear(self, session: str) -> None:
+        """Delete a session and its messages"""
+        self.flush()
+        with self._db_lock:
+            self._db.execute("DELETE FROM messages WHERE session = ?", (session,))
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session,))
+            self._db.commit()
+
+    def sessions(self, limit: int = 20) -> List[Dict]:
+        """Most recently active sessions"""
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id, title, updated FROM sessions ORDER BY updated DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"id": r[0], "title": r[1], "updated": r[2]} for r in rows]
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        with self._pending_lock:
+            stats["pending"] = len(self._pending)
+        return stats
+
+
+_store: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Process-wide store (NOVA_CONVERSATION_DB); queued turns are flushed at exit"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationStore()
+                atexit.register(_store.close)
+    return _store
@@ -0,0 +1,222 @@
+"""
+Headless Daemon
+The command engine as a long-running service, without Streamlit. Commands come from stdin (interactive or
+piped) or from any number of clients on a Unix or TCP socket. Provider clients, caches, the intent index and the
+retrieval index stay warm between turns. Each conversation's context is bounded by its Turn ring and rolling
+summary, so a turn costs the same after a week as after a minute, and only the reply is written per turn.
+
+Socket protocol: one request per line, either plain text or {"query": ..., "session": ..., "stream": true}.
+Streamed tokens come back as {"token": ...} lines, then one {"response", "type", "session", "ms"} line. Website
+commands are not opened on the daemon host; their reply carries the "url" for the client to open.
+
+Usage: python daemon.py [--socket PATH | --port N] [--session ID] [--provider P] [--model M]
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from ai_providers import get_available_providers
+from clients import prewarm_sdks
+from engine import Session, chat, default_model, default_options, process_command
+from intents import get_intent_index
+from utils import start_news_refresher
+
+MAX_SESSIONS = int(os.getenv("NOVA_DAEMON_SESSIONS", "256"))  # sessions kept open; others reload from the store
+
+
+def valid_session_id(value) -> bool:
+    """Client-supplied session ids: alphanumeric strings of at most 64 characters"""
+    return isinstance(value, str) and value.isalnum() and len(value) <= 64
+
+
+class Daemon:
+    """Shared engine state for every client: warm clients, an LRU of open sessions and turn statistics"""
+
+    def __init__(self, options: Optional[Dict] = None, max_sessions: int = MAX_SESSIONS):
+        self.options = {**default_options(), **(options or {})}
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"turns": 0, "seconds": 0.0}
+
+    def warm(self) -> None:
+        """Load SDKs, the intent index and the news prefetcher before the first command arrives"""
+        prewarm_sdks(get_available_providers())
+        get_intent_index()
+        start_news_refresher()
+
+    def session(self, session_id: Optional[str] = None) -> Session:
+        """Open (or resume) a session; the least recently used ones are closed beyond max_sessions"""
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def handle(self, session: Session, query: str, on_token: Optional[Callable[[str], None]] = None,
+               chat_only: bool = False, open_websites: bool = True) -> Tuple[str, str]:
+        """Run one command (or only chat, skipping command matching) and record the turn; on_token receives chat
+        reply tokens as they arrive. open_websites=False returns website URLs instead of opening them here"""
+        stream = None
+        if on_token is not None:
+            def stream(tokens):
+                parts = []
+                for token in tokens:
+                    parts.append(token)
+                    on_token(token)
+                return "".join(parts)
+        start = time.perf_counter()
+        if chat_only:
+            response, command_type = chat(session, query, stream=stream, **self.options)
+        else:
+            response, command_type = process_command(session, query, stream=stream, open_websites=open_websites,
+                                                     **self.options)
+        session.record_turn(query, response, command_type)
+        with self._lock:
+            self.stats["turns"] += 1
+            self.stats["seconds"] += time.perf_counter() - start
+        return response, command_type
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "sessions_open": len(self._sessions)}
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    """One connection: a request per line, JSON lines back"""
+
+    def _send(self, payload: Dict) -> None:
+        self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        daemon: Daemon = self.server.daemon
+        session_id = None
+        for line in self.rfile:
+            text = line.decode("utf-8", "replace").strip()
+            if not text:
+                continue
+            try:
+                request = json.loads(text) if text.startswith("{") else {"query": text}
+            except ValueError:
+                self._send({"error": "invalid JSON"})
+                continue
+            query = str(request.get("query", "")).strip()
+            if not query:
+                self._send({"error": "missing query"})
+                continue
+            requested = request.get("session")
+            if requested and not valid_session_id(requested):
+                self._send({"error": "invalid session id"})
+                continue
+            session = daemon.session(requested or session_id)
+            session_id = session.session_id
+            start = time.perf_counter()
+            on_token = (lambda token: self._send({"token": token})) if request.get("stream") else None
+            try:
+                # Clients may be on another machine: website commands return the URL instead of opening it here
+                response, command_type = daemon.handle(session, query, on_token, open_websites=False)
+            except Exception as e:
+                response, command_type = f"Error: {str(e)}", "error"
+            reply = {"response": response, "type": command_type, "session": session_id,
+                     "ms": round((time.perf_counter() - start) * 1000, 1)}
+            if command_type == "website":
+                reply["url"] = response
+            self._send(reply)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(daemon: Daemon, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = 0):
+    """Serve clients until interrupted (Unix socket if socket_path is given, else TCP)"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = socketserver.ThreadingUnixStreamServer(socket_path, _ClientHandler)
+        server.daemon_threads = True
+        where = socket_path
+    else:
+        server = _TCPServer((host, port), _ClientHandler)
+        where = "%s:%d" % server.server_address[:2]
+    server.daemon = daemon
+    print(f"Jarvis daemon listening on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def repl(daemon: Daemon, session_id: Optional[str] = None, stream: bool = True) -> None:
+    """Commands from stdin, replies streamed to stdout. /new starts a conversation, /clear empties it, /quit exits"""
+    session = daemon.session(session_id)
+    interactive = sys.stdin.isatty()
+    if interactive:
+        print(f"Jarvis daemon (session {session.session_id}); /new, /clear, /quit", file=sys.stderr)
+    while True:
+        if interactive:
+            print("> ", end="", flush=True, file=sys.stderr)
+        line = sys.stdin.readline()
+        if not line:
+            break
+        query = line.strip()
+        if not query:
+            continue
+        if query == "/quit":
+            break
+        if query == "/new":
+            session = daemon.session()
+            print(f"New session {session.session_id}", file=sys.stderr)
+            continue
+        if query == "/clear":
+            session.clear()
+            continue
+        streamed = []
+        on_token = (lambda token: (streamed.append(token), print(token, end="", flush=True))) if stream else None
+        response, _ = daemon.handle(session, query, on_token)
+        print("" if streamed else response, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Jarvis without the UI, on stdin or a socket")
+    parser.add_argument("--socket", help="serve on this Unix socket path")
+    parser.add_argument("--port", type=int, help="serve on this TCP port (127.0.0.1 unless --host)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--session", help="resume this conversation (stdin mode)")
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--no-stream", action="store_true", help="print replies only when complete")
+    args = parser.parse_args()
+
+    options = {}
+    if args.provider:
+        options["ai_provider"] = args.provider
+        options["ai_model"] = default_model(args.provider)  # the default model belongs to another provider
+    if args.model:
+        options["ai_model"] = args.model
+    daemon = Daemon(options)
+    daemon.warm()
+    if args.socket or args.port is not None:
+        serve(daemon, args.socket, args.host, args.port or 0)
+    else:
+        repl(daemon, args.session, stream=not args.no_stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Command Engine
+The assistant without a UI: intent dispatch to the built-in command handlers, AI chat over a bounded context
+(the session's Turn ring, a rolling summary and retrieved memory), and turn recording to the conversation store
+and retrieval index. The Streamlit app, the voice CLI and the headless daemon all drive it; each front end only
+decides where the reply is shown. A Session holds one conversation's state.
+"""
+import datetime
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils import (
+    ai_chat, ai_chat_stream, ai_completion, save_ai_response,
+    aget_weather, calculate, get_news, save_note, read_notes, search_notes, delete_note
+)
+from ai_providers import get_available_providers, get_provider_models
+from async_bridge import gather_async
+from router import DEFAULT_POLICY
+from context import CONTEXT_BUDGET, build_messages, get_summarizer
+from chat_view import new_message_id
+from conversation_store import get_conversation_store, new_session_id
+from session_memory import Turn, get_session_history
+from intents import get_intent_index
+from retrieval import chat_ref, get_retrieval_index, memory_context
+
+
+SYSTEM_PROMPT = "You are Jarvis, a helpful AI assistant. Be conversational, friendly, and helpful. Keep responses concise but engaging. You can have natural conversations with the user."
+
+
+def _open_website(query, slots, cache_nondeterministic):
+    try:
+        import webbrowser
+        webbrowser.open(slots["url"])
+        return f"Opening {slots['site']}...", "website"
+    except Exception as e:
+        return f"Error opening {slots['site']}: {str(e)}", "error"
+
+
+def _tell_time(query, slots, cache_nondeterministic):
+    hour = datetime.datetime.now().strftime("%H")
+    minute = datetime.datetime.now().strftime("%M")
+    return f"Sir, the time is {hour}:{minute}", "time"
+
+
+def _tell_date(query, slots, cache_nondeterministic):
+    date = datetime.datetime.now().strftime("%B %d, %Y")
+    return f"Today's date is {date}", "date"
+
+
+def _weather(query, slots, cache_nondeterministic):
+    # Fetch all cities concurrently on the shared event loop
+    results = gather_async(*[aget_weather(city) for city in slots["cities"]], timeout=10)
+    return "\n".join(r if isinstance(r, str) else f"Error fetching weather: {str(r)}" for r in results), "weather"
+
+
+def _calculate(query, slots, cache_nondeterministic):
+    return calculate(slots["expression"]), "calculator"
+
+
+def _news(query, slots, cache_nondeterministic):
+    return get_news(slots["topic"]), "news"
+
+
+def _save_note(query, slots, cache_nondeterministic):
+    return save_note(slots["content"]), "note"
+
+
+def _read_notes(query, slots, cache_nondeterministic):
+    return read_notes(), "note"
+
+
+def _search_notes(query, slots, cache_nondeterministic):
+    return search_notes(slots["keywords"]), "note"
+
+
+def _delete_note(query, slots, cache_nondeterministic):
+    return delete_note(slots["note_id"]), "note"
+
+
+def _ai_completion(query, slots, cache_nondeterministic):
+    prompt = slots["prompt"]
+    ai_response = ai_completion(prompt, cache_nondeterministic=cache_nondeterministic)
+    save_ai_response(prompt, ai_response)
+    return ai_response, "ai_completion"
+
+
+# Intent name -> handler(query, slots, cache_nondeterministic) -> (response, command_type)
+COMMAND_HANDLERS = {
+    "website": _open_website,
+    "time": _tell_time,
+    "date": _tell_date,
+    "weather": _weather,
+    "calculator": _calculate,
+    "news": _news,
+    "save_note": _save_note,
+    "read_notes": _read_notes,
+    "search_notes": _search_notes,
+    "delete_note": _delete_note,
+    "ai_completion": _ai_completion,
+}
+
+
+class Session:
+    """One conversation: its bounded history ring, rolling-summary state and the store its turns go to"""
+
+    def __init__(self, session_id: Optional[str] = None, store=None):
+        self.session_id = session_id or new_session_id()
+        self.store = store or get_conversation_store()
+        self.history = get_session_history(self.session_id, self.store)
+        self.context_summary: Dict = {}
+        self.lock = threading.Lock()  # turns of one session run one at a time
+
+    def record_turn(self, query: str, response: str, command_type: str, log_command: bool = True) -> None:
+        """Append a user/assistant exchange (log_command=False keeps it out of the command log)"""
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        turn = Turn(new_message_id(), query, new_message_id(), response, command_type, timestamp, log_command)
+        self.history.append(turn)
+        messages = turn.messages()
+        self.store.append_messages(self.session_id, messages)
+        try:
+            # Batched on the index's writer thread, so turns never queue on the index lock
+            get_retrieval_index().queue_chats(messages, self.session_id)
+        except Exception:
+            pass  # memory indexing must never break the chat
+
+    def clear(self) -> None:
+        """Delete the conversation's messages and start its context over"""
+        self.store.clear(self.session_id)
+        self.history.reset()
+        self.context_summary = {}
+
+
+def default_model(provider: str) -> str:
+    """The model the app's sidebar preselects for a provider"""
+    if provider == "openai":
+        return "gpt-3.5-turbo"
+    return (get_provider_models(provider) or ["default"])[0]
+
+
+def default_options() -> Dict:
+    """process_command options for front ends without settings widgets (same defaults as the app's sidebar)"""
+    providers = get_available_providers() or ["openai"]
+    provider = os.getenv("NOVA_PROVIDER") or ("auto" if len(providers) >= 2 else providers[0])
+    return {"ai_provider": provider, "ai_model": os.getenv("NOVA_MODEL") or default_model(provider)}
+
+
+def chat_messages(session: Session, query: str, ai_model: str = "gpt-3.5-turbo", ai_provider: str = "openai",
+                  context_budget: int = CONTEXT_BUDGET, use_memory: bool = True) -> List[Dict]:
+    """Prompt for a chat reply: system prompt, retrieved memory, the recent turns that fit the budget (older ones
+    folded into the session's rolling summary) and the query"""
+    history = session.history
+    history_messages = history.messages()
+    # Relevant notes, saved responses and earlier chats (turns still in the recent window are skipped)
+    memory = ""
+    if use_memory:
+        try:
+            recent = {chat_ref(m, session.session_id) for m in history_messages[-10:]}
+            memory = memory_context(query, exclude=recent, session_id=session.session_id)
+        except Exception:
+            memory = ""  # retrieval is best-effort; the chat still works without it
+
+    # The summary's fold point counts from the start of the in-memory ring, which moves as turns spill out
+    summary_state = dict(session.context_summary)
+    summary_state["folded"] = max(0, summary_state.get("folded", 0) - (history.older - summary_state.pop("older", history.older)))
+    messages, summary_state = build_messages(
+        SYSTEM_PROMPT,
+        history_messages,
+        query,
+        model=ai_model,
+        budget=context_budget,
+        summary_state=summary_state,
+        summarizer=get_summarizer(ai_provider, ai_model),
+        memory=memory,
+    )
+    summary_state["older"] = history.older
+    session.context_summary = summary_state
+    return messages
+
+
+def chat(session: Session, query: str, ai_model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+         ai_provider: str = "openai", stream: Optional[Callable[[Iterator[str]], str]] = None, hedge: bool = False,
+         hedge_delay: Optional[float] = None, cache_nondeterministic: bool = False,
+         routing_policy: str = DEFAULT_POLICY, context_budget: int = CONTEXT_BUDGET,
+         use_memory: bool = True) -> Tuple[str, str]:
+    """AI chat reply to the query in the session's context, skipping command matching"""
+    with session.lock:
+        messages = chat_messages(session, query, ai_model, ai_provider, context_budget, use_memory)
+        try:
+            # Hedged requests race whole responses, so they are not streamed
+            if stream is not None and not hedge:
+                response = stream(ai_chat_stream(messages, model=ai_model, temperature=temperature, provider=ai_provider,
+                                                 cache_nondeterministic=cache_nondeterministic,
+                                                 routing_policy=routing_policy))
+            else:
+                response = ai_chat(messages, model=ai_model, temperature=temperature, provider=ai_provider,
+                                   hedge=hedge, hedge_delay=hedge_delay, cache_nondeterministic=cache_nondeterministic,
+                                   routing_policy=routing_policy)
+            command_type = "chat"
+        except Exception as e:
+            response = f"Error: {str(e)}"
+            command_type = "error"
+
+    return response, command_type
+
+
+def process_command(session: Session, query: str, cache_nondeterministic: bool = False, open_websites: bool = True,
+                    **options) -> Tuple[str, str]:
+    """Process user command and return (response, command_type); anything that is not a command goes to chat()
+    with the options. `stream` consumes the chat reply's token generator as it arrives and returns the full text
+    (e.g. st.write_stream); None waits for the whole reply. With open_websites=False (remote clients) a website
+    command returns the URL instead of opening a browser on this machine"""
+    # Built-in commands, site shortcuts and registered custom commands: one pass over the query
+    found = get_intent_index().match(query)
+    if found:
+        intent, slots = found
+        if intent.name == "website" and not open_websites:
+            return slots["url"], "website"
+        if intent.handler is not None:
+            return intent.handler(query, slots), intent.name
+        return COMMAND_HANDLERS[intent.name](query, slots, cache_nondeterministic)
+
+    # Default: Chat with AI
+    return chat(session, query, cache_nondeterministic=cache_nondeterministic, **options)
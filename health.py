@@ -0,0 +1,168 @@
+"""
+Model Health Registry
+Per-provider, per-model circuit breakers (closed / open / half-open) so known-bad models are skipped immediately
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = int(os.getenv("NOVA_BREAKER_FAILURES", "3"))     # consecutive failures before opening
+BASE_COOLDOWN = float(os.getenv("NOVA_BREAKER_COOLDOWN", "30"))      # seconds before the first probe
+MAX_COOLDOWN = float(os.getenv("NOVA_BREAKER_MAX_COOLDOWN", "900"))  # cap for exponential backoff
+MODEL_ERROR_COOLDOWN = float(os.getenv("NOVA_BREAKER_MODEL_COOLDOWN", "3600"))  # deprecated / missing models
+PROBE_TIMEOUT = float(os.getenv("NOVA_BREAKER_PROBE_TIMEOUT", "120"))  # a probe with no outcome by then is lost
+
+
+def classify_error(message: str) -> str:
+    """Classify an error message: "config" (key/package problems), "model" (model gone), or "transient" """
+    msg = message.lower()
+    if ("401" in msg or "unauthorized" in msg or "api key" in msg or "api_key" in msg
+            or "not installed" in msg or "no module named" in msg or "not found in .env" in msg):
+        return "config"
+    if ("deprecated" in msg or "decommissioned" in msg or "model_not_found" in msg
+            or "does not exist" in msg or ("model" in msg and ("not found" in msg or "404" in msg))):
+        return "model"
+    return "transient"
+
+
+class CircuitBreaker:
+    """Breaker for one (provider, model)"""
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = BASE_COOLDOWN
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.last_error = ""
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.opened_at + self.cooldown - now)
+
+
+class HealthRegistry:
+    """Circuit breakers keyed by (provider, model), shared by every chat function"""
+
+    def __init__(self):
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _breaker(self, provider: str, model: Optional[str]) -> CircuitBreaker:
+        key = (provider, model or "default")
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker()
+        return breaker
+
+    def allow(self, provider: str, model: Optional[str]) -> bool:
+        """True if a request may be sent; an open breaker past its cooldown admits a single probe"""
+        now = time.time()
+        with self._lock:
+            breaker = self._breaker(provider, model)
+            if breaker.state == CLOSED:
+                return True
+            if breaker.state == OPEN and breaker.retry_in(now) <= 0:
+                breaker.state = HALF_OPEN
+                breaker.probe_in_flight = False
+            if breaker.state == HALF_OPEN and breaker.probe_in_flight and now - breaker.probe_started > PROBE_TIMEOUT:
+                breaker.probe_in_flight = False  # its caller never reported back
+            if breaker.state == HALF_OPEN and not breaker.probe_in_flight:
+                breaker.probe_in_flight = True
+                breaker.probe_started = now
+                return True
+            return False
+
+    def record_success(self, provider: str, model: Optional[str]) -> None:
+        with self._lock:
+            breaker = self._breaker(provider, model)
+            breaker.state = CLOSED
+            breaker.failures = 0
+            breaker.cooldown = BASE_COOLDOWN
+            breaker.probe_in_flight = False
+
+    def record_failure(self, provider: str, model: Optional[str], error: str = "") -> None:
+        """Count a failure; model errors open the breaker at once, config errors don't count against the model"""
+        kind = classify_error(error)
+        with self._lock:
+            breaker = self._breaker(provider, model)
+            breaker.last_error = error[:200]
+            if kind == "config":
+                # Not the model's fault: just give back a half-open probe slot
+                self._release(breaker)
+                return
+            breaker.failures += 1
+            if kind == "model":
+                self._open(breaker, MODEL_ERROR_COOLDOWN)
+            elif breaker.state == HALF_OPEN:
+                self._open(breaker, min(breaker.cooldown * 2, MAX_COOLDOWN))
+            elif breaker.failures >= FAILURE_THRESHOLD:
+                self._open(breaker, BASE_COOLDOWN)
+
+    def record_response(self, provider: str, model: Optional[str], response: str) -> None:
+        """Record the outcome of a chat call from its return value ("Error..." strings are failures)"""
+        if response.startswith("Error"):
+            self.record_failure(provider, model, response)
+        else:
+            self.record_success(provider, model)
+
+    def release(self, provider: str, model: Optional[str]) -> None:
+        """Neutral outcome (e.g. cancelled request): frees a half-open probe slot without judging the model"""
+        with self._lock:
+            self._release(self._breaker(provider, model))
+
+    @staticmethod
+    def _release(breaker: CircuitBreaker) -> None:
+        breaker.probe_in_flight = False
+
+    @staticmethod
+    def _open(breaker: CircuitBreaker, cooldown: float) -> None:
+        breaker.state = OPEN
+        breaker.cooldown = cooldown
+        breaker.opened_at = time.time()
+        breaker.probe_in_flight = False
+
+    def unavailable_message(self, provider: str, model: Optional[str]) -> str:
+        with self._lock:
+            breaker = self._breaker(provider, model)
+            retry_in = breaker.retry_in(time.time())
+            last_error = breaker.last_error
+        return (f"Error: {provider} model {model or 'default'} is temporarily unavailable after repeated failures "
+                f"(retrying in {retry_in:.0f}s). Last error: {last_error}")
+
+    def state(self, provider: str, model: Optional[str]) -> str:
+        with self._lock:
+            return self._breaker(provider, model).state
+
+    def report(self) -> List[Dict]:
+        """Rows of {provider, model, state, failures, retry_in, last_error}"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "provider": provider,
+                    "model": model,
+                    "state": breaker.state,
+                    "failures": breaker.failures,
+                    "retry_in": breaker.retry_in(now) if breaker.state == OPEN else 0.0,
+                    "last_error": breaker.last_error,
+                }
+                for (provider, model), breaker in sorted(self._breakers.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+
+_registry = HealthRegistry()
+
+
+def get_health_registry() -> HealthRegistry:
+    """Process-wide health registry"""
+    return _registry
@@ -0,0 +1,92 @@
+"""
+Hedged Requests
+Send a chat request to a primary provider, fire a backup provider after a delay, keep the first good answer
+"""
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional
+
+from ai_providers import get_available_providers
+from async_bridge import run_async
+from async_providers import achat_with_provider
+from metrics import get_latency
+from router import DEFAULT_POLICY, choose_provider
+
+# Fixed hedge delay in seconds; 0 means "use the primary's observed p95 latency"
+HEDGE_DELAY = float(os.getenv("NOVA_HEDGE_DELAY", "0"))
+DEFAULT_HEDGE_DELAY = 2.0  # used until enough latency samples exist
+MIN_SAMPLES = 20
+
+_stats = {"requests": 0, "backups_fired": 0, "backup_wins": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_hedge_stats() -> Dict[str, int]:
+    """Counters: hedged requests, backups fired, and how often the backup answered first"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def hedge_delay(provider: str, model: Optional[str] = None, delay: Optional[float] = None) -> float:
+    """Seconds to wait before firing the backup: explicit delay, NOVA_HEDGE_DELAY, or the provider's p95"""
+    if delay:
+        return delay
+    if HEDGE_DELAY:
+        return HEDGE_DELAY
+    stats = get_latency("latency", provider, model)
+    if stats is not None and len(stats.samples) >= MIN_SAMPLES:
+        return stats.percentile(95)
+    return DEFAULT_HEDGE_DELAY
+
+
+def pick_backup_provider(primary: str, candidates: Optional[List[str]] = None,
+                         policy: str = DEFAULT_POLICY) -> Optional[str]:
+    """Best available provider other than the primary, as ranked by the router"""
+    if candidates is None:
+        candidates = get_available_providers()
+    return choose_provider(candidates, policy, exclude=[primary])
+
+
+async def ahedged_chat(messages: List[Dict], primary: str, backup: str, model: str = None,
+                       temperature: float = 0.7, delay: Optional[float] = None) -> str:
+    """Race primary against a delayed backup; returns the first non-error response and cancels the other.
+
+    The model applies to the primary only; the backup uses its provider's default model.
+    If both fail, the primary's error is returned.
+    """
+    _count("requests")
+    primary_task = asyncio.ensure_future(achat_with_provider(primary, messages, model, temperature))
+    wait_for = hedge_delay(primary, model, delay)
+
+    done, _ = await asyncio.wait({primary_task}, timeout=wait_for)
+    if done and not primary_task.result().startswith("Error"):
+        return primary_task.result()
+
+    # Primary is slow (or already failed): fire the backup
+    _count("backups_fired")
+    backup_task = asyncio.ensure_future(achat_with_provider(backup, messages, None, temperature))
+    pending = {primary_task, backup_task} - done
+    try:
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if not task.result().startswith("Error"):
+                    if task is backup_task:
+                        _count("backup_wins")
+                    return task.result()
+        return primary_task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def hedged_chat(messages: List[Dict], primary: str, backup: str, model: str = None,
+                temperature: float = 0.7, delay: Optional[float] = None) -> str:
+    """Synchronous wrapper around ahedged_chat (runs on the shared background event loop)"""
+    return run_async(ahedged_chat(messages, primary, backup, model, temperature, delay))
@@ -0,0 +1,198 @@
+"""
+Intent Index
+Declarative registry of built-in commands and site shortcuts, compiled once into a word-level trigger index.
+A query is tokenized once; only intents whose trigger phrase occurs are checked, so matching cost depends on
+the query length, not on how many intents or sites are registered.
+"""
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Site shortcuts for "open <site>"; extend with register_site(s) or a JSON file named by NOVA_SITES_FILE
+SITES = {
+    "youtube": "https://www.youtube.com",
+    "wikipedia": "https://www.wikipedia.com",
+    "google": "https://www.google.com",
+    "github": "https://www.github.com",
+    "stackoverflow": "https://www.stackoverflow.com",
+    "instagram": "https://www.instagram.com",
+    "facebook": "https://www.facebook.com",
+    "twitter": "https://www.twitter.com",
+    "linkedin": "https://www.linkedin.com",
+    "reddit": "https://www.reddit.com",
+    "whatsapp": "https://web.whatsapp.com",
+    "gmail": "https://mail.google.com",
+    "netflix": "https://www.netflix.com",
+    "spotify": "https://open.spotify.com",
+}
+
+_WORD = re.compile(r"[\w']+")
+_OPEN_SITE = re.compile(r"\bopen\s+([\w-]+)(?:\.(?:com|net|org))?")
+_WEATHER = re.compile(r"weather\s+(?:(?:forecast|report)\b\s*)?(?:(?:in|for|at|of)\b\s*)?(.*?)"
+                      r"(?:\s+(?:today|tonight|now|tomorrow|please))*[?.!]*$", re.IGNORECASE)
+_MATH = re.compile(r"[+\-*/]|\b(?:plus|minus|times|divided)\b")
+_NOTES_QUERY = re.compile(r"\b(?:search|find)\s+notes?\s+(?:(?:for|about|with|on)\b\s*)?(.+)", re.IGNORECASE)
+_NOTE_ID = re.compile(r"\b(?:delete|remove)\s+note\s+(?:number\s+|#)?(\d+)")
+
+# resolve(query, query_lower) -> slots dict if the intent applies, else None
+Resolver = Callable[[str, str], Optional[Dict]]
+
+
+class Intent:
+    """A command: trigger phrases that make it a candidate, a resolver that confirms it and extracts slots"""
+
+    __slots__ = ("name", "triggers", "resolve", "priority", "handler")
+
+    def __init__(self, name: str, triggers: List[str], resolve: Optional[Resolver] = None,
+                 priority: int = 0, handler: Optional[Callable[[str, Dict], str]] = None):
+        self.name = name
+        self.triggers = triggers
+        self.resolve = resolve or (lambda query, query_lower: {})
+        self.priority = priority
+        self.handler = handler
+
+
+class IntentIndex:
+    """Trigger phrases indexed by their first word; match() returns the highest-priority applicable intent"""
+
+    def __init__(self):
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], Intent]]] = {}
+
+    def add(self, intent: Intent) -> None:
+        """Index an intent's triggers; several Intent objects may share a name (e.g. two calculator forms)"""
+        for trigger in intent.triggers:
+            words = tuple(_WORD.findall(trigger.lower()))
+            if words:
+                self._index.setdefault(words[0], []).append((words, intent))
+
+    def register(self, intent: Intent) -> None:
+        """Add an intent, replacing any registered under the same name (lower priority is checked first)"""
+        self.unregister(intent.name)
+        self.add(intent)
+
+    def unregister(self, name: str) -> None:
+        for first, entries in list(self._index.items()):
+            entries[:] = [(words, intent) for words, intent in entries if intent.name != name]
+            if not entries:
+                del self._index[first]
+
+    def names(self) -> List[str]:
+        return sorted({intent.name for entries in self._index.values() for _, intent in entries})
+
+    def candidates(self, query_lower: str) -> List[Intent]:
+        """Intents with a trigger phrase in the query, best priority first"""
+        words = _WORD.findall(query_lower)
+        found = {}
+        for i, word in enumerate(words):
+            for phrase, intent in self._index.get(word, ()):
+                if tuple(words[i:i + len(phrase)]) == phrase:
+                    found[id(intent)] = intent
+        return sorted(found.values(), key=lambda intent: intent.priority)
+
+    def match(self, query: str) -> Optional[Tuple[Intent, Dict]]:
+        """(intent, slots) for the query, or None to fall through to the chat model"""
+        query_lower = query.lower()
+        for intent in self.candidates(query_lower):
+            slots = intent.resolve(query, query_lower)
+            if slots is not None:
+                return intent, slots
+        return None
+
+
+def _resolve_site(query: str, query_lower: str) -> Optional[Dict]:
+    for match in _OPEN_SITE.finditer(query_lower):
+        url = SITES.get(match.group(1))
+        if url:
+            return {"site": match.group(1), "url": url}
+    return None
+
+
+def _resolve_weather(query: str, query_lower: str) -> Optional[Dict]:
+    # Cities after "weather", e.g. "weather in London and Paris" (default: London)
+    match = _WEATHER.search(query)
+    cities = [c.strip(" ?.!") for c in re.split(r",|\band\b", match.group(1))] if match else []
+    return {"cities": [c for c in cities if c] or ["London"]}
+
+
+def _resolve_math_question(query: str, query_lower: str) -> Optional[Dict]:
+    return {"expression": query} if _MATH.search(query_lower) else None
+
+
+def _resolve_news(query: str, query_lower: str) -> Optional[Dict]:
+    words = query.split()
+    for i, word in enumerate(words):
+        if word.lower() == "news" and i + 1 < len(words):
+            return {"topic": words[i + 1]}
+    return {"topic": "technology"}
+
+
+def _resolve_save_note(query: str, query_lower: str) -> Optional[Dict]:
+    if "save note" in query_lower:
+        return {"content": query.replace("save note", "").strip()}
+    return {"content": query.replace("remember", "").strip()}
+
+
+def _resolve_search_notes(query: str, query_lower: str) -> Optional[Dict]:
+    match = _NOTES_QUERY.search(query)
+    return {"keywords": match.group(1).strip(" ?.!")} if match and match.group(1).strip(" ?.!") else None
+
+
+def _resolve_delete_note(query: str, query_lower: str) -> Optional[Dict]:
+    match = _NOTE_ID.search(query_lower)
+    return {"note_id": int(match.group(1))} if match else None
+
+
+BUILTIN_INTENTS = [
+    Intent("website", ["open"], _resolve_site, priority=10),
+    Intent("time", ["the time", "what time"], priority=20),
+    Intent("date", ["the date", "what date"], priority=30),
+    Intent("weather", ["weather"], _resolve_weather, priority=40),
+    Intent("calculator", ["calculate"], lambda query, query_lower: {"expression": query}, priority=50),
+    Intent("calculator", ["what is"], _resolve_math_question, priority=50),
+    Intent("news", ["news"], _resolve_news, priority=60),
+    Intent("save_note", ["save note", "remember"], _resolve_save_note, priority=70),
+    Intent("search_notes", ["search notes", "search note", "find notes", "find note"], _resolve_search_notes, priority=75),
+    Intent("delete_note", ["delete note", "remove note"], _resolve_delete_note, priority=76),
+    Intent("read_notes", ["read notes", "show notes"], priority=80),
+    Intent("ai_completion", ["using artificial intelligence"], lambda query, query_lower: {"prompt": query}, priority=90),
+]
+
+_index: Optional[IntentIndex] = None
+
+
+def get_intent_index() -> IntentIndex:
+    """The process-wide index, built once"""
+    global _index
+    if _index is None:
+        index = IntentIndex()
+        for intent in BUILTIN_INTENTS:
+            index.add(intent)
+        sites_file = os.getenv("NOVA_SITES_FILE")
+        if sites_file and os.path.exists(sites_file):
+            with open(sites_file, encoding="utf-8") as f:
+                register_sites(json.load(f))
+        _index = index
+    return _index
+
+
+def match_intent(query: str) -> Optional[Tuple[str, Dict]]:
+    """(intent name, slots) for a query, or None for free-form chat"""
+    found = get_intent_index().match(query)
+    return (found[0].name, found[1]) if found else None
+
+
+def register_site(name: str, url: str) -> None:
+    """Add an "open <name>" shortcut (a dictionary entry: no per-query cost)"""
+    SITES[name.lower()] = url
+
+
+def register_sites(sites: Dict[str, str]) -> None:
+    for name, url in sites.items():
+        register_site(name, url)
+
+
+def register_command(name: str, triggers: List[str], handler: Callable[[str, Dict], str],
+                     resolve: Optional[Resolver] = None, priority: int = 100) -> None:
+    """Add a custom command: handler(query, slots) returns the reply; runs before free-form chat"""
+    get_intent_index().register(Intent(name, triggers, resolve, priority, handler))
@@ -0,0 +1,175 @@
+"""
+Continuous Listener
+Always-on capture for the voice CLI. A capture thread copies audio frames into a fixed-size NumPy ring buffer
+and never waits on anything downstream. A segmenter thread reads the ring and cuts utterances with the stt
+endpointer. Each utterance goes to a pool of recognition workers. Speech keeps being captured while earlier
+utterances are recognized or answered, and transcripts come out in the order they were spoken. Any frame
+iterator can be the source, so recorded WAV files (stt.wav_frames) replay through the same pipeline as the microphone.
+"""
+import concurrent.futures
+import contextlib
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+from stt import (FRAME_MS, PREROLL_MS, SAMPLE_RATE, Endpointer, NoiseCalibration, SpeechBackend, Transcript,
+                 get_backend, get_calibration)
+
+BUFFER_SECONDS = float(os.getenv("NOVA_LISTEN_BUFFER_SECONDS", "30"))            # ring capacity
+WORKERS = int(os.getenv("NOVA_LISTEN_WORKERS", "2"))                              # concurrent recognitions
+MAX_UTTERANCE_SECONDS = float(os.getenv("NOVA_LISTEN_MAX_UTTERANCE_SECONDS", "15"))
+
+
+class FrameRing:
+    """Fixed-capacity ring of equal-sized int16 frames, addressed by a monotonically increasing sequence number"""
+
+    def __init__(self, capacity: int, frame_samples: int):
+        self.frames = np.zeros((capacity, frame_samples), dtype=np.int16)
+        self.capacity = capacity
+        self.written = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def push(self, frame: bytes) -> None:
+        samples = np.frombuffer(frame, dtype=np.int16)[:self.frames.shape[1]]
+        with self._cond:
+            slot = self.frames[self.written % self.capacity]
+            slot[:len(samples)] = samples
+            slot[len(samples):] = 0
+            self.written += 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def read(self, seq: int, timeout: Optional[float] = None):
+        """(frame copy, seq it came from); skips ahead if seq was overwritten. (None, seq) once closed and drained"""
+        with self._cond:
+            while self.written <= seq and not self.closed:
+                if not self._cond.wait(timeout):
+                    return None, seq
+            if self.written <= seq:
+                return None, seq
+            seq = max(seq, self.written - self.capacity)
+            return self.frames[seq % self.capacity].copy(), seq
+
+
+class ContinuousListener:
+    """Capture thread -> FrameRing -> segmenter thread -> recognition pool -> transcripts() in spoken order"""
+
+    def __init__(self, frames: Iterable[bytes], backend: Optional[SpeechBackend] = None,
+                 calibration: Optional[NoiseCalibration] = None, sample_rate: int = SAMPLE_RATE,
+                 frame_ms: int = FRAME_MS, workers: int = WORKERS, buffer_seconds: float = BUFFER_SECONDS,
+                 language: str = "en-in"):
+        self.source = frames
+        self.backend = backend or get_backend()
+        if self.backend is None:
+            raise RuntimeError("no speech recognizer available (install vosk with a model, or pocketsphinx)")
+        self.calibration = calibration or get_calibration()
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.language = language
+        self.ring = FrameRing(max(1, int(buffer_seconds * 1000 / frame_ms)), sample_rate * frame_ms // 1000)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="listener-stt")
+        self._results: "queue.Queue" = queue.Queue()  # futures in spoken order; None when the source is done
+        self._stopped = threading.Event()
+        self._muted = threading.Event()
+        self.stats = {"frames": 0, "muted": 0, "dropped": 0, "utterances": 0, "errors": 0}
+
+    def start(self) -> "ContinuousListener":
+        for target, name in ((self._capture, "listener-capture"), (self._segment, "listener-segmenter")):
+            threading.Thread(target=target, name=name, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop capturing; utterances already cut are still recognized and delivered"""
+        self._stopped.set()
+        self.ring.close()
+
+    @contextlib.contextmanager
+    def muted(self):
+        """Discard audio captured inside the block (e.g. while the assistant's own reply is playing)"""
+        self._muted.set()
+        try:
+            yield
+        finally:
+            self._muted.clear()
+
+    def _capture(self) -> None:
+        try:
+            for frame in self.source:
+                if self._stopped.is_set():
+                    break
+                if self._muted.is_set():
+                    self.stats["muted"] += 1
+                    continue
+                self.ring.push(frame)
+                self.stats["frames"] += 1
+        finally:
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                close()
+            self.ring.close()
+
+    def _segment(self) -> None:
+        endpointer = Endpointer(self.calibration, self.frame_ms)
+        preroll: "deque[np.ndarray]" = deque(maxlen=max(1, PREROLL_MS // self.frame_ms))
+        utterance = None
+        max_frames = int(MAX_UTTERANCE_SECONDS * 1000 / self.frame_ms)
+        seq = 0
+        while True:
+            frame, read_seq = self.ring.read(seq)
+            if frame is None:
+                break
+            self.stats["dropped"] += read_seq - seq
+            seq = read_seq + 1
+            state = endpointer.push(frame)
+            if utterance is None:
+                preroll.append(frame)
+                if state == "start":
+                    utterance = list(preroll)
+                    preroll.clear()
+                continue
+            utterance.append(frame)
+            if state == "end" or len(utterance) >= max_frames:
+                self._submit(utterance)
+                utterance = None
+                if state != "end":
+                    endpointer = Endpointer(self.calibration, self.frame_ms)
+        if utterance:
+            self._submit(utterance)
+        self._results.put(None)
+
+    def _submit(self, frames) -> None:
+        self.stats["utterances"] += 1
+        pcm = np.concatenate(frames).tobytes()
+        self._results.put(self._pool.submit(self._recognize, pcm, time.perf_counter()))
+
+    def _recognize(self, pcm: bytes, ended: float) -> Transcript:
+        text = self.backend.transcribe(pcm, self.sample_rate, self.language)
+        return Transcript(text.strip(), time.perf_counter() - ended, len(pcm) / 2 / self.sample_rate,
+                          self.backend.name)
+
+    def transcripts(self) -> Iterator[Transcript]:
+        """Recognized utterances in spoken order (blocks for the next one); ends when the source is exhausted"""
+        while True:
+            future = self._results.get()
+            if future is None:
+                self._pool.shutdown(wait=False)
+                return
+            try:
+                yield future.result()
+            except Exception:
+                self.stats["errors"] += 1
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats["pending"] = self._results.qsize()
+        return stats
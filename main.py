@@ -1,118 +1,61 @@
-import speech_recognition as sr
 import os
-import webbrowser
-import openai
-from config import apikey
-import datetime
-import random
-import numpy as np
+import sys
+from engine import Session, default_options, process_command
+from listener import ContinuousListener
+from stt import microphone_frames, wav_frames
+from tts import speak
 
 
-chatStr = ""
-# https://youtu.be/Z3ZAJoi4x6Q
-def chat(query):
-    global chatStr
-    print(chatStr)
-    openai.api_key = apikey
-    chatStr += f"Harry: {query}\n Jarvis: "
-    response = openai.Completion.create(
-        model="text-davinci-003",
-        prompt= chatStr,
-        temperature=0.7,
-        max_tokens=256,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0
-    )
-    # todo: Wrap this inside of a  try catch block
-    say(response["choices"][0]["text"])
-    chatStr += f"{response['choices'][0]['text']}\n"
-    return response["choices"][0]["text"]
+# One bounded conversation for the whole run (NOVA_CLI_SESSION resumes an earlier one)
+session = Session(os.getenv("NOVA_CLI_SESSION") or None)
+options = default_options()
 
-
-def ai(prompt):
-    openai.api_key = apikey
-    text = f"OpenAI response for Prompt: {prompt} \n *************************\n\n"
-
-    response = openai.Completion.create(
-        model="text-davinci-003",
-        prompt=prompt,
-        temperature=0.7,
-        max_tokens=256,
-        top_p=1,
-        frequency_penalty=0,
-        presence_penalty=0
-    )
-    # todo: Wrap this inside of a  try catch block
-    # print(response["choices"][0]["text"])
-    text += response["choices"][0]["text"]
-    if not os.path.exists("Openai"):
-        os.mkdir("Openai")
-
-    # with open(f"Openai/prompt- {random.randint(1, 2343434356)}", "w") as f:
-    with open(f"Openai/{''.join(prompt.split('intelligence')[1:]).strip() }.txt", "w") as f:
-        f.write(text)
+listener = None
 
 def say(text):
-    os.system(f'say "{text}"')
-
-def takeCommand():
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        # r.pause_threshold =  0.6
-        audio = r.listen(source)
-        try:
-            print("Recognizing...")
-            query = r.recognize_google(audio, language="en-in")
-            print(f"User said: {query}")
-            return query
-        except Exception as e:
-            return "Some Error Occurred. Sorry from Jarvis"
+    if listener is None:
+        speak(text)
+        return
+    # Don't transcribe our own voice
+    with listener.muted():
+        speak(text)
+
+def listen_continuously(audio_path=None):
+    """Transcripts of everything said, captured in the background so nothing is missed while Jarvis is busy;
+    audio_path replays a recorded WAV file instead of the microphone"""
+    global listener
+    frames = wav_frames(audio_path, realtime=True) if audio_path else microphone_frames()
+    listener = ContinuousListener(frames).start()
+    for transcript in listener.transcripts():
+        if transcript.text:
+            print(f"User said: {transcript.text}")
+            yield transcript.text
 
 if __name__ == '__main__':
     print('Welcome to Jarvis A.I')
     say("Jarvis A.I")
-    while True:
-        print("Listening...")
-        query = takeCommand()
-        # todo: Add more sites
-        sites = [["youtube", "https://www.youtube.com"], ["wikipedia", "https://www.wikipedia.com"], ["google", "https://www.google.com"],]
-        for site in sites:
-            if f"Open {site[0]}".lower() in query.lower():
-                say(f"Opening {site[0]} sir...")
-                webbrowser.open(site[1])
+    print("Listening...")
+    for query in listen_continuously(sys.argv[1] if len(sys.argv) > 1 else None):
         # todo: Add a feature to play a specific song
         if "open music" in query:
             musicPath = "/Users/harry/Downloads/downfall-21371.mp3"
             os.system(f"open {musicPath}")
 
-        elif "the time" in query:
-            musicPath = "/Users/harry/Downloads/downfall-21371.mp3"
-            hour = datetime.datetime.now().strftime("%H")
-            min = datetime.datetime.now().strftime("%M")
-            say(f"Sir time is {hour} bajke {min} minutes")
-
         elif "open facetime".lower() in query.lower():
             os.system(f"open /System/Applications/FaceTime.app")
 
         elif "open pass".lower() in query.lower():
             os.system(f"open /Applications/Passky.app")
 
-        elif "Using artificial intelligence".lower() in query.lower():
-            ai(prompt=query)
-
         elif "Jarvis Quit".lower() in query.lower():
             exit()
 
         elif "reset chat".lower() in query.lower():
-            chatStr = ""
+            session.clear()
 
         else:
-            print("Chatting...")
-            chat(query)
-
-
-
-
-
-        # say(query)
\ No newline at end of file
+            # Sites, time, weather, notes, "using artificial intelligence" and chat: same engine as the app
+            response, command_type = process_command(session, query, **options)
+            session.record_turn(query, response, command_type)
+            print(f"Jarvis: {response}")
+            say(response)
@@ -0,0 +1,141 @@
+"""
+Provider Latency Metrics
+Process-wide latency samples (total latency, time-to-first-token) and request outcomes per provider and model
+"""
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+SAMPLE_WINDOW = 200  # samples kept per (metric, provider, model)
+EWMA_ALPHA = 0.2     # weight of the newest sample in exponentially weighted averages
+
+
+class LatencyStats:
+    """Rolling window of latency samples in seconds"""
+
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.last = 0.0
+        self.ewma = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.ewma = seconds if self.count == 0 else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.ewma
+        self.count += 1
+        self.last = seconds
+
+    def mean(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "last": self.last,
+            "mean": self.mean(),
+            "ewma": self.ewma,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+_stats: Dict[Tuple[str, str, str], LatencyStats] = {}
+_lock = threading.Lock()
+
+
+def record_latency(metric: str, provider: str, model: Optional[str], seconds: float) -> None:
+    """Record a sample, e.g. record_latency("ttft", "groq", "llama-3.1-8b-instant", 0.21)"""
+    key = (metric, provider, model or "default")
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = LatencyStats()
+        stats.record(seconds)
+
+
+def get_latency(metric: str, provider: str, model: Optional[str] = None) -> Optional[LatencyStats]:
+    """Stats for one provider/model, or merged across the provider's models when model is None"""
+    with _lock:
+        if model is not None:
+            return _stats.get((metric, provider, model))
+        merged = None
+        for (m, p, _), stats in _stats.items():
+            if m == metric and p == provider:
+                if merged is None:
+                    merged = LatencyStats()
+                for sample in stats.samples:
+                    merged.samples.append(sample)
+                merged.ewma = (merged.ewma * merged.count + stats.ewma * stats.count) / max(1, merged.count + stats.count)
+                merged.count += stats.count
+                merged.last = stats.last
+        return merged
+
+
+class OutcomeStats:
+    """Success/failure counts plus an exponentially weighted error rate"""
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.error_rate = 0.0
+
+    def record(self, success: bool) -> None:
+        self.error_rate = EWMA_ALPHA * (0.0 if success else 1.0) + (1 - EWMA_ALPHA) * self.error_rate
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+
+
+_outcomes: Dict[Tuple[str, str], OutcomeStats] = {}
+
+
+def record_outcome(provider: str, model: Optional[str], success: bool) -> None:
+    """Record whether a request to provider/model succeeded"""
+    key = (provider, model or "default")
+    with _lock:
+        stats = _outcomes.get(key)
+        if stats is None:
+            stats = _outcomes[key] = OutcomeStats()
+        stats.record(success)
+
+
+def get_outcomes(provider: str) -> OutcomeStats:
+    """Outcome stats merged across the provider's models (error rate weighted by request count)"""
+    merged = OutcomeStats()
+    weighted = 0.0
+    with _lock:
+        for (p, _), stats in _outcomes.items():
+            if p == provider:
+                merged.successes += stats.successes
+                merged.failures += stats.failures
+                weighted += stats.error_rate * (stats.successes + stats.failures)
+    total = merged.successes + merged.failures
+    merged.error_rate = weighted / total if total else 0.0
+    return merged
+
+
+def latency_report(metric: str) -> List[Dict]:
+    """Rows of {provider, model, count, last, mean, p50, p95} for one metric"""
+    with _lock:
+        items = [(k, v) for k, v in _stats.items() if k[0] == metric]
+    rows = []
+    for (_, provider, model), stats in sorted(items):
+        row = {"provider": provider, "model": model}
+        row.update(stats.summary())
+        rows.append(row)
+    return rows
+
+
+def reset_metrics() -> None:
+    """Drop all samples"""
+    with _lock:
+        _stats.clear()
+        _outcomes.clear()
@@ -0,0 +1,196 @@
+"""
+Notes Store
+SQLite-backed notes with an FTS5 keyword index: appends are a single insert, "latest N" reads page by id
+(index seek, independent of how many notes exist), and notes can be searched and deleted by id.
+Replaces the append-only Notes/notes.txt, which is imported once on first use.
+
+Usage: python notes_store.py import [path] [--force]   (import a notes.txt written in the old "[timestamp]" format;
+       each file is imported once, --force imports it again)
+"""
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+NOTES_DB = os.getenv("NOVA_NOTES_DB", os.path.join("Notes", "notes.sqlite3"))
+LEGACY_NOTES = os.path.join("Notes", "notes.txt")
+NOTES_PAGE_SIZE = int(os.getenv("NOVA_NOTES_PAGE_SIZE", "10"))  # notes shown per "read notes"
+
+# "[2024-01-31 18:02:11]" on a line of its own starts a note in the old text format
+_HEADER = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]\s*$", re.MULTILINE)
+_WORD = re.compile(r"\w+")
+
+
+def parse_legacy_notes(text: str) -> List[Tuple[str, str]]:
+    """(timestamp, content) pairs from the old notes.txt format, oldest first"""
+    headers = list(_HEADER.finditer(text))
+    notes = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        content = text[header.end():end].strip()
+        if content:
+            notes.append((header.group(1), content))
+    return notes
+
+
+def _fts_query(keywords: str) -> str:
+    """Each word as a quoted FTS5 term (all must match), so user input never parses as query syntax"""
+    return " ".join(f'"{word}"' for word in _WORD.findall(keywords))
+
+
+class NotesStore:
+    """Notes table plus an external-content FTS5 index kept in sync by triggers"""
+
+    def __init__(self, db_path: str = NOTES_DB):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS notes (id INTEGER PRIMARY KEY, created TEXT NOT NULL, content TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS imports (path TEXT PRIMARY KEY, notes INTEGER, imported TEXT);"
+        )
+        try:
+            self._db.executescript(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(content, content='notes', content_rowid='id');"
+                "CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN "
+                "INSERT INTO notes_fts(rowid, content) VALUES (new.id, new.content); END;"
+                "CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN "
+                "INSERT INTO notes_fts(notes_fts, rowid, content) VALUES ('delete', old.id, old.content); END;"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False  # SQLite built without FTS5: search falls back to LIKE
+        self._db.commit()
+
+    def add(self, content: str, created: Optional[str] = None) -> int:
+        """Append a note; returns its id"""
+        created = created or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            cursor = self._db.execute("INSERT INTO notes (created, content) VALUES (?, ?)", (created, content))
+            self._db.commit()
+        return cursor.lastrowid
+
+    def latest(self, limit: int = NOTES_PAGE_SIZE, before_id: Optional[int] = None) -> List[Dict]:
+        """Newest notes first; pass the last id of a page as before_id for the next (older) page"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created, content FROM notes WHERE id < ? ORDER BY id DESC LIMIT ?",
+                (before_id if before_id is not None else sys.maxsize, limit),
+            ).fetchall()
+        return [{"id": row[0], "created": row[1], "content": row[2]} for row in rows]
+
+    def after(self, note_id: int, limit: int = NOTES_PAGE_SIZE) -> List[Dict]:
+        """Notes with ids above note_id, oldest first (for incremental consumers such as the retrieval index)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, created, content FROM notes WHERE id > ? ORDER BY id LIMIT ?", (note_id, limit)
+            ).fetchall()
+        return [{"id": row[0], "created": row[1], "content": row[2]} for row in rows]
+
+    def exists(self, note_id: int) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM notes WHERE id = ?", (note_id,)).fetchone() is not None
+
+    def search(self, keywords: str, limit: int = NOTES_PAGE_SIZE) -> List[Dict]:
+        """Notes containing every keyword, best match first"""
+        query = _fts_query(keywords)
+        if not query:
+            return []
+        with self._lock:
+            if self.fts:
+                rows = self._db.execute(
+                    "SELECT notes.id, notes.created, notes.content FROM notes_fts "
+                    "JOIN notes ON notes.id = notes_fts.rowid WHERE notes_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            else:
+                words = _WORD.findall(keywords)
+                rows = self._db.execute(
+                    "SELECT id, created, content FROM notes WHERE "
+                    + " AND ".join("content LIKE ?" for _ in words) + " ORDER BY id DESC LIMIT ?",
+                    [f"%{word}%" for word in words] + [limit],
+                ).fetchall()
+        return [{"id": row[0], "created": row[1], "content": row[2]} for row in rows]
+
+    def delete(self, note_id: int) -> bool:
+        """Remove a note; False if no note has that id"""
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def import_legacy(self, path: str = LEGACY_NOTES, force: bool = False) -> int:
+        """Copy notes from an old-format text file (once per path unless forced); returns the number imported"""
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return 0
+        with self._lock:
+            done = self._db.execute("SELECT 1 FROM imports WHERE path = ?", (path,)).fetchone()
+        if done and not force:
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            notes = parse_legacy_notes(f.read())
+        with self._lock:
+            self._db.executemany("INSERT INTO notes (created, content) VALUES (?, ?)", notes)
+            self._db.execute(
+                "INSERT OR REPLACE INTO imports VALUES (?, ?, ?)",
+                (path, len(notes), datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            self._db.commit()
+        return len(notes)
+
+
+_store: Optional[NotesStore] = None
+_store_lock = threading.Lock()
+
+
+def get_notes_store() -> NotesStore:
+    """Process-wide store (NOVA_NOTES_DB); imports Notes/notes.txt the first time it is opened"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = NotesStore()
+                store.import_legacy()
+                _store = store
+    return _store
+
+
+def format_notes(notes: List[Dict]) -> str:
+    """Notes as text, one "[#id] [timestamp]" header per note"""
+    return "\n\n".join(f"[#{note['id']}] [{note['created']}]\n{note['content']}" for note in notes)
+
+
+def main():
+    args = sys.argv[1:]
+    force = "--force" in args
+    args = [arg for arg in args if arg != "--force"]
+    if not args or args[0] != "import":
+        print(__doc__.strip().split("Usage: ")[-1])
+        return 1
+    path = args[1] if len(args) > 1 else LEGACY_NOTES
+    if not os.path.exists(path):
+        print(f"Error: {path} not found")
+        return 1
+    store = NotesStore()
+    imported = store.import_legacy(path, force=force)
+    if not imported and not force:
+        print(f"{path} was already imported (use --force to import it again)")
+    else:
+        print(f"Imported {imported} notes into {NOTES_DB} ({store.count()} total)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
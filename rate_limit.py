@@ -0,0 +1,287 @@
+"""
+Client-side Rate Limiter
+Token buckets per (provider, API key) for requests and tokens per minute; callers queue up to a maximum wait
+and the buckets are recalibrated from Retry-After / rate-limit response headers
+"""
+import asyncio
+import email.utils
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from context import prompt_tokens
+
+# (requests per minute, tokens per minute) on each provider's free tier; None means no client-side limit.
+# Override with NOVA_RATE_LIMIT_<PROVIDER>="rpm,tpm", e.g. NOVA_RATE_LIMIT_GROQ="30,6000" (0 disables a budget)
+RATE_LIMITS: Dict[str, Tuple[Optional[float], Optional[float]]] = {
+    "groq": (30, 6000),
+    "together": (60, None),
+    "google": (15, 1000000),
+    "huggingface": (60, None),
+    "anthropic": (50, 40000),
+    "openai": (500, 60000),
+}
+MAX_WAIT = float(os.getenv("NOVA_RATE_LIMIT_MAX_WAIT", "10"))   # longest a request may queue, in seconds
+RATE_LIMIT_RETRIES = 1        # retries after a 429, once the limiter's wait has passed
+COMPLETION_ESTIMATE = 200     # tokens reserved for the reply until response headers say otherwise
+DEFAULT_RETRY_AFTER = 5.0     # back-off when a 429 carries no usable header
+
+
+def _configured_limits(provider: str) -> Tuple[Optional[float], Optional[float]]:
+    value = os.getenv(f"NOVA_RATE_LIMIT_{provider.upper()}")
+    if not value:
+        return RATE_LIMITS.get(provider, (None, None))
+    parts = [p.strip() for p in value.split(",")] + ["", ""]
+    rpm, tpm = (float(p) if p and float(p) > 0 else None for p in parts[:2])
+    return rpm, tpm
+
+
+class TokenBucket:
+    """Refills at capacity per minute; reservations may drive the level negative, which queues later callers"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.refill)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining: float) -> None:
+        """The server reports fewer units left than we think: trust it"""
+        self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """Request and token budgets for one (provider, API key)"""
+
+    def __init__(self, provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.blocked_until = 0.0   # monotonic time before which nothing is sent (Retry-After)
+        self.stats = {"acquired": 0, "queued": 0, "rejected": 0, "rate_limited": 0, "waited": 0.0}
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 0, max_wait: float = MAX_WAIT) -> Optional[float]:
+        """Claim budget for one request; returns seconds to wait before sending, or None if over max_wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.requests is not None:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if wait > max_wait:
+                self.stats["rejected"] += 1
+                return None
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None and tokens:
+                self.tokens.take(tokens)
+            self.stats["acquired"] += 1
+            if wait > 0:
+                self.stats["queued"] += 1
+                self.stats["waited"] += wait
+            return wait
+
+    def acquire(self, tokens: float = 0, max_wait: float = MAX_WAIT) -> bool:
+        """Block until the request may be sent; False (without waiting) if the queue is longer than max_wait"""
+        wait = self.reserve(tokens, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, tokens: float = 0, max_wait: float = MAX_WAIT) -> bool:
+        """Async twin of acquire"""
+        wait = self.reserve(tokens, max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def block_for(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            if self.requests is not None:
+                self.requests.sync(0)
+
+    def update_from_headers(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """Recalibrate from Retry-After and OpenAI/Groq, Anthropic or Together style rate-limit headers"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        if status == 429:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            retry_after = _retry_after(headers)
+            self.block_for(retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining, reset = _remaining_and_reset(headers, kind)
+            if remaining is None:
+                continue
+            if remaining <= 0 and reset:
+                self.block_for(reset)
+            elif bucket is not None:
+                with self._lock:
+                    bucket.sync(remaining)
+
+    def note_rate_limited(self, message: str) -> None:
+        """A 429 seen only as an error message (e.g. Gemini's gRPC client): back off by its hinted delay"""
+        match = re.search(r"retry(?:_delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*s", message, re.IGNORECASE)
+        with self._lock:
+            self.stats["rate_limited"] += 1
+        self.block_for(float(match.group(1)) if match else DEFAULT_RETRY_AFTER)
+
+    def rejection_message(self) -> str:
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        hint = f" for about {wait:.0f}s" if wait >= 1 else ""
+        return (f"Error: {self.provider} rate limit reached{hint}; the request queue is longer than "
+                f"{MAX_WAIT:.0f}s. Please wait a moment or use a different provider.")
+
+    def report(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            row = {"provider": self.provider}
+            for name, bucket in (("requests_left", self.requests), ("tokens_left", self.tokens)):
+                if bucket is not None:
+                    bucket._refill(now)
+                row[name] = round(bucket.level, 1) if bucket is not None else None
+            row["blocked_for"] = round(max(0.0, self.blocked_until - now), 1)
+            row.update(self.stats)
+            row["waited"] = round(row["waited"], 2)
+            return row
+
+
+def _parse_seconds(value: str) -> Optional[float]:
+    """Durations like "12", "7.66s", "120ms", "2m59.56s", or an RFC 3339 / HTTP date"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, when - time.time())
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        return _parse_seconds(headers["retry-after"])
+    return None
+
+
+def _remaining_and_reset(headers: Dict[str, str], kind: str) -> Tuple[Optional[float], Optional[float]]:
+    names = [
+        (f"x-ratelimit-remaining-{kind}", f"x-ratelimit-reset-{kind}"),                  # OpenAI, Groq
+        (f"anthropic-ratelimit-{kind}-remaining", f"anthropic-ratelimit-{kind}-reset"),  # Anthropic
+    ]
+    if kind == "requests":
+        names.append(("x-ratelimit-remaining", "x-ratelimit-reset"))                      # Together
+    for remaining_name, reset_name in names:
+        if remaining_name in headers:
+            try:
+                remaining = float(headers[remaining_name])
+            except ValueError:
+                continue
+            reset = _parse_seconds(headers[reset_name]) if reset_name in headers else None
+            return remaining, reset
+    return None, None
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_by_key: Dict[str, RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def _key_id(api_key: Optional[str]) -> str:
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+def get_rate_limiter(provider: str, api_key: Optional[str] = None) -> RateLimiter:
+    """The process-wide limiter for (provider, API key)"""
+    key = (provider, _key_id(api_key))
+    limiter = _limiters.get(key)
+    if limiter is not None:
+        return limiter
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(provider, *_configured_limits(provider))
+            if api_key:
+                _by_key[key[1]] = limiter
+        return limiter
+
+
+def estimate_request_tokens(messages: List[Dict]) -> int:
+    """Tokens a chat request is expected to use: the prompt plus a typical reply"""
+    return prompt_tokens(messages) + COMPLETION_ESTIMATE
+
+
+def is_rate_limited(response: str) -> bool:
+    """True if a chat function's error string reports HTTP 429 / quota exhaustion"""
+    if not response.startswith("Error"):
+        return False
+    msg = response.lower()
+    return ("429" in msg or "rate limit" in msg or "too many requests" in msg
+            or "resource exhausted" in msg or "resource_exhausted" in msg)
+
+
+def _api_key_from_headers(headers: Mapping[str, str]) -> Optional[str]:
+    auth = headers.get("authorization") or ""
+    if auth.lower().startswith("bearer "):
+        return auth[7:].strip()
+    return headers.get("x-api-key")
+
+
+def observe_response(request_headers: Mapping[str, str], response_headers: Mapping[str, str], status: int) -> None:
+    """Feed a provider HTTP response to the limiter that owns its API key (installed as an HTTP client hook)"""
+    api_key = _api_key_from_headers(request_headers)
+    if not api_key:
+        return
+    limiter = _by_key.get(_key_id(api_key))
+    if limiter is not None:
+        limiter.update_from_headers(response_headers, status)
+
+
+def limiter_report() -> List[Dict]:
+    """One row per limiter for the sidebar"""
+    with _lock:
+        limiters = list(_limiters.values())
+    return [limiter.report() for limiter in limiters]
+
+
+def reset_rate_limiters() -> None:
+    """Drop all limiters (tests and benchmarks)"""
+    with _lock:
+        _limiters.clear()
+        _by_key.clear()
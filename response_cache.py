@@ -0,0 +1,166 @@
+"""
+Response Cache
+Caches deterministic chat responses: in-memory LRU tier plus an optional SQLite tier, both with TTLs
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+CACHE_SIZE = int(os.getenv("NOVA_CACHE_SIZE", "512"))         # in-memory entries
+CACHE_TTL = float(os.getenv("NOVA_CACHE_TTL", "86400"))       # seconds
+CACHE_DB = os.getenv("NOVA_CACHE_DB", "")                     # e.g. .cache/responses.sqlite3; empty = memory only
+# Cache responses sampled with temperature > 0 as well (they are not reproducible, so off by default)
+CACHE_NONDETERMINISTIC = os.getenv("NOVA_CACHE_NONDETERMINISTIC", "0").lower() in ("1", "true", "yes")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def normalize_messages(messages: List[Dict]) -> List[Dict]:
+    """Messages reduced to role + whitespace-normalized content"""
+    return [
+        {"role": str(m.get("role", "user")).lower(), "content": " ".join(str(m.get("content", "")).split())}
+        for m in messages
+    ]
+
+
+def cache_key(provider: str, model: Optional[str], messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """Stable key for (provider, model, normalized messages, temperature, max_tokens)"""
+    payload = json.dumps({
+        "provider": provider,
+        "model": model or "default",
+        "messages": normalize_messages(messages),
+        "temperature": round(float(temperature), 3),
+        "max_tokens": max_tokens,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier TTL cache: LRU dict in memory, optional SQLite table on disk"""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL, db_path: str = CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, expires, latency, tokens)
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {
+            "hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0,
+            "saved_seconds": 0.0, "saved_tokens": 0,
+        }
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT, expires REAL, latency REAL, tokens INTEGER)"
+            )
+            self._db.commit()
+
+    def cacheable(self, temperature: float, allow_nondeterministic: bool = False) -> bool:
+        """Only deterministic requests are cached unless the caller opts in"""
+        if temperature <= 0 or allow_nondeterministic or CACHE_NONDETERMINISTIC:
+            return True
+        with self._lock:
+            self.stats["bypassed"] += 1
+        return False
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] < now:
+                del self._memory[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, expires, latency, tokens FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] >= now:
+                    entry = tuple(row)
+                    self._remember(key, entry)
+                    self.stats["disk_hits"] += 1
+                elif row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._memory.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["saved_seconds"] += entry[2]
+            self.stats["saved_tokens"] += entry[3]
+            return entry[0]
+
+    def put(self, key: str, response: str, latency: float = 0.0, prompt_tokens: int = 0) -> None:
+        """Store a successful response (error strings are never cached)"""
+        if not response or response.startswith("Error"):
+            return
+        entry = (response, time.time() + self.ttl, latency, prompt_tokens + _estimate_tokens(response))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)", (key,) + entry)
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache (configured from NOVA_CACHE_* environment variables)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def lookup(provider: str, model: Optional[str], messages: List[Dict], temperature: float,
+           max_tokens: int = 1000, allow_nondeterministic: bool = False) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (key, cached_response); key is None when the request must bypass the cache"""
+    cache = get_response_cache()
+    if not cache.cacheable(temperature, allow_nondeterministic):
+        return None, None
+    key = cache_key(provider, model, messages, temperature, max_tokens)
+    return key, cache.get(key)
+
+
+def store(key: Optional[str], response: str, latency: float, messages: List[Dict]) -> None:
+    """Store a response under a key returned by lookup (no-op for bypassed requests)"""
+    if key is not None:
+        prompt_tokens = sum(_estimate_tokens(str(m.get("content", ""))) for m in messages)
+        get_response_cache().put(key, response, latency, prompt_tokens)
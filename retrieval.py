@@ -0,0 +1,432 @@
+"""
+Retrieval Index
+Offline memory over notes, saved AI responses (Openai/) and chat turns. Text is embedded with signed feature
+hashing (word unigrams + bigrams, no model download) into a NumPy float32 matrix memory-mapped from disk;
+a query is one matrix-vector product over the live rows. Metadata and sync watermarks live in SQLite, and
+sources are re-indexed incrementally: new notes by id, changed files by (mtime, size), chat turns by session and
+message id.
+
+Usage: python retrieval.py "query"   (sync the sources and print the top matches)
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from context import count_tokens
+
+RETRIEVAL_DIR = os.getenv("NOVA_RETRIEVAL_DIR", os.path.join(".cache", "retrieval"))
+DIM = int(os.getenv("NOVA_RETRIEVAL_DIM", "256"))                      # hashed embedding width
+RETRIEVAL_BUDGET = int(os.getenv("NOVA_RETRIEVAL_BUDGET", "400"))      # prompt tokens for retrieved snippets
+TOP_K = int(os.getenv("NOVA_RETRIEVAL_TOP_K", "4"))
+MIN_SCORE = float(os.getenv("NOVA_RETRIEVAL_MIN_SCORE", "0.2"))        # cosine similarity floor
+SYNC_INTERVAL = float(os.getenv("NOVA_RETRIEVAL_SYNC_INTERVAL", "30"))  # seconds between full file rescans
+CHAT_FLUSH_INTERVAL = 0.2                                               # chat turns indexed in batches this often
+RESPONSES_DIR = "Openai"
+CHUNK_WORDS = 120
+INITIAL_CAPACITY = 1024
+SHARED_SCOPE = 0    # notes and saved responses: visible to every session
+UNSCOPED_CHAT = -1  # chat turns indexed before refs carried a session: visible to none
+
+_WORD = re.compile(r"\w+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be but by do does for from has have how i in is it its me my of on or so that the "
+    "this to was what when where which who why will with you your".split()
+)
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping, so "flights" matches "flight" and "booking" matches "booked" """
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def embed(text: str, dim: int = DIM) -> np.ndarray:
+    """Unit-length hashed bag of words and bigrams (sublinear term frequency, signed buckets)"""
+    words = [_stem(w) for w in _WORD.findall(text.lower()) if w not in _STOP_WORDS]
+    vector = np.zeros(dim, dtype=np.float32)
+    features = [(w, 1.0) for w in words] + [(f"{a} {b}", 0.5) for a, b in zip(words, words[1:])]
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def chunk_text(text: str, words: int = CHUNK_WORDS) -> List[str]:
+    """Split long documents into ~`words`-word chunks so each snippet stays small in the prompt"""
+    tokens = text.split()
+    return [" ".join(tokens[i:i + words]) for i in range(0, len(tokens), words)] or [""]
+
+
+class RetrievalIndex:
+    """Memory-mapped embedding matrix (row = chunk) plus a SQLite table of chunk text and source refs"""
+
+    def __init__(self, directory: str = RETRIEVAL_DIR, dim: int = DIM):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.dim = dim
+        self._matrix_path = os.path.join(directory, "vectors.f32")
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        # Derived data (rebuildable from the sources), so commits need not wait for a full fsync
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, ref TEXT NOT NULL, label TEXT, "
+            "text TEXT NOT NULL, live INTEGER NOT NULL DEFAULT 1);"
+            "CREATE INDEX IF NOT EXISTS chunks_ref ON chunks (ref);"
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        if self._meta("dim", str(dim)) != str(dim):
+            self._reset()  # NOVA_RETRIEVAL_DIM changed: old vectors are incompatible
+        self.count = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+        self._vectors = self._open_matrix(max(INITIAL_CAPACITY, self.count))
+        # Per-row session scope (int ids), so a search can mask other sessions' chat turns in one vector op
+        self._scope_ids: Dict[str, int] = {}
+        self._scopes = np.zeros(self._vectors.shape[0], dtype=np.int32)
+        for row, ref in self._db.execute("SELECT row, ref FROM chunks WHERE ref LIKE 'chat:%'"):
+            self._scopes[row] = self._scope_of(ref)
+        self._last_scan = 0.0
+        self._responses_mtime = None
+        self._notes_watermark: Optional[int] = None
+        self._notes_sync = threading.Lock()
+        self._pending_chats: List[Tuple[str, str, str]] = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    def _meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None and default is not None:
+            self._set_meta(key, default)
+            return default
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+        self._db.commit()
+
+    def _scope_of(self, ref: str) -> int:
+        """Scope id of a ref: chat:<session>:<message> gets its session's id; everything else is shared"""
+        if not ref.startswith("chat:"):
+            return SHARED_SCOPE
+        parts = ref.split(":", 2)
+        if len(parts) < 3:
+            return UNSCOPED_CHAT
+        return self._scope_ids.setdefault(parts[1], len(self._scope_ids) + 1)
+
+    def _reset(self) -> None:
+        self._db.executescript("DELETE FROM chunks; DELETE FROM files; DELETE FROM meta;")
+        self._set_meta("dim", str(self.dim))
+        if os.path.exists(self._matrix_path):
+            os.remove(self._matrix_path)
+
+    def _open_matrix(self, rows: int) -> np.memmap:
+        """Map the vector file, growing it to at least `rows` rows (existing rows are kept)"""
+        row_bytes = self.dim * 4
+        existing = os.path.getsize(self._matrix_path) // row_bytes if os.path.exists(self._matrix_path) else 0
+        capacity = max(existing, rows)
+        if capacity > existing:
+            with open(self._matrix_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        return np.memmap(self._matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def add(self, ref: str, text: str, label: str = "") -> int:
+        """Index a document (replacing any earlier version under the same ref); returns the chunk count"""
+        with self._lock:
+            added = self._add(ref, text, label)
+            self._db.commit()
+        return added
+
+    def add_many(self, documents: Iterable[Tuple[str, str, str]]) -> int:
+        """Index (ref, text, label) documents in one transaction; returns the chunk count"""
+        with self._lock:
+            added = sum(self._add(ref, text, label) for ref, text, label in documents)
+            self._db.commit()
+        return added
+
+    def _embed(self, text: str) -> List[Tuple[str, np.ndarray]]:
+        """(chunk, vector) pairs for a document; pure computation, so callers can run it outside the lock"""
+        return [(c, embed(c, self.dim)) for c in chunk_text(text) if c.strip()]
+
+    def _add(self, ref: str, text: str, label: str, embedded: Optional[List[Tuple[str, np.ndarray]]] = None) -> int:
+        chunks = embedded if embedded is not None else self._embed(text)
+        self._forget(ref)
+        if self.count + len(chunks) > self._vectors.shape[0]:
+            self._vectors.flush()
+            self._vectors = self._open_matrix(max(self._vectors.shape[0] * 2, self.count + len(chunks)))
+            scopes = np.zeros(self._vectors.shape[0], dtype=np.int32)
+            scopes[:len(self._scopes)] = self._scopes
+            self._scopes = scopes
+        scope = self._scope_of(ref)
+        for chunk, vector in chunks:
+            self._vectors[self.count] = vector
+            self._scopes[self.count] = scope
+            self._db.execute("INSERT INTO chunks (row, ref, label, text) VALUES (?, ?, ?, ?)",
+                             (self.count, ref, label, chunk))
+            self.count += 1
+        return len(chunks)
+
+    def _forget(self, ref: str) -> None:
+        rows = [r[0] for r in self._db.execute("SELECT row FROM chunks WHERE ref = ? AND live = 1", (ref,))]
+        if rows:
+            self._vectors[rows] = 0.0  # dead rows score 0 and fall below MIN_SCORE
+            self._db.execute("UPDATE chunks SET live = 0 WHERE ref = ?", (ref,))
+
+    def remove(self, ref: str) -> None:
+        """Drop a document from results (e.g. a deleted note)"""
+        with self._lock:
+            self._forget(ref)
+            self._db.commit()
+
+    def indexed(self, ref: str) -> bool:
+        with self._lock:
+            return self._indexed(ref)
+
+    def _indexed(self, ref: str) -> bool:
+        return self._db.execute("SELECT 1 FROM chunks WHERE ref = ? AND live = 1 LIMIT 1", (ref,)).fetchone() is not None
+
+    def search(self, query: str, k: int = TOP_K, min_score: float = MIN_SCORE,
+               exclude: Iterable[str] = (), scope: Optional[str] = None) -> List[Dict]:
+        """Best chunk per document for the query: [{"ref", "label", "text", "score"}], best first. With a scope
+        (session id), other sessions' chat turns are left out"""
+        vector = embed(query, self.dim)
+        if not vector.any():
+            return []
+        excluded = set(exclude)
+        # No lock: count is read first and only grows after the arrays have room, and rows below it are never
+        # moved, only zeroed when forgotten
+        count = self.count
+        if not count:
+            return []
+        vectors, scopes = self._vectors, self._scopes
+        scores = vectors[:count] @ vector
+        if scope is not None:
+            allowed = (scopes[:count] == SHARED_SCOPE) | (scopes[:count] == self._scope_ids.get(scope, -2))
+            scores = np.where(allowed, scores, -1.0)
+        # Over-fetch so excluded refs and extra chunks of the same document do not starve the result;
+        # fetch more while rows above min_score remain
+        fetch = min(count, k * 4 + len(excluded))
+        while True:
+            top = np.argpartition(-scores, fetch - 1)[:fetch]
+            top = top[np.argsort(-scores[top])]
+            top = [int(row) for row in top if scores[row] >= min_score]
+            if not top:
+                return []
+            with self._lock:
+                found = {r[0]: r[1:] for r in self._db.execute(
+                    f"SELECT row, ref, label, text FROM chunks WHERE live = 1 AND row IN ({','.join('?' * len(top))})",
+                    top
+                )}
+            results, seen = [], set()
+            for row in top:
+                if row not in found:
+                    continue
+                ref, label, text = found[row]
+                if ref in excluded or ref in seen:
+                    continue
+                seen.add(ref)
+                results.append({"ref": ref, "label": label, "text": text, "score": float(scores[row])})
+                if len(results) == k:
+                    return results
+            if fetch == count or len(top) < fetch:
+                return results
+            fetch = min(count, fetch * 4)
+
+    def sync_notes(self) -> int:
+        """Index notes added since the last sync (by id watermark); returns the number indexed"""
+        from notes_store import get_notes_store
+
+        store = get_notes_store()
+        if not self._notes_sync.acquire(blocking=False):
+            return 0  # another thread is syncing right now
+        try:
+            if self._notes_watermark is None:
+                with self._lock:
+                    self._notes_watermark = int(self._meta("notes_watermark") or 0)
+            added = 0
+            while True:
+                notes = store.after(self._notes_watermark, 500)
+                if not notes:
+                    break
+                self.add_many((f"note:{note['id']}", note["content"], f"Note ({note['created']})") for note in notes)
+                self._notes_watermark = notes[-1]["id"]
+                added += len(notes)
+                with self._lock:
+                    self._set_meta("notes_watermark", str(self._notes_watermark))
+            return added
+        finally:
+            self._notes_sync.release()
+
+    def sync_files(self, directory: str = RESPONSES_DIR, force: bool = False) -> int:
+        """Re-index saved responses whose (mtime, size) changed; a full rescan runs at most every SYNC_INTERVAL
+        seconds unless files were added or removed (the directory's own mtime moves)"""
+        if not os.path.isdir(directory):
+            return 0
+        now = time.time()
+        directory_mtime = os.stat(directory).st_mtime
+        if not force and directory_mtime == self._responses_mtime and now - self._last_scan < SYNC_INTERVAL:
+            return 0
+        self._last_scan, self._responses_mtime = now, directory_mtime
+        with self._lock:
+            known = {r[0]: (r[1], r[2]) for r in self._db.execute("SELECT path, mtime, size FROM files")}
+        seen, changed = set(), 0
+        with self._lock:
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not entry.name.endswith(".txt"):
+                    continue
+                stat = entry.stat()
+                seen.add(entry.path)
+                if known.get(entry.path) == (stat.st_mtime, stat.st_size):
+                    continue
+                with open(entry.path, "r", encoding="utf-8", errors="replace") as f:
+                    self._add(f"file:{entry.path}", f.read(), f"Saved AI response ({entry.name})")
+                self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (entry.path, stat.st_mtime, stat.st_size))
+                changed += 1
+            for path in set(known) - seen:
+                self._forget(f"file:{path}")
+                self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+                changed += 1
+            self._db.commit()
+        return changed
+
+    def add_chat(self, message: Dict, session_id: str = "") -> None:
+        """Index one chat message of a session (keyed by its id, so re-adding is a no-op)"""
+        document = _chat_document(message, session_id)
+        if document and not self.indexed(document[0]):
+            self.add(*document)
+
+    def queue_chats(self, messages: Iterable[Dict], session_id: str = "") -> None:
+        """Index chat messages on a background writer that commits each burst once, off the caller's path"""
+        documents = [d for d in (_chat_document(m, session_id) for m in messages) if d]
+        if not documents:
+            return
+        with self._pending_lock:
+            self._pending_chats.extend(documents)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="retrieval-writer", daemon=True)
+                self._writer.start()
+        self._wake.set()
+
+    def _run_writer(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(CHAT_FLUSH_INTERVAL)  # let the rest of the burst arrive
+            self._wake.clear()
+            try:
+                self.flush_chats()
+            except Exception:
+                pass  # memory indexing is best-effort; the next burst tries again
+
+    def flush_chats(self) -> int:
+        """Index queued chat messages now (one transaction); returns the number indexed"""
+        with self._pending_lock:
+            pending, self._pending_chats = self._pending_chats, []
+        if not pending:
+            return 0
+        embedded = [(ref, text, label, self._embed(text)) for ref, text, label in pending]  # outside the lock
+        with self._lock:
+            fresh = [d for d in embedded if not self._indexed(d[0])]
+            for ref, text, label, chunks in fresh:
+                self._add(ref, text, label, chunks)
+            self._db.commit()
+        return len(fresh)
+
+    def sync(self) -> int:
+        """Bring notes and saved responses up to date; returns the number of documents (re)indexed"""
+        changed = self.sync_notes() + self.sync_files()
+        if changed:
+            with self._lock:
+                self._vectors.flush()
+        return changed
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            live, refs = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT ref) FROM chunks WHERE live = 1").fetchone()
+        return {"chunks": live, "documents": refs, "rows": self.count, "capacity": self._vectors.shape[0], "dim": self.dim}
+
+
+_index: Optional[RetrievalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_retrieval_index() -> RetrievalIndex:
+    """Process-wide index (NOVA_RETRIEVAL_DIR)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RetrievalIndex()
+    return _index
+
+
+def chat_ref(message: Dict, session_id: str = "") -> str:
+    """Index ref of a chat message, namespaced by its session"""
+    from chat_view import message_id
+
+    return f"chat:{session_id}:{message_id(message)}"
+
+
+def _chat_document(message: Dict, session_id: str) -> Optional[Tuple[str, str, str]]:
+    """(ref, text, label) for a chat message, or None if it is not worth indexing"""
+    content = str(message.get("content", ""))
+    if not content or content.startswith("Error"):
+        return None
+    speaker = "User" if message.get("role") == "user" else "Jarvis"
+    return chat_ref(message, session_id), content, f"Earlier, {speaker} said"
+
+
+def memory_context(query: str, budget: int = RETRIEVAL_BUDGET, k: int = TOP_K,
+                   exclude: Iterable[str] = (), session_id: Optional[str] = None) -> str:
+    """Relevant snippets for the prompt, packed best-first within `budget` tokens ("" when nothing matches).
+    With a session_id, only that session's chat turns are candidates (notes and saved responses are shared)"""
+    from notes_store import get_notes_store
+
+    index = get_retrieval_index()
+    index.sync()
+    lines, used = [], 0
+    for hit in index.search(query, k, exclude=exclude, scope=session_id):
+        if hit["ref"].startswith("note:") and not get_notes_store().exists(int(hit["ref"][5:])):
+            index.remove(hit["ref"])  # deleted since it was indexed
+            continue
+        line = f"- {hit['label']}: {hit['text']}"
+        cost = count_tokens(line)
+        if used + cost > budget:
+            continue
+        lines.append(line)
+        used += cost
+    if not lines:
+        return ""
+    return "Possibly relevant notes and past conversations (use only if helpful):\n" + "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip().split("Usage: ")[-1])
+        return 1
+    index = get_retrieval_index()
+    start = time.perf_counter()
+    changed = index.sync()
+    synced = time.perf_counter()
+    hits = index.search(" ".join(sys.argv[1:]), k=TOP_K, min_score=0.0)
+    done = time.perf_counter()
+    print(f"synced {changed} documents in {(synced - start) * 1000:.1f} ms, searched {index.count} chunks in "
+          f"{(done - synced) * 1000:.2f} ms")
+    for hit in hits:
+        print(f"{hit['score']:.3f}  {hit['label']}: {hit['text'][:100]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Provider Router
+Picks the best provider per request from live EWMA latency, time-to-first-token and error rate
+"""
+import os
+import random
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ai_providers import DEFAULT_MODELS, PROVIDERS
+from health import OPEN, get_health_registry
+from metrics import get_latency, get_outcomes
+
+DEFAULT_POLICY = os.getenv("NOVA_ROUTING_POLICY", "fastest")
+PRIOR_LATENCY = 1.0   # seconds assumed for providers without samples, so they still get tried
+ERROR_PENALTY = 4.0   # latency multiplier per unit of error rate
+# Share of requests sent to a random healthy candidate so stale scores get refreshed
+EXPLORE_RATE = float(os.getenv("NOVA_ROUTER_EXPLORE_RATE", "0.05"))
+
+
+def provider_stats(provider: str) -> Dict:
+    """Live routing inputs for one provider"""
+    latency = get_latency("latency", provider)
+    ttft = get_latency("ttft", provider)
+    outcomes = get_outcomes(provider)
+    breaker = get_health_registry().state(provider, DEFAULT_MODELS.get(provider))
+    return {
+        "provider": provider,
+        "latency": latency.ewma if latency is not None and latency.count else None,
+        "ttft": ttft.ewma if ttft is not None and ttft.count else None,
+        "error_rate": outcomes.error_rate,
+        "requests": outcomes.successes + outcomes.failures,
+        "cost": 0.0 if PROVIDERS.get(provider, {}).get("free_tier") else 1.0,
+        "circuit": breaker,
+    }
+
+
+def _expected_latency(stats: Dict) -> float:
+    latency = stats["latency"] if stats["latency"] is not None else PRIOR_LATENCY
+    return latency * (1 + ERROR_PENALTY * stats["error_rate"])
+
+
+def fastest(stats: Dict) -> float:
+    """Lowest expected latency (time to first token when known), penalized by error rate"""
+    if stats["ttft"] is not None:
+        return stats["ttft"] * (1 + ERROR_PENALTY * stats["error_rate"])
+    return _expected_latency(stats)
+
+
+def cheapest(stats: Dict) -> float:
+    """Free tiers first, then by expected latency"""
+    return stats["cost"] * 1000 + _expected_latency(stats)
+
+
+def most_reliable(stats: Dict) -> float:
+    """Lowest error rate, then by expected latency"""
+    return stats["error_rate"] * 1000 + _expected_latency(stats)
+
+
+POLICIES: Dict[str, Callable[[Dict], float]] = {
+    "fastest": fastest,
+    "cheapest": cheapest,
+    "most_reliable": most_reliable,
+}
+
+
+def register_policy(name: str, score: Callable[[Dict], float]) -> None:
+    """Add a routing policy: score(stats) -> float, lower is better"""
+    POLICIES[name] = score
+
+
+def rank_providers(candidates: Iterable[str], policy: str = DEFAULT_POLICY) -> List[Dict]:
+    """Candidates with their stats and "score", best first; open circuits sort last"""
+    score = POLICIES.get(policy, POLICIES["fastest"])
+    ranked = []
+    for provider in candidates:
+        stats = provider_stats(provider)
+        stats["score"] = score(stats)
+        ranked.append(stats)
+    ranked.sort(key=lambda s: (s["circuit"] == OPEN, s["score"]))
+    return ranked
+
+
+def choose_provider(candidates: Iterable[str], policy: str = DEFAULT_POLICY,
+                    exclude: Iterable[str] = ()) -> Optional[str]:
+    """Best candidate under the policy, or None if there are no candidates"""
+    excluded = set(exclude)
+    ranked = rank_providers([p for p in candidates if p not in excluded], policy)
+    if not ranked:
+        return None
+    healthy = [s for s in ranked if s["circuit"] != OPEN]
+    if len(healthy) > 1 and random.random() < EXPLORE_RATE:
+        return random.choice(healthy[1:])["provider"]
+    return ranked[0]["provider"]
@@ -0,0 +1,286 @@
+"""
+HTTP API Server
+A plain ASGI app (no framework) that puts the command engine behind HTTP for other front ends. The event
+loop only parses requests and streams responses. Engine calls block on provider I/O, so they run on a bounded
+thread pool. When NOVA_SERVER_QUEUE requests are already waiting, new ones get 503 with Retry-After, so
+overload sheds requests instead of growing latency without bound. Each client keeps its own conversation
+through the X-Session-Id header (or a "session" field); a new id is issued when none is sent, and retrieved chat
+memory is limited to that session. Notes are one shared notebook for every client. Weather is awaited directly
+on the loop through the shared async HTTP client.
+
+Endpoints:
+  POST   /v1/command       {"query"}                 -> {"response", "type", "session"} (+ "url" for websites)
+  POST   /v1/chat          {"message", "stream"}     -> JSON, or text/event-stream when stream is true
+                                                        (token events, then "done" or "error")
+  GET    /v1/notes         ?limit=&before=           -> {"notes": [...]}
+  GET    /v1/notes/search  ?q=&limit=                -> {"notes": [...]}
+  POST   /v1/notes         {"content"}               -> {"id"}
+  DELETE /v1/notes/<id>                              -> {"deleted"}
+  GET    /v1/weather       ?city=                    -> {"city", "report"}
+  GET    /v1/health                                  -> pool and session stats
+
+Usage: python server.py [--host H] [--port N] (needs uvicorn: pip install uvicorn)
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from daemon import Daemon, valid_session_id
+from notes_store import NOTES_PAGE_SIZE, get_notes_store
+from utils import aget_weather
+
+WORKERS = int(os.getenv("NOVA_SERVER_WORKERS", "32"))       # engine calls running at once
+MAX_QUEUE = int(os.getenv("NOVA_SERVER_QUEUE", "256"))      # waiting beyond the workers before 503s
+MAX_BODY = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ApiServer:
+    """ASGI application: routes, session ids and the bounded engine pool"""
+
+    def __init__(self, daemon: Optional[Daemon] = None, workers: int = WORKERS, max_queue: int = MAX_QUEUE):
+        self.daemon = daemon or Daemon()
+        self.workers = workers
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        self.capacity = workers + max_queue
+        self.in_flight = 0
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0}
+        self.routes = [
+            ("POST", re.compile(r"/v1/command$"), self.command),
+            ("POST", re.compile(r"/v1/chat$"), self.chat),
+            ("GET", re.compile(r"/v1/notes$"), self.list_notes),
+            ("GET", re.compile(r"/v1/notes/search$"), self.search_notes),
+            ("POST", re.compile(r"/v1/notes$"), self.add_note),
+            ("DELETE", re.compile(r"/v1/notes/(\d+)$"), self.delete_note),
+            ("GET", re.compile(r"/v1/weather$"), self.weather),
+            ("GET", re.compile(r"/v1/health$"), self.health),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.stats["requests"] += 1
+        try:
+            handler, args = self._route(scope["method"], scope["path"])
+            request = {
+                "query": {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()},
+                "headers": {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]},
+                "body": await self._read_body(receive) if scope["method"] in ("POST", "PUT") else {},
+            }
+            await handler(request, send, *args)
+        except HTTPError as e:
+            if e.status == 503:
+                self.stats["rejected"] += 1
+            await self._json(send, e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            self.stats["errors"] += 1
+            await self._json(send, 500, {"error": str(e)})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await asyncio.get_running_loop().run_in_executor(self.pool, self.daemon.warm)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _route(self, method: str, path: str) -> Tuple[Callable, Tuple]:
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, match.groups()
+                allowed = True
+        raise HTTPError(405 if allowed else 404, "method not allowed" if allowed else "not found")
+
+    async def _read_body(self, receive) -> Dict:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY:
+                raise HTTPError(413, "request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return body
+
+    async def _json(self, send, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]
+        raw_headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": data})
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        """Run blocking engine work on the pool, or refuse with 503 when the pool and its queue are full"""
+        if self.in_flight >= self.capacity:
+            raise HTTPError(503, "server busy, retry shortly", {"Retry-After": "1"})
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    def _session(self, request: Dict):
+        session_id = request["body"].get("session") or request["headers"].get("x-session-id")
+        if session_id is not None and not valid_session_id(session_id):
+            raise HTTPError(400, "invalid session id")
+        return self.daemon.session(session_id)
+
+    def _text(self, request: Dict, field: str) -> str:
+        value = request["body"].get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise HTTPError(400, f"missing {field}")
+        return value.strip()
+
+    async def command(self, request: Dict, send) -> None:
+        query = self._text(request, "query")
+        session = self._session(request)
+        # Website commands come back as a URL for the client to open; the server host never opens a browser
+        response, command_type = await self._run(self.daemon.handle, session, query, None, False, False)
+        payload = {"response": response, "type": command_type, "session": session.session_id}
+        if command_type == "website":
+            payload["url"] = response
+        await self._json(send, 200, payload, {"X-Session-Id": session.session_id})
+
+    async def chat(self, request: Dict, send) -> None:
+        message = self._text(request, "message")
+        session = self._session(request)
+        if not request["body"].get("stream"):
+            response, command_type = await self._run(self.daemon.handle, session, message, None, True)
+            await self._json(send, 200, {"response": response, "type": command_type, "session": session.session_id},
+                             {"X-Session-Id": session.session_id})
+            return
+        await self._stream_chat(send, session, message)
+
+    async def _stream_chat(self, send, session, message: str) -> None:
+        """Server-sent events: a data event per token, then a "done" event with the full reply (or an "error"
+        event if the turn fails after tokens were sent)"""
+        loop = asyncio.get_running_loop()
+        tokens: "asyncio.Queue" = asyncio.Queue()
+
+        def on_token(token: str) -> None:
+            loop.call_soon_threadsafe(tokens.put_nowait, token)
+
+        turn = asyncio.ensure_future(self._run(self.daemon.handle, session, message, on_token, True))
+        turn.add_done_callback(lambda _: tokens.put_nowait(None))
+        started = False
+        while True:
+            token = await tokens.get()
+            if token is None:
+                break
+            if not started:
+                await self._start_events(send, session.session_id)
+                started = True
+            await send({"type": "http.response.body", "body": _event({"token": token}), "more_body": True})
+        try:
+            response, command_type = turn.result()  # a 503 from the pool surfaces here, before any event was sent
+        except Exception as e:
+            if not started:
+                raise  # nothing sent yet: __call__ answers with a normal JSON error
+            # The response has started, so the failure can only be reported in the stream
+            self.stats["errors"] += 1
+            await send({"type": "http.response.body", "body": _event({"error": str(e)}, "error")})
+            return
+        if not started:
+            await self._start_events(send, session.session_id)
+        done = {"response": response, "type": command_type, "session": session.session_id}
+        await send({"type": "http.response.body", "body": _event(done, "done")})
+
+    async def _start_events(self, send, session_id: str) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+            (b"x-session-id", session_id.encode("latin-1")),
+        ]})
+
+    async def list_notes(self, request: Dict, send) -> None:
+        limit = _int(request["query"].get("limit"), NOTES_PAGE_SIZE, 1, 100)
+        before = _int(request["query"].get("before"), None, 1, None)
+        notes = await self._run(get_notes_store().latest, limit, before)
+        await self._json(send, 200, {"notes": notes})
+
+    async def search_notes(self, request: Dict, send) -> None:
+        keywords = request["query"].get("q", "").strip()
+        if not keywords:
+            raise HTTPError(400, "missing q")
+        limit = _int(request["query"].get("limit"), NOTES_PAGE_SIZE, 1, 100)
+        await self._json(send, 200, {"notes": await self._run(get_notes_store().search, keywords, limit)})
+
+    async def add_note(self, request: Dict, send) -> None:
+        content = self._text(request, "content")
+        await self._json(send, 201, {"id": await self._run(get_notes_store().add, content)})
+
+    async def delete_note(self, request: Dict, send, note_id: str) -> None:
+        deleted = await self._run(get_notes_store().delete, int(note_id))
+        await self._json(send, 200 if deleted else 404, {"deleted": deleted})
+
+    async def weather(self, request: Dict, send) -> None:
+        city = request["query"].get("city", "London").strip() or "London"
+        await self._json(send, 200, {"city": city, "report": await aget_weather(city)})
+
+    async def health(self, request: Dict, send) -> None:
+        await self._json(send, 200, {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "capacity": self.capacity,
+            **self.stats,
+            **self.daemon.get_stats(),
+        })
+
+
+def _event(payload: Dict, name: Optional[str] = None) -> bytes:
+    prefix = f"event: {name}\n" if name else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+def _int(value: Optional[str], default, low: int, high: Optional[int]):
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HTTPError(400, f"not a number: {value}")
+    return max(low, min(number, high)) if high is not None else max(low, number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Jarvis engine over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed. Run: pip install uvicorn")
+    uvicorn.run(ApiServer(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Session Memory
+Bounded in-memory chat history per Streamlit session. Each exchange is one compact Turn (__slots__, no per-message
+dicts; the command log is a flag on the turn rather than a second copy). Turns live in a ring buffer capped by
+count and bytes; turns pushed out of it stay in the conversation store (they were written there when recorded)
+and can be paged back in for display. A process-wide registry enforces a global byte cap by releasing the rings
+of the least recently active sessions, releases sessions idle past NOVA_SESSION_IDLE_SECONDS, and reports each
+session's footprint. A released session reloads its newest window from the store on next use.
+"""
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Dict, List, Optional
+
+RING_TURNS = int(os.getenv("NOVA_SESSION_TURNS", "50"))                            # turns kept per session
+SESSION_BYTES = int(os.getenv("NOVA_SESSION_MEMORY_KB", "512")) * 1024            # per-session cap
+GLOBAL_BYTES = int(os.getenv("NOVA_SESSIONS_MEMORY_MB", "64")) * 1024 * 1024      # all sessions together
+IDLE_SECONDS = float(os.getenv("NOVA_SESSION_IDLE_SECONDS", "900"))               # release idle sessions after
+
+
+class Turn:
+    """One user/assistant exchange; either side may be missing when rebuilt from a partial page"""
+
+    __slots__ = ("user_id", "query", "reply_id", "response", "type", "timestamp", "logged")
+
+    def __init__(self, user_id: Optional[str], query: Optional[str], reply_id: Optional[str],
+                 response: Optional[str], type: str = "chat", timestamp: str = "", logged: bool = True):
+        self.user_id = user_id
+        self.query = query
+        self.reply_id = reply_id
+        self.response = response
+        self.type = type
+        self.timestamp = timestamp
+        self.logged = logged
+
+    def messages(self) -> List[Dict]:
+        """Chat-history dicts (the shape chat_view and the conversation store use), built on demand"""
+        messages = []
+        if self.query is not None:
+            messages.append({"id": self.user_id, "role": "user", "content": self.query, "timestamp": self.timestamp})
+        if self.response is not None:
+            reply = {"id": self.reply_id, "role": "assistant", "content": self.response,
+                     "timestamp": self.timestamp, "type": self.type}
+            if not self.logged:
+                reply["logged"] = False
+            messages.append(reply)
+        return messages
+
+    def command(self) -> Dict:
+        return {"command": self.query, "response": self.response, "type": self.type, "timestamp": self.timestamp}
+
+    def size(self) -> int:
+        """Bytes held by this turn and its strings"""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(value) for value in (self.user_id, self.query, self.reply_id, self.response, self.timestamp)
+            if value is not None
+        )
+
+
+def turns_from_messages(messages: List[Dict]) -> List[Turn]:
+    """Pair stored messages back into turns (a reply completes the user message before it)"""
+    turns: List[Turn] = []
+    for message in messages:
+        if message.get("role") == "user":
+            turns.append(Turn(message.get("id"), message.get("content", ""), None, None,
+                              timestamp=message.get("timestamp", "")))
+        elif turns and turns[-1].response is None and turns[-1].query is not None:
+            turn = turns[-1]
+            turn.reply_id, turn.response = message.get("id"), message.get("content", "")
+            turn.type, turn.logged = message.get("type", "chat"), message.get("logged", True)
+        else:
+            turns.append(Turn(None, None, message.get("id"), message.get("content", ""), message.get("type", "chat"),
+                              message.get("timestamp", ""), message.get("logged", True)))
+    return turns
+
+
+class SessionHistory:
+    """Ring buffer of a session's newest turns; older messages are counted, not held, and read from the store"""
+
+    def __init__(self, session_id: str, store, capacity: int = RING_TURNS, max_bytes: int = SESSION_BYTES):
+        self.session_id = session_id
+        self.store = store
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.turns: "deque[Turn]" = deque()
+        self.earlier: List[Dict] = []  # older messages paged in for display ("load earlier")
+        self.older = 0                 # stored messages older than the ring
+        self.bytes = 0
+        self.spilled = 0
+        self.loaded = False
+        self.last_active = time.time()
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        """(Re)load the newest window from the store; caller holds the lock"""
+        if self.loaded:
+            return
+        total = self.store.count(self.session_id)
+        messages = self.store.recent(self.session_id, self.capacity * 2)
+        self.turns = deque(turns_from_messages(messages))
+        self.older = total - len(messages)
+        self.bytes = sum(turn.size() for turn in self.turns)
+        self.loaded = True
+        self._trim()
+
+    def _trim(self) -> None:
+        """Spill the oldest turns past the count or byte cap (the newest turn always stays)"""
+        while len(self.turns) > 1 and (len(self.turns) > self.capacity or self.bytes > self.max_bytes):
+            turn = self.turns.popleft()
+            self.bytes -= turn.size()
+            self.older += len(turn.messages())
+            self.spilled += 1
+
+    def touch(self) -> None:
+        self.last_active = time.time()
+
+    def append(self, turn: Turn) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self.turns.append(turn)
+            self.bytes += turn.size()
+            self._trim()
+            self.touch()
+        enforce_limits(exclude=self)
+
+    def messages(self) -> List[Dict]:
+        """Messages of the in-memory turns, oldest first"""
+        with self._lock:
+            self._ensure_loaded()
+            self.touch()
+            return [message for turn in self.turns for message in turn.messages()]
+
+    def commands(self, limit: int) -> List[Dict]:
+        """Newest logged commands, oldest first"""
+        with self._lock:
+            self._ensure_loaded()
+            logged = [turn for turn in reversed(self.turns) if turn.logged and turn.query is not None][:limit]
+        return [turn.command() for turn in reversed(logged)]
+
+    def total_messages(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self.older + sum(len(turn.messages()) for turn in self.turns)
+
+    def page_in(self, shown: int) -> None:
+        """Read older messages from the store until `shown` messages (or all of them) are available for display"""
+        with self._lock:
+            self._ensure_loaded()
+            loaded = self.earlier + [m for turn in self.turns for m in turn.messages()]
+            missing = min(shown - len(loaded), self.older - len(self.earlier))
+            if missing <= 0 or not loaded:
+                return
+            older = self.store.before(self.session_id, loaded[0]["id"], missing)
+            self.earlier = older + self.earlier
+            self.bytes += sum(sys.getsizeof(m["content"]) for m in older)
+
+    def drop_earlier(self) -> None:
+        """Forget paged-in display pages (back to the newest window)"""
+        with self._lock:
+            self.bytes -= sum(sys.getsizeof(m["content"]) for m in self.earlier)
+            self.earlier = []
+
+    def release(self) -> bool:
+        """Free the ring and pages; everything is still in the store and reloads on next use. False if another
+        caller already released it"""
+        with self._lock:
+            was_loaded = self.loaded
+            self.turns = deque()
+            self.earlier = []
+            self.bytes = 0
+            self.loaded = False
+            return was_loaded
+
+    def reset(self) -> None:
+        """Reload from the store (after it was cleared or changed elsewhere)"""
+        self.release()
+        with self._lock:
+            self.spilled = 0
+            self._ensure_loaded()
+
+
+_sessions: "weakref.WeakValueDictionary[str, SessionHistory]" = weakref.WeakValueDictionary()
+_sessions_lock = threading.Lock()
+_stats = {"released_idle": 0, "released_for_memory": 0}
+
+
+def get_session_history(session_id: str, store) -> SessionHistory:
+    """The session's history (one per session id in this process; dropped when no Streamlit session holds it)"""
+    with _sessions_lock:
+        history = _sessions.get(session_id)
+        if history is None:
+            history = _sessions[session_id] = SessionHistory(session_id, store)
+    history.touch()
+    enforce_limits(exclude=history)
+    return history
+
+
+def enforce_limits(exclude: Optional[SessionHistory] = None) -> None:
+    """Release idle sessions, then the least recently active ones while over the global cap"""
+    now = time.time()
+    with _sessions_lock:
+        sessions = [h for h in _sessions.values() if h is not exclude and h.loaded]
+    for history in sessions:
+        if now - history.last_active > IDLE_SECONDS and history.release():
+            _count("released_idle")
+    total = sum(h.bytes for h in sessions if h.loaded) + (exclude.bytes if exclude is not None else 0)
+    for history in sorted((h for h in sessions if h.loaded), key=lambda h: h.last_active):
+        if total <= GLOBAL_BYTES:
+            break
+        total -= history.bytes
+        if history.release():
+            _count("released_for_memory")
+
+
+def _count(name: str) -> None:
+    # enforce_limits runs on every Streamlit session's thread
+    with _sessions_lock:
+        _stats[name] += 1
+
+
+def memory_report() -> Dict:
+    """Per-session footprint plus totals, largest sessions first"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        stats = dict(_stats)
+    now = time.time()
+    rows = sorted((
+        {"session": h.session_id[:8], "turns": len(h.turns), "earlier": len(h.earlier), "kb": h.bytes / 1024,
+         "spilled": h.spilled, "idle_s": now - h.last_active, "loaded": h.loaded}
+        for h in sessions
+    ), key=lambda row: row["kb"], reverse=True)
+    return {
+        "sessions": rows,
+        "total_kb": sum(row["kb"] for row in rows),
+        "cap_kb": GLOBAL_BYTES / 1024,
+        **stats,
+    }
@@ -0,0 +1,431 @@
+"""
+Speech-to-Text
+Pluggable speech recognition that decodes while the user is still speaking. Audio arrives as fixed-size frames
+(from the microphone or a WAV file); an energy endpointer finds the start and end of speech, and frames are fed
+to the backend's stream as they arrive, so at end of speech only the last frames remain to decode. Offline CPU
+backends (Vosk, PocketSphinx) are preferred; Google's web recognizer remains as an online fallback. The ambient
+noise level is measured once, refreshed from the silence before each utterance, and re-measured when it ages out,
+instead of spending 500 ms on calibration for every command.
+"""
+import abc
+import json
+import os
+import re
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+STT_ENGINE = os.getenv("NOVA_STT_ENGINE", "auto")  # auto | vosk | pocketsphinx | google
+VOSK_MODEL = os.getenv("NOVA_STT_VOSK_MODEL", os.path.join("models", "vosk-model-small-en-us-0.15"))
+SAMPLE_RATE = int(os.getenv("NOVA_STT_SAMPLE_RATE", "16000"))
+FRAME_MS = 30
+PAUSE_MS = int(os.getenv("NOVA_STT_PAUSE_MS", "700"))                    # silence that ends an utterance
+MIN_SPEECH_MS = 90                                                         # louder-than-noise run that starts one
+PREROLL_MS = 300                                                           # audio kept from before the start
+CALIBRATION_SECONDS = float(os.getenv("NOVA_STT_CALIBRATION_SECONDS", "300"))  # re-measure noise after this
+CALIBRATION_MS = 250                                                       # ambient audio used for a measurement
+THRESHOLD_RATIO = 3.0                                                      # speech threshold over the noise floor
+MIN_THRESHOLD = 150.0                                                      # RMS of 16-bit samples
+
+
+def rms(frame: bytes) -> float:
+    """Root-mean-square energy of 16-bit mono PCM"""
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+class NoiseCalibration:
+    """Ambient noise floor; updated from non-speech frames and considered stale after max_age seconds"""
+
+    def __init__(self, max_age: float = CALIBRATION_SECONDS, ratio: float = THRESHOLD_RATIO,
+                 min_threshold: float = MIN_THRESHOLD):
+        self.max_age = max_age
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.floor: Optional[float] = None
+        self.measured = 0.0   # last full measurement
+        self.measurements = 0
+        self._lock = threading.Lock()
+
+    @property
+    def threshold(self) -> float:
+        return max(self.min_threshold, (self.floor or 0.0) * self.ratio)
+
+    def stale(self) -> bool:
+        return self.floor is None or time.time() - self.measured > self.max_age
+
+    def measure(self, energies: List[float]) -> None:
+        """Replace the floor with the mean energy of ambient-only frames"""
+        with self._lock:
+            self.floor = sum(energies) / len(energies)
+            self.measured = time.time()
+            self.measurements += 1
+
+    def observe(self, energy: float, weight: float = 0.05) -> None:
+        """Track slow drift of the noise floor from a frame classified as silence"""
+        with self._lock:
+            if self.floor is not None:
+                self.floor += (energy - self.floor) * weight
+
+
+_calibrations: Dict[str, NoiseCalibration] = {}
+_calibrations_lock = threading.Lock()
+
+
+def get_calibration(source: str = "microphone") -> NoiseCalibration:
+    """Process-wide calibration per audio source"""
+    with _calibrations_lock:
+        calibration = _calibrations.get(source)
+        if calibration is None:
+            calibration = _calibrations[source] = NoiseCalibration()
+    return calibration
+
+
+class Endpointer:
+    """Energy-based speech start/end detection over frames; push() returns silence, start, speech or end"""
+
+    def __init__(self, calibration: NoiseCalibration, frame_ms: int = FRAME_MS, pause_ms: int = PAUSE_MS,
+                 min_speech_ms: int = MIN_SPEECH_MS):
+        self.calibration = calibration
+        self.pause_frames = max(1, pause_ms // frame_ms)
+        self.onset_frames = max(1, min_speech_ms // frame_ms)
+        self.warmup_frames = max(1, CALIBRATION_MS // frame_ms) if calibration.stale() else 0
+        self._ambient: List[float] = []
+        self.in_speech = False
+        self._onset = 0
+        self._silence = 0
+
+    def push(self, frame: bytes) -> str:
+        energy = rms(frame)
+        if len(self._ambient) < self.warmup_frames:
+            self._ambient.append(energy)
+            if len(self._ambient) == self.warmup_frames:
+                self.calibration.measure(self._ambient)
+            return "silence"
+        loud = energy > self.calibration.threshold
+        if not self.in_speech:
+            if not loud:
+                self._onset = 0
+                self.calibration.observe(energy)
+                return "silence"
+            self._onset += 1
+            if self._onset < self.onset_frames:
+                return "silence"
+            self.in_speech, self._silence = True, 0
+            return "start"
+        self._silence = 0 if loud else self._silence + 1
+        if self._silence >= self.pause_frames:
+            self.in_speech, self._onset = False, 0
+            return "end"
+        return "speech"
+
+
+class RecognizerStream(abc.ABC):
+    """Incremental decoder for one utterance: accept() frames as they arrive, finish() for the text"""
+
+    def accept(self, pcm: bytes) -> str:
+        """Feed audio; returns the partial hypothesis so far (may be empty)"""
+        return ""
+
+    @abc.abstractmethod
+    def finish(self) -> str:
+        """Final transcript of everything accepted"""
+
+
+class SpeechBackend(abc.ABC):
+    """Creates recognizer streams; subclasses override available() and implement open_stream()"""
+
+    name = "base"
+    offline = True
+
+    def available(self) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> RecognizerStream:
+        """A fresh stream for one utterance"""
+
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> str:
+        """Decode a whole clip at once"""
+        stream = self.open_stream(sample_rate, language)
+        step = sample_rate * 2 * FRAME_MS // 1000
+        for offset in range(0, len(pcm), step):
+            stream.accept(pcm[offset:offset + step])
+        return stream.finish()
+
+
+class _VoskStream(RecognizerStream):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.segments: List[str] = []
+
+    def accept(self, pcm: bytes) -> str:
+        if self.recognizer.AcceptWaveform(pcm):
+            self.segments.append(json.loads(self.recognizer.Result()).get("text", ""))
+            return " ".join(self.segments)
+        return " ".join(self.segments + [json.loads(self.recognizer.PartialResult()).get("partial", "")])
+
+    def finish(self) -> str:
+        self.segments.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return " ".join(s for s in self.segments if s)
+
+
+class VoskBackend(SpeechBackend):
+    """Kaldi models via Vosk (download a model into NOVA_STT_VOSK_MODEL); the language comes from the model"""
+
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL):
+        self.model_path = model_path
+        self._model = None
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        try:
+            import vosk  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.isdir(self.model_path)
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> RecognizerStream:
+        import vosk
+
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    vosk.SetLogLevel(-1)
+                    self._model = vosk.Model(self.model_path)  # seconds to load; done once per process
+        return _VoskStream(vosk.KaldiRecognizer(self._model, sample_rate))
+
+
+class _SphinxStream(RecognizerStream):
+    def __init__(self, decoder, release: Callable):
+        self.decoder = decoder
+        self.release = release
+        self.decoder.start_utt()
+
+    def accept(self, pcm: bytes) -> str:
+        self.decoder.process_raw(pcm, False, False)
+        hypothesis = self.decoder.hyp()
+        return hypothesis.hypstr if hypothesis else ""
+
+    def finish(self) -> str:
+        self.decoder.end_utt()
+        hypothesis = self.decoder.hyp()
+        self.release(self.decoder)
+        return hypothesis.hypstr if hypothesis else ""
+
+
+class PocketSphinxBackend(SpeechBackend):
+    """CMU PocketSphinx with its bundled US English model (16 kHz)"""
+
+    name = "pocketsphinx"
+
+    def __init__(self):
+        self._decoders: "deque" = deque()
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        try:
+            import pocketsphinx  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> RecognizerStream:
+        from pocketsphinx import Decoder
+
+        # Decoders are costly to build and not thread-safe: keep idle ones for reuse
+        with self._lock:
+            decoder = self._decoders.popleft() if self._decoders else None
+        if decoder is None:
+            decoder = Decoder(samprate=sample_rate, loglevel="FATAL")
+        return _SphinxStream(decoder, self._release)
+
+    def _release(self, decoder) -> None:
+        with self._lock:
+            self._decoders.append(decoder)
+
+
+class _BufferedStream(RecognizerStream):
+    def __init__(self, decode: Callable[[bytes], str]):
+        self.decode = decode
+        self.chunks: List[bytes] = []
+
+    def accept(self, pcm: bytes) -> str:
+        self.chunks.append(pcm)
+        return ""
+
+    def finish(self) -> str:
+        return self.decode(b"".join(self.chunks))
+
+
+class GoogleBackend(SpeechBackend):
+    """Google's web speech API through SpeechRecognition: needs network and decodes only after the utterance"""
+
+    name = "google"
+    offline = False
+
+    def available(self) -> bool:
+        try:
+            import speech_recognition  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def open_stream(self, sample_rate: int = SAMPLE_RATE, language: str = "en-in") -> RecognizerStream:
+        import speech_recognition as sr
+
+        def decode(pcm: bytes) -> str:
+            try:
+                return sr.Recognizer().recognize_google(sr.AudioData(pcm, sample_rate, 2), language=language)
+            except sr.UnknownValueError:
+                return ""
+
+        return _BufferedStream(decode)
+
+
+# Tried in this order when NOVA_STT_ENGINE is "auto"; register_backend adds more
+BACKENDS: Dict[str, Callable[[], SpeechBackend]] = {
+    "vosk": VoskBackend,
+    "pocketsphinx": PocketSphinxBackend,
+    "google": GoogleBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[], SpeechBackend]) -> None:
+    BACKENDS[name] = factory
+
+
+_backends: Dict[str, SpeechBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str = STT_ENGINE) -> Optional[SpeechBackend]:
+    """Process-wide backend (models stay loaded between commands); None if nothing usable is installed"""
+    names = list(BACKENDS) if name == "auto" else [name]
+    with _backends_lock:
+        for candidate in names:
+            backend = _backends.get(candidate)
+            if backend is None and candidate in BACKENDS:
+                backend = BACKENDS[candidate]()
+                if not backend.available():
+                    continue
+                _backends[candidate] = backend
+            if backend is not None:
+                return backend
+    return None
+
+
+class Transcript:
+    """Recognized utterance with timing: latency is end of speech (endpoint) to final text"""
+
+    __slots__ = ("text", "latency", "speech_seconds", "backend")
+
+    def __init__(self, text: str, latency: float, speech_seconds: float, backend: str):
+        self.text = text
+        self.latency = latency
+        self.speech_seconds = speech_seconds
+        self.backend = backend
+
+
+def listen(frames: Iterable[bytes], sample_rate: int = SAMPLE_RATE, backend: Optional[SpeechBackend] = None,
+           calibration: Optional[NoiseCalibration] = None, language: str = "en-in", timeout: Optional[float] = None,
+           phrase_time_limit: Optional[float] = None, frame_ms: int = FRAME_MS) -> Transcript:
+    """Recognize the first utterance in a stream of frame_ms PCM frames. Raises TimeoutError if no speech starts
+    within `timeout` seconds of audio, RuntimeError if no backend is available"""
+    backend = backend or get_backend()
+    if backend is None:
+        raise RuntimeError("no speech recognizer available (install vosk with a model, or pocketsphinx)")
+    endpointer = Endpointer(calibration or get_calibration(), frame_ms)
+    preroll: "deque[bytes]" = deque(maxlen=max(1, PREROLL_MS // frame_ms))
+    stream, elapsed, speech_frames = None, 0.0, 0
+    for frame in frames:
+        elapsed += frame_ms / 1000
+        state = endpointer.push(frame)
+        if stream is None:
+            preroll.append(frame)
+            if state == "start":
+                stream = backend.open_stream(sample_rate, language)
+                for buffered in preroll:
+                    stream.accept(buffered)
+                speech_frames = len(preroll)
+            elif timeout is not None and elapsed > timeout:
+                raise TimeoutError("no speech detected")
+            continue
+        stream.accept(frame)
+        speech_frames += 1
+        if state == "end" or (phrase_time_limit is not None and speech_frames * frame_ms / 1000 >= phrase_time_limit):
+            break
+    if stream is None:
+        raise TimeoutError("no speech detected")
+    start = time.perf_counter()
+    text = stream.finish()
+    return Transcript(text.strip(), time.perf_counter() - start, speech_frames * frame_ms / 1000, backend.name)
+
+
+def wav_frames(path: str, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS,
+               realtime: bool = False) -> Iterator[bytes]:
+    """Frames of a WAV file as 16-bit mono PCM at sample_rate (resampled if needed); realtime paces them like
+    a microphone"""
+    with wave.open(path, "rb") as source:
+        channels, width, rate = source.getnchannels(), source.getsampwidth(), source.getframerate()
+        raw = source.readframes(source.getnframes())
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[width]
+    samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    if width == 1:
+        samples = (samples - 128) * 256
+    elif width == 4:
+        samples /= 65536
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != sample_rate:
+        positions = np.arange(0, len(samples) * sample_rate // rate) * (rate / sample_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    pcm = np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+    step = sample_rate * 2 * frame_ms // 1000
+    for offset in range(0, len(pcm), step):
+        frame = pcm[offset:offset + step]
+        if len(frame) < step:
+            frame += b"\0" * (step - len(frame))
+        if realtime:
+            time.sleep(frame_ms / 1000)
+        yield frame
+
+
+def microphone_frames(sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS) -> Iterator[bytes]:
+    """Frames from the default microphone (SpeechRecognition/PyAudio), until the consumer stops iterating"""
+    import speech_recognition as sr
+
+    with sr.Microphone(sample_rate=sample_rate, chunk_size=sample_rate * frame_ms // 1000) as source:
+        while True:
+            yield source.stream.read(source.CHUNK)
+
+
+def listen_microphone(language: str = "en-in", timeout: float = 5, phrase_time_limit: float = 10) -> str:
+    """Text of the next utterance from the default microphone"""
+    frames = microphone_frames()
+    try:
+        return listen(frames, language=language, timeout=timeout, phrase_time_limit=phrase_time_limit).text
+    finally:
+        frames.close()
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words, on lowercased words without punctuation"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, word in enumerate(ref, 1):
+        current = [i]
+        for j, other in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / max(1, len(ref))
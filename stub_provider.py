@@ -0,0 +1,144 @@
+"""
+Local Stub Provider
+OpenAI-compatible (and Hugging Face style) chat server for benchmarks and load tests
+"""
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+DEFAULT_REPLY = "Hello from the stub provider. This is a canned answer used for benchmarking."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers chat requests with a canned reply after a configurable delay"""
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+    disable_nagle_algorithm = True  # avoid delayed-ACK stalls between header and body writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, payload) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        request = self._read_json()
+        slow = server.tail_probability and random.random() < server.tail_probability
+        time.sleep(server.tail_latency if slow else server.latency)
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            model = request.get("model", "stub-model")
+            if request.get("stream"):
+                self._stream_chat(model)
+                return
+            self._send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": server.reply},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}
+            })
+        elif "/models/" in self.path:
+            # Hugging Face Inference API shape
+            self._send_json(200, [{"generated_text": server.reply}])
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def _stream_chat(self, model: str) -> None:
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(data: bytes) -> None:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        for i, word in enumerate(server.reply.split(" ")):
+            piece = word if i == 0 else " " + word
+            event = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            }
+            write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            time.sleep(server.token_delay)
+        write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded server that treats client disconnects (e.g. cancelled hedged requests) as normal"""
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 refuses connections under load tests
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_stub_server(latency: float = 0.0, token_delay: float = 0.0, reply: str = DEFAULT_REPLY,
+                      port: int = 0, tail_latency: float = 0.0,
+                      tail_probability: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub server in a daemon thread; returns (server, base_url).
+    
+    A fraction tail_probability of requests waits tail_latency instead of latency (simulated slow tail).
+    """
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    server.latency = latency
+    server.token_delay = token_delay
+    server.reply = reply
+    server.tail_latency = tail_latency
+    server.tail_probability = tail_probability
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/v1"
+
+
+def stop_stub_server(server: Optional[ThreadingHTTPServer]) -> None:
+    """Shut down a server started with start_stub_server"""
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    # python stub_provider.py [port] [latency_ms] [token_delay_ms]
+    args = sys.argv[1:]
+    srv, url = start_stub_server(latency=float(args[1]) / 1000 if len(args) > 1 else 0.0,
+                                 token_delay=float(args[2]) / 1000 if len(args) > 2 else 0.0,
+                                 port=int(args[0]) if args else 8765)
+    print(f"Stub provider listening on {url} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop_stub_server(srv)
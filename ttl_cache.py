@@ -0,0 +1,232 @@
+"""
+TTL Cache
+Small keyed cache for upstream lookups (weather, news): entries are fresh for `ttl` seconds, then served stale
+for up to `stale_ttl` more while one background refresh runs (stale-while-revalidate). Concurrent misses for the
+same key share a single upstream call (single-flight), across threads and the shared event loop alike.
+BackgroundRefresher keeps the most requested keys warm on a fixed interval.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+class TTLCache:
+    """Per-key cache with TTL, stale-while-revalidate and single-flight loading"""
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0.0, max_entries: int = 256,
+                 cacheable: Callable[[Any], bool] = _always):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.cacheable = cacheable
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                      "refreshes": 0, "upstream_calls": 0, "errors": 0}
+
+    def _lookup(self, key: str, now: float) -> Tuple[Optional[Any], str]:
+        """(value, "fresh" | "stale" | "miss"); caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+        value, stored = entry
+        age = now - stored
+        if age < self.ttl:
+            self._entries.move_to_end(key)
+            return value, "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return value, "stale"
+        del self._entries[key]
+        return None, "miss"
+
+    def _store(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _claim(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """(in-flight future for key, True if this caller must run the load); caller holds the lock"""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return future, False
+        future = self._inflight[key] = concurrent.futures.Future()
+        self.stats["upstream_calls"] += 1
+        return future, True
+
+    def _settle(self, key: str, future: concurrent.futures.Future, value: Any = None,
+                error: Optional[BaseException] = None) -> None:
+        if error is None and self.cacheable(value):
+            self._store(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is not None or not self.cacheable(value):
+                self.stats["errors"] += 1
+        if future.done():
+            return  # nothing left to tell waiters (defensive: waiters never cancel the shared future)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _load(self, key: str, loader: Callable[[], Any], future: concurrent.futures.Future) -> None:
+        try:
+            value = loader()
+        except Exception as e:
+            self._settle(key, future, error=e)
+        except BaseException:
+            # Cancelled (timeout, shutdown) or interrupted: waiters get an error and the next caller loads again
+            self._settle(key, future, error=RuntimeError(f"{self.name} load for {key!r} was cancelled"))
+            raise
+        else:
+            self._settle(key, future, value)
+
+    async def _aload(self, key: str, loader: Callable[[], Awaitable[Any]], future: concurrent.futures.Future) -> None:
+        try:
+            value = await loader()
+        except Exception as e:
+            self._settle(key, future, error=e)
+        except BaseException:
+            # Cancelled (timeout, shutdown) or interrupted: waiters get an error and the next caller loads again
+            self._settle(key, future, error=RuntimeError(f"{self.name} load for {key!r} was cancelled"))
+            raise
+        else:
+            self._settle(key, future, value)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cached value for key, calling loader() on a miss (once, however many threads ask)"""
+        with self._lock:
+            value, state = self._lookup(key, time.time())
+            if state == "fresh":
+                self.stats["hits"] += 1
+                return value
+            if state == "stale":
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    future, _ = self._claim(key)
+                    threading.Thread(target=self._load, args=(key, loader, future),
+                                     name=f"{self.name}-refresh", daemon=True).start()
+                return value
+            future, owner = self._claim(key)
+            if owner:
+                self.stats["misses"] += 1
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    async def aget(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Async twin of get; shares entries and in-flight loads with synchronous callers"""
+        with self._lock:
+            value, state = self._lookup(key, time.time())
+            if state == "fresh":
+                self.stats["hits"] += 1
+                return value
+            if state == "stale":
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    future, _ = self._claim(key)
+                    asyncio.ensure_future(self._aload(key, loader, future))
+                return value
+            future, owner = self._claim(key)
+            if owner:
+                self.stats["misses"] += 1
+        if owner:
+            await self._aload(key, loader, future)
+        # Shielded: a waiter cancelled by its own timeout must not cancel the load everyone else shares
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def refresh(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Reload key now, whatever its age (joins an in-flight load instead of starting another)"""
+        with self._lock:
+            future, owner = self._claim(key)
+            if owner:
+                self.stats["refreshes"] += 1
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        served = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / served if served else 0.0
+        return stats
+
+
+class BackgroundRefresher:
+    """Refreshes the pinned keys plus the top_n most requested keys of a cache every `interval` seconds.
+
+    Upstream calls from the refresher are bounded by len(pinned) + top_n per interval, however many users ask.
+    Request counts are halved each round so popularity follows recent demand.
+    """
+
+    def __init__(self, cache: TTLCache, loader_for: Callable[[str], Callable[[], Any]], interval: float,
+                 top_n: int = 5, pinned: Iterable[str] = ()):
+        self.cache = cache
+        self.loader_for = loader_for
+        self.interval = interval
+        self.top_n = top_n
+        self.pinned = list(pinned)
+        self._counts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def touch(self, key: str) -> None:
+        """Count a request for key"""
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0.0) + 1.0
+
+    def popular(self) -> List[str]:
+        with self._lock:
+            ranked = sorted(self._counts, key=self._counts.get, reverse=True)
+        return self.pinned + [key for key in ranked if key not in self.pinned][:self.top_n]
+
+    def refresh_once(self) -> int:
+        """One refresh round; returns the number of keys reloaded"""
+        keys = self.popular()
+        for key in keys:
+            try:
+                self.cache.refresh(key, self.loader_for(key))
+            except Exception:
+                pass  # the cache counts the error; the stale entry keeps serving
+        with self._lock:
+            for key in list(self._counts):
+                self._counts[key] /= 2
+                if self._counts[key] < 0.1:
+                    del self._counts[key]
+        return len(keys)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Start the refresh thread (once)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.cache.name}-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,260 @@
+"""
+Text-to-Speech
+Speech synthesis off the request path: replies are queued to a background worker that renders WAV audio with a
+pluggable engine (espeak / pyttsx3 / macOS say) and caches it on disk by (engine, voice, text hash). The UI
+gets a Future and plays the file with st.audio when it is ready; repeated phrases are served from the cache
+without synthesizing. Text is passed to engines on stdin or through their API, never through a shell.
+"""
+import abc
+import concurrent.futures
+import hashlib
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+TTS_ENGINE = os.getenv("NOVA_TTS_ENGINE", "auto")       # auto | espeak | pyttsx3 | say
+TTS_VOICE = os.getenv("NOVA_TTS_VOICE", "")              # engine-specific voice name; empty = engine default
+TTS_CACHE_DIR = os.getenv("NOVA_TTS_CACHE_DIR", os.path.join(".cache", "tts"))
+TTS_CACHE_MB = float(os.getenv("NOVA_TTS_CACHE_MB", "100"))
+TTS_MAX_CHARS = int(os.getenv("NOVA_TTS_MAX_CHARS", "600"))  # longer replies are cut at a sentence boundary
+SYNTH_TIMEOUT = 60
+
+
+class TTSEngine(abc.ABC):
+    """Renders text to a WAV file; subclasses override available() and implement synthesize()"""
+
+    name = "base"
+
+    def available(self) -> bool:
+        return False
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, voice: str, path: str) -> None:
+        """Write the spoken text to path as WAV"""
+
+
+class EspeakEngine(TTSEngine):
+    name = "espeak"
+
+    def _binary(self) -> Optional[str]:
+        return shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def available(self) -> bool:
+        return self._binary() is not None
+
+    def synthesize(self, text: str, voice: str, path: str) -> None:
+        args = [self._binary(), "-w", path] + (["-v", voice] if voice else [])
+        # No text argument: espeak reads it from stdin, so nothing in the reply is parsed as an option
+        subprocess.run(args, input=text.encode("utf-8"), check=True, timeout=SYNTH_TIMEOUT, capture_output=True)
+
+
+class Pyttsx3Engine(TTSEngine):
+    name = "pyttsx3"
+
+    def __init__(self):
+        self._engine = None
+
+    def available(self) -> bool:
+        try:
+            import pyttsx3  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def synthesize(self, text: str, voice: str, path: str) -> None:
+        import pyttsx3
+
+        if self._engine is None:
+            self._engine = pyttsx3.init()  # only ever used from the worker thread
+        if voice:
+            self._engine.setProperty("voice", voice)
+        self._engine.save_to_file(text, path)
+        self._engine.runAndWait()
+
+
+class SayEngine(TTSEngine):
+    name = "say"
+
+    def available(self) -> bool:
+        return shutil.which("say") is not None
+
+    def synthesize(self, text: str, voice: str, path: str) -> None:
+        args = ["say", "-o", path, "--file-format=WAVE", "--data-format=LEI16@22050", "-f", "-"]
+        subprocess.run(args + (["-v", voice] if voice else []), input=text.encode("utf-8"), check=True,
+                       timeout=SYNTH_TIMEOUT, capture_output=True)
+
+
+# Tried in this order when NOVA_TTS_ENGINE is "auto"; register_engine adds more
+ENGINES: Dict[str, Callable[[], TTSEngine]] = {
+    "espeak": EspeakEngine,
+    "pyttsx3": Pyttsx3Engine,
+    "say": SayEngine,
+}
+
+
+def register_engine(name: str, factory: Callable[[], TTSEngine]) -> None:
+    ENGINES[name] = factory
+
+
+def speakable_text(text: str, max_chars: int = TTS_MAX_CHARS) -> str:
+    """Reply text without markup, cut at a sentence boundary near max_chars"""
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"[*_`#>|]+", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    return cut[:end + 1] if end > max_chars // 3 else cut
+
+
+class SpeechSynthesizer:
+    """Background synthesis worker with an on-disk audio cache and single-flight per cache key"""
+
+    def __init__(self, engine: Optional[TTSEngine] = None, cache_dir: str = TTS_CACHE_DIR,
+                 cache_mb: float = TTS_CACHE_MB):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.cache_bytes = int(cache_mb * 1024 * 1024)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "coalesced": 0, "synthesized": 0, "errors": 0, "synth_seconds": 0.0}
+
+    def _engine(self) -> Optional[TTSEngine]:
+        if self.engine is None:
+            names = list(ENGINES) if TTS_ENGINE == "auto" else [TTS_ENGINE]
+            for name in names:
+                factory = ENGINES.get(name)
+                candidate = factory() if factory else None
+                if candidate is not None and candidate.available():
+                    self.engine = candidate
+                    break
+        return self.engine
+
+    def cache_path(self, text: str, voice: str = TTS_VOICE) -> Optional[str]:
+        engine = self._engine()
+        if engine is None:
+            return None
+        digest = hashlib.sha256(f"{engine.name}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest[:32]}.wav")
+
+    def synthesize_async(self, text: str, voice: str = TTS_VOICE) -> concurrent.futures.Future:
+        """Future resolving to a WAV path; immediate on a cache hit. Raises RuntimeError via the future if
+        no engine is installed"""
+        text = speakable_text(text)
+        path = self.cache_path(text, voice)
+        with self._lock:
+            if path is None or not text:
+                future = concurrent.futures.Future()
+                future.set_exception(RuntimeError("no text-to-speech engine found (install espeak or pyttsx3)")
+                                     if path is None else ValueError("nothing to say"))
+                return future
+            if os.path.exists(path):
+                self.stats["hits"] += 1
+                future = concurrent.futures.Future()
+                future.set_result(path)
+                return future
+            future = self._inflight.get(path)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future
+            future = self._inflight[path] = concurrent.futures.Future()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+                self._worker.start()
+        self._queue.put((text, voice, path, future))
+        return future
+
+    def synthesize(self, text: str, voice: str = TTS_VOICE, timeout: float = SYNTH_TIMEOUT) -> str:
+        """Blocking variant: WAV path for the text"""
+        return self.synthesize_async(text, voice).result(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            text, voice, path, future = self._queue.get()
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Render to a temporary name so a half-written file is never served from the cache
+                fd, partial = tempfile.mkstemp(suffix=".wav", dir=self.cache_dir)
+                os.close(fd)
+                start = time.perf_counter()
+                try:
+                    self.engine.synthesize(text, voice, partial)
+                    os.replace(partial, path)
+                finally:
+                    if os.path.exists(partial):
+                        os.remove(partial)
+                with self._lock:
+                    self.stats["synthesized"] += 1
+                    self.stats["synth_seconds"] += time.perf_counter() - start
+                self._prune()
+                result, error = path, None
+            except Exception as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                result, error = None, e
+            with self._lock:
+                self._inflight.pop(path, None)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _prune(self) -> None:
+        """Delete the least recently written files while the cache is over its size cap"""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".wav"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.cache_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["queued"] = self._queue.qsize()
+        stats["engine"] = self.engine.name if self.engine else None
+        return stats
+
+
+_synthesizer: Optional[SpeechSynthesizer] = None
+_synthesizer_lock = threading.Lock()
+
+
+def get_synthesizer() -> SpeechSynthesizer:
+    """Process-wide synthesizer (NOVA_TTS_* settings)"""
+    global _synthesizer
+    if _synthesizer is None:
+        with _synthesizer_lock:
+            if _synthesizer is None:
+                _synthesizer = SpeechSynthesizer()
+    return _synthesizer
+
+
+# Local players for speak(), tried in order; the file path is the last argument
+PLAYERS: List[List[str]] = [["afplay"], ["aplay", "-q"], ["paplay"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]]
+
+
+def speak(text: str, voice: str = TTS_VOICE) -> bool:
+    """Synthesize (or reuse) the audio and play it on this machine, blocking until done (for the CLI)"""
+    try:
+        path = get_synthesizer().synthesize(text, voice)
+    except Exception:
+        return False
+    for player in PLAYERS:
+        if shutil.which(player[0]):
+            return subprocess.run(player + [path], capture_output=True).returncode == 0
+    return False
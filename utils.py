@@ -1,202 +1,364 @@
 import os
-import openai
 import requests
 import json
 import datetime
-import re
+import time
 from config import apikey
-from dotenv import load_dotenv
-from ai_providers import chat_with_provider, get_available_providers, get_provider_models, PROVIDERS
+from ai_providers import DEFAULT_MODELS, chat_with_provider, chat_with_provider_stream, get_available_providers, get_provider_models, get_provider_base_url, PROVIDERS
+from clients import get_openai_client, get_async_http_client
+from hedging import hedged_chat, pick_backup_provider
+import response_cache
+from router import DEFAULT_POLICY, choose_provider
+from metrics import record_latency, record_outcome
+from rate_limit import estimate_request_tokens, get_rate_limiter, is_rate_limited
+from ttl_cache import BackgroundRefresher, TTLCache
+from notes_store import NOTES_PAGE_SIZE, format_notes, get_notes_store
+from calculator import evaluate, evaluate_batch, extract_expression, format_result
 
-load_dotenv()
+def _openai_client():
+    """Pooled OpenAI client, built on first use so importing utils does not load the openai SDK"""
+    try:
+        return get_openai_client(apikey, get_provider_base_url("openai"))
+    except Exception as e:
+        # If initialization fails, we'll handle it in the chat functions
+        return None
+
+def _openai_error(name):
+    """openai exception class for an except clause; the SDK is only imported once an error needs matching"""
+    try:
+        import openai
+    except ImportError:
+        return ()
+    return getattr(openai, name)
+
+def _weather_url(city):
+    """OpenWeatherMap request URL, or None when no API key is configured"""
+    api_key = os.getenv("WEATHER_API_KEY")
+    if not api_key or api_key == "your_weather_api_key":
+        return None
+    return f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
+
+def _format_weather(city, status_code, data):
+    """Turn an OpenWeatherMap response into the assistant's reply"""
+    if status_code == 200:
+        desc = data['weather'][0]['description']
+        temp = data['main']['temp']
+        feels_like = data['main']['feels_like']
+        humidity = data['main']['humidity']
+        return f"Weather in {city}: {desc.capitalize()}, Temperature: {temp}°C (feels like {feels_like}°C), Humidity: {humidity}%"
+    return f"Error fetching weather for {city}: {status_code}"
+
+# Weather changes on the scale of minutes: answer repeats from cache, serve stale answers while refreshing
+weather_cache = TTLCache(
+    "weather",
+    ttl=float(os.getenv("NOVA_WEATHER_TTL", "600")),
+    stale_ttl=float(os.getenv("NOVA_WEATHER_STALE_TTL", "1800")),
+    cacheable=lambda reply: not reply.startswith("Error"),
+)
 
-# Initialize OpenAI client with API key
-try:
-    client = openai.OpenAI(api_key=apikey)
-except Exception as e:
-    # If initialization fails, we'll handle it in the chat functions
-    client = None
+def _weather_key(city):
+    return " ".join(city.lower().split())
+
+def _fetch_weather(city, base_url):
+    response = requests.get(base_url, timeout=5)
+    return _format_weather(city, response.status_code, response.json() if response.status_code == 200 else None)
+
+async def _afetch_weather(city, base_url):
+    response = await get_async_http_client().get(base_url, timeout=5)
+    return _format_weather(city, response.status_code, response.json() if response.status_code == 200 else None)
 
 def get_weather(city="London"):
-    """Get weather information for a city"""
+    """Get weather information for a city (cached per city; concurrent requests share one API call)"""
     try:
         # Using OpenWeatherMap API (free tier)
         # Get API key from environment variable
-        api_key = os.getenv("WEATHER_API_KEY")
-        
-        if not api_key or api_key == "your_weather_api_key":
+        base_url = _weather_url(city)
+        if not base_url:
             return f"Weather service: Please configure WEATHER_API_KEY in .env file. Get a free key from openweathermap.org for {city}"
         
-        base_url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        response = requests.get(base_url, timeout=5)
+        return weather_cache.get(_weather_key(city), lambda: _fetch_weather(city, base_url))
+    except Exception as e:
+        return f"Error fetching weather: {str(e)}"
+
+async def aget_weather(city="London"):
+    """Get weather information for a city (async, shares get_weather's cache)"""
+    try:
+        base_url = _weather_url(city)
+        if not base_url:
+            return f"Weather service: Please configure WEATHER_API_KEY in .env file. Get a free key from openweathermap.org for {city}"
         
-        if response.status_code == 200:
-            data = response.json()
-            desc = data['weather'][0]['description']
-            temp = data['main']['temp']
-            feels_like = data['main']['feels_like']
-            humidity = data['main']['humidity']
-            return f"Weather in {city}: {desc.capitalize()}, Temperature: {temp}°C (feels like {feels_like}°C), Humidity: {humidity}%"
-        else:
-            return f"Error fetching weather for {city}: {response.status_code}"
+        return await weather_cache.aget(_weather_key(city), lambda: _afetch_weather(city, base_url))
     except Exception as e:
         return f"Error fetching weather: {str(e)}"
 
 def calculate(expression):
-    """Evaluate a mathematical expression safely"""
+    """Evaluate a mathematical expression safely (whitelisted syntax, bounded size and time; no eval)"""
     try:
-        # Extract mathematical expression from text
-        # Find numbers and operators
-        expression = expression.lower()
-        
-        # Replace words with operators
-        expression = re.sub(r'\bplus\b', '+', expression)
-        expression = re.sub(r'\bminus\b', '-', expression)
-        expression = re.sub(r'\btimes\b', '*', expression)
-        expression = re.sub(r'\bmultiplied by\b', '*', expression)
-        expression = re.sub(r'\bdivided by\b', '/', expression)
-        expression = re.sub(r'\bdivide\b', '/', expression)
-        
-        # Extract numbers and operators only
-        math_expr = re.findall(r'[\d\.\+\-\*\/\(\)]+', expression)
-        if math_expr:
-            expr = ''.join(math_expr)
-            # Safety check: only allow numbers, operators, and parentheses
-            if re.match(r'^[0-9+\-*/().\s]+$', expr):
-                result = eval(expr)
-                return f"The answer is {result}"
-            else:
-                return "Invalid mathematical expression"
-        else:
+        # Extract the arithmetic from the query ("what is 2 plus 3" -> "2 + 3")
+        expr = extract_expression(expression)
+        if not expr:
             return "Could not find a mathematical expression in your query"
+        return f"The answer is {format_result(evaluate(expr))}"
+    except SyntaxError:
+        return "Invalid mathematical expression"
     except Exception as e:
         return f"Error calculating: {str(e)}"
 
+def calculate_batch(expressions):
+    """Evaluate many expressions at once (same-shaped ones are vectorized with NumPy); one answer per expression"""
+    try:
+        values = evaluate_batch([extract_expression(e) for e in expressions])
+    except Exception as e:
+        return [f"Error calculating: {str(e)}"] * len(expressions)
+    answers = []
+    for value in values:
+        if isinstance(value, SyntaxError):
+            answers.append("Invalid mathematical expression")
+        elif isinstance(value, Exception):
+            answers.append(f"Error calculating: {str(value)}")
+        else:
+            answers.append(f"The answer is {format_result(value)}")
+    return answers
+
+def _news_url(topic, num_articles):
+    """NewsAPI request URL, or None when no API key is configured"""
+    api_key = os.getenv("NEWS_API_KEY")
+    if not api_key or api_key == "your_news_api_key":
+        return None
+    return f"https://newsapi.org/v2/everything?q={topic}&apiKey={api_key}&pageSize={num_articles}&sortBy=publishedAt"
+
+def _format_news(topic, num_articles, status_code, data):
+    """Turn a NewsAPI response into the assistant's reply"""
+    if status_code == 200:
+        articles = data.get('articles', [])
+        if articles:
+            news_list = []
+            for i, article in enumerate(articles[:num_articles], 1):
+                title = article.get('title', 'No title')
+                source = article.get('source', {}).get('name', 'Unknown')
+                news_list.append(f"{i}. {title} ({source})")
+            return f"Latest {topic} news:\n" + "\n".join(news_list)
+        return f"No news articles found for {topic}"
+    return f"Error fetching news: {status_code}"
+
+# NewsAPI's free tier is strictly rate-limited: answer from a cache the refresher keeps warm, so upstream
+# calls are bounded per refresh interval rather than per request
+news_cache = TTLCache(
+    "news",
+    ttl=float(os.getenv("NOVA_NEWS_TTL", "900")),
+    stale_ttl=float(os.getenv("NOVA_NEWS_STALE_TTL", "3600")),
+    cacheable=lambda reply: not reply.startswith("Error"),
+)
+
+def _news_key(topic, num_articles):
+    return f"{topic.lower()}|{num_articles}"
+
+def _fetch_news(topic, num_articles, url):
+    response = requests.get(url, timeout=5)
+    return _format_news(topic, num_articles, response.status_code, response.json() if response.status_code == 200 else None)
+
+async def _afetch_news(topic, num_articles, url):
+    response = await get_async_http_client().get(url, timeout=5)
+    return _format_news(topic, num_articles, response.status_code, response.json() if response.status_code == 200 else None)
+
+def _news_loader(key):
+    topic, num_articles = key.rsplit("|", 1)
+    return lambda: _fetch_news(topic, int(num_articles), _news_url(topic, int(num_articles)))
+
+# Keeps "technology" plus the most requested topics (across all sessions) fresh
+news_refresher = BackgroundRefresher(
+    news_cache,
+    _news_loader,
+    interval=float(os.getenv("NOVA_NEWS_REFRESH_INTERVAL", "600")),
+    top_n=int(os.getenv("NOVA_NEWS_PREFETCH_TOPICS", "5")),
+    pinned=[_news_key("technology", 5)],
+)
+
+def start_news_refresher():
+    """Start background news prefetching (no-op without a NewsAPI key, or if already running)"""
+    if _news_url("technology", 5):
+        news_refresher.start()
+
 def get_news(topic="technology", num_articles=5):
-    """Get news articles (requires news API key)"""
+    """Get news articles (requires news API key); popular topics are answered from the prefetched cache"""
     try:
         # Using NewsAPI (requires API key from newsapi.org)
-        api_key = os.getenv("NEWS_API_KEY")
-        
-        if not api_key or api_key == "your_news_api_key":
+        url = _news_url(topic, num_articles)
+        if not url:
             return f"News service: Please configure NEWS_API_KEY in .env file. Get a free key from newsapi.org for {topic} news"
         
-        url = f"https://newsapi.org/v2/everything?q={topic}&apiKey={api_key}&pageSize={num_articles}&sortBy=publishedAt"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-            if articles:
-                news_list = []
-                for i, article in enumerate(articles[:num_articles], 1):
-                    title = article.get('title', 'No title')
-                    source = article.get('source', {}).get('name', 'Unknown')
-                    news_list.append(f"{i}. {title} ({source})")
-                return f"Latest {topic} news:\n" + "\n".join(news_list)
-            else:
-                return f"No news articles found for {topic}"
-        else:
-            return f"Error fetching news: {response.status_code}"
+        start_news_refresher()
+        key = _news_key(topic, num_articles)
+        news_refresher.touch(key)
+        return news_cache.get(key, lambda: _fetch_news(topic, num_articles, url))
     except Exception as e:
         return f"Error fetching news: {str(e)}"
 
-def save_note(note_content, filename="notes.txt"):
-    """Save a note to a file"""
+async def aget_news(topic="technology", num_articles=5):
+    """Get news articles (async, shares get_news's cache)"""
     try:
-        if not os.path.exists("Notes"):
-            os.mkdir("Notes")
-        
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        note_path = os.path.join("Notes", filename)
-        
-        with open(note_path, "a", encoding="utf-8") as f:
-            f.write(f"\n[{timestamp}]\n{note_content}\n")
+        url = _news_url(topic, num_articles)
+        if not url:
+            return f"News service: Please configure NEWS_API_KEY in .env file. Get a free key from newsapi.org for {topic} news"
         
-        return f"Note saved successfully to {note_path}"
+        start_news_refresher()
+        key = _news_key(topic, num_articles)
+        news_refresher.touch(key)
+        return await news_cache.aget(key, lambda: _afetch_news(topic, num_articles, url))
+    except Exception as e:
+        return f"Error fetching news: {str(e)}"
+
+def save_note(note_content):
+    """Save a note to the notes store"""
+    try:
+        if not note_content:
+            return "Nothing to save: say \"save note\" followed by the note."
+        note_id = get_notes_store().add(note_content)
+        return f"Note #{note_id} saved successfully"
     except Exception as e:
         return f"Error saving note: {str(e)}"
 
-def read_notes(filename="notes.txt"):
-    """Read notes from a file"""
+def read_notes(limit=NOTES_PAGE_SIZE, before_id=None):
+    """Read the latest notes, newest first (older pages via before_id)"""
     try:
-        note_path = os.path.join("Notes", filename)
-        if os.path.exists(note_path):
-            with open(note_path, "r", encoding="utf-8") as f:
-                return f.read()
-        return "No notes found."
+        notes = get_notes_store().latest(limit + 1, before_id)
+        if not notes:
+            return "No notes found."
+        footer = ""
+        if len(notes) > limit:
+            notes = notes[:limit]
+            footer = f"\n\n(showing the {limit} most recent notes; say \"search notes <keywords>\" to find older ones)"
+        return format_notes(notes) + footer
     except Exception as e:
         return f"Error reading notes: {str(e)}"
-def ai_chat(messages, model="gpt-3.5-turbo", temperature=0.7, provider="openai"):
-    """Chat with AI using specified provider (OpenAI, Groq, Hugging Face, etc.)"""
+
+def search_notes(keywords, limit=NOTES_PAGE_SIZE):
+    """Notes containing all the keywords, best match first"""
+    try:
+        notes = get_notes_store().search(keywords, limit)
+        if not notes:
+            return f"No notes found matching '{keywords}'."
+        return format_notes(notes)
+    except Exception as e:
+        return f"Error searching notes: {str(e)}"
+
+def delete_note(note_id):
+    """Delete a note by its id"""
     try:
+        if get_notes_store().delete(int(note_id)):
+            return f"Note #{note_id} deleted"
+        return f"No note with id #{note_id}."
+    except Exception as e:
+        return f"Error deleting note: {str(e)}"
+
+def _fallback_provider(routing_policy=DEFAULT_POLICY):
+    """Best non-OpenAI provider with a configured key, chosen by the router"""
+    return choose_provider(get_available_providers(), routing_policy, exclude=["openai"])
+
+def _route(provider, model, routing_policy):
+    """Resolve provider "auto" to the router's current best choice (with that provider's default model)"""
+    if provider == "auto":
+        provider = choose_provider(get_available_providers(), routing_policy) or "openai"
+        return provider, DEFAULT_MODELS[provider]
+    return provider, model
+
+def ai_chat(messages, model="gpt-3.5-turbo", temperature=0.7, provider="openai", hedge=False, hedge_delay=None,
+            cache_nondeterministic=False, routing_policy=DEFAULT_POLICY):
+    """Chat with AI using specified provider (OpenAI, Groq, Hugging Face, etc.)
+    
+    provider="auto" lets the router pick the best available provider under routing_policy
+    ("fastest", "cheapest", "most_reliable"); the router also picks fallback providers.
+    With hedge=True the request is raced against a second available provider, fired after
+    hedge_delay seconds (default: the provider's p95 latency); the first good answer wins.
+    Deterministic requests (temperature 0, or cache_nondeterministic=True) use the response cache.
+    """
+    try:
+        provider, model = _route(provider, model, routing_policy)
+        
+        # Hedged mode: needs at least one other provider to race against
+        if hedge:
+            primary = provider or "openai"
+            backup = pick_backup_provider(primary, policy=routing_policy)
+            if backup:
+                return hedged_chat(messages, primary, backup, model, temperature, hedge_delay)
+        
         # Use the specified provider
         if provider and provider != "openai":
-            return chat_with_provider(provider, messages, model, temperature)
+            return chat_with_provider(provider, messages, model, temperature, cache_nondeterministic)
         
         # Default to OpenAI
+        client = _openai_client()
         if not client or not apikey or apikey == "your_api_key_here" or len(apikey) < 20:
             # Try to use a free provider as fallback if available
-            available_providers = get_available_providers()
-            if available_providers:
-                free_providers = [p for p in available_providers if p != "openai"]
-                if free_providers:
-                    return f"OpenAI API key not found. Switching to {PROVIDERS[free_providers[0]]['name']}...\n\n" + chat_with_provider(free_providers[0], messages, None, temperature)
+            fallback = _fallback_provider(routing_policy)
+            if fallback:
+                return f"OpenAI API key not found. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
             return "Error: Invalid API key. Please set a valid OPENAI_API_KEY in your .env file."
         
         # Ensure client is available for OpenAI calls
         if not client:
              return "Error: OpenAI client not initialized."
              
+        key, cached = response_cache.lookup("openai", model, messages, temperature, 1000, cache_nondeterministic)
+        if cached is not None:
+            return cached
+        if not get_rate_limiter("openai", apikey).acquire(estimate_request_tokens(messages)):
+            # Local queue is too long: use a free provider now instead of waiting on OpenAI
+            fallback = _fallback_provider(routing_policy)
+            if fallback:
+                return f"OpenAI rate limit reached. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
+            return get_rate_limiter("openai", apikey).rejection_message()
+        start = time.perf_counter()
         response = client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
             max_tokens=1000
         )
-        return response.choices[0].message.content.strip()
-    except openai.AuthenticationError as e:
+        reply = response.choices[0].message.content.strip()
+        elapsed = time.perf_counter() - start
+        record_latency("latency", "openai", model, elapsed)
+        record_outcome("openai", model, True)
+        response_cache.store(key, reply, elapsed, messages)
+        return reply
+    except _openai_error("AuthenticationError") as e:
+        record_outcome("openai", model, False)
         # Try free providers as fallback
-        available_providers = get_available_providers()
-        if available_providers:
-            free_provider = [p for p in available_providers if p != "openai"]
-            if free_provider:
-                return f"OpenAI authentication failed. Switching to {PROVIDERS[free_provider[0]]['name']}...\n\n" + chat_with_provider(free_provider[0], messages, None, temperature)
+        fallback = _fallback_provider(routing_policy)
+        if fallback:
+            return f"OpenAI authentication failed. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
         return "Error: Invalid API key. Please check your OPENAI_API_KEY in the .env file. The API key may be expired or incorrect. See GET_API_KEY.md for instructions on how to get a new API key."
-    except openai.RateLimitError as e:
+    except _openai_error("RateLimitError") as e:
+        record_outcome("openai", model, False)
         # Try free providers as fallback
-        available_providers = get_available_providers()
-        if available_providers:
-            free_provider = [p for p in available_providers if p != "openai"]
-            if free_provider:
-                return f"OpenAI rate limit exceeded. Switching to {PROVIDERS[free_provider[0]]['name']}...\n\n" + chat_with_provider(free_provider[0], messages, None, temperature)
+        fallback = _fallback_provider(routing_policy)
+        if fallback:
+            return f"OpenAI rate limit exceeded. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
         return "Error: Rate limit exceeded. Please wait a moment and try again, or check your OpenAI account for usage limits."
-    except openai.APIError as e:
+    except _openai_error("APIError") as e:
+        record_outcome("openai", model, False)
         error_msg = str(e)
         if "401" in error_msg or "unauthorized" in error_msg.lower():
             # Try free providers as fallback
-            available_providers = get_available_providers()
-            if available_providers:
-                free_provider = [p for p in available_providers if p != "openai"]
-                if free_provider:
-                    return f"OpenAI authentication failed. Switching to {PROVIDERS[free_provider[0]]['name']}...\n\n" + chat_with_provider(free_provider[0], messages, None, temperature)
+            fallback = _fallback_provider(routing_policy)
+            if fallback:
+                return f"OpenAI authentication failed. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
             return "Error: Authentication failed (401). Your API key is invalid or expired. Please check your OPENAI_API_KEY in the .env file and ensure it's correct. See GET_API_KEY.md for help."
         elif "429" in error_msg:
             return "Error: Too many requests. Please wait a moment and try again."
         else:
             return f"Error: OpenAI API error - {error_msg}. Please check your API key and account status."
     except Exception as e:
+        record_outcome("openai", model, False)
         error_msg = str(e)
         # Provide helpful error messages
         if "deprecated" in error_msg.lower():
             return f"Error: The model has been deprecated. Using gpt-3.5-turbo instead. Original error: {error_msg}"
         elif "401" in error_msg or "unauthorized" in error_msg.lower() or "authentication" in error_msg.lower():
             # Try free providers as fallback
-            available_providers = get_available_providers()
-            if available_providers:
-                free_provider = [p for p in available_providers if p != "openai"]
-                if free_provider:
-                    return f"OpenAI authentication failed. Switching to {PROVIDERS[free_provider[0]]['name']}...\n\n" + chat_with_provider(free_provider[0], messages, None, temperature)
+            fallback = _fallback_provider(routing_policy)
+            if fallback:
+                return f"OpenAI authentication failed. Switching to {PROVIDERS[fallback]['name']}...\n\n" + chat_with_provider(fallback, messages, None, temperature, cache_nondeterministic)
             return "Error: Authentication failed. Your API key is invalid or expired. Please check your OPENAI_API_KEY in the .env file. See GET_API_KEY.md for instructions."
         elif "api key" in error_msg.lower():
             return f"Error: API key issue. Please check your OpenAI API key in the .env file. {error_msg}"
@@ -205,11 +367,50 @@ def ai_chat(messages, model="gpt-3.5-turbo", temperature=0.7, provider="openai")
         else:
             return f"Error in AI chat: {error_msg}. Please check your API key and ensure you have credits in your OpenAI account."
 
-def ai_completion(prompt, model="gpt-3.5-turbo-instruct", temperature=0.7, max_tokens=500):
+def ai_chat_stream(messages, model="gpt-3.5-turbo", temperature=0.7, provider="openai", cache_nondeterministic=False,
+                   routing_policy=DEFAULT_POLICY):
+    """Streaming variant of ai_chat: yields response text chunks as they arrive"""
+    provider, model = _route(provider, model, routing_policy)
+    if provider and provider != "openai":
+        yield from chat_with_provider_stream(provider, messages, model, temperature, cache_nondeterministic)
+        return
+    
+    if not _openai_client() or not apikey or apikey == "your_api_key_here" or len(apikey) < 20:
+        # Try to use a free provider as fallback if available
+        fallback = _fallback_provider(routing_policy)
+        if fallback:
+            yield f"OpenAI API key not found. Switching to {PROVIDERS[fallback]['name']}...\n\n"
+            yield from chat_with_provider_stream(fallback, messages, None, temperature, cache_nondeterministic)
+            return
+        yield "Error: Invalid API key. Please set a valid OPENAI_API_KEY in your .env file."
+        return
+    
+    stream = chat_with_provider_stream("openai", messages, model, temperature, cache_nondeterministic)
+    first = next(stream, None)
+    if first is not None and is_rate_limited(first):
+        # Local queue too long (or a 429 before any text): use a free provider now, as ai_chat does
+        fallback = _fallback_provider(routing_policy)
+        if fallback:
+            stream.close()
+            yield f"OpenAI rate limit reached. Switching to {PROVIDERS[fallback]['name']}...\n\n"
+            yield from chat_with_provider_stream(fallback, messages, None, temperature, cache_nondeterministic)
+            return
+    if first is not None:
+        yield first
+    yield from stream
+
+def ai_completion(prompt, model="gpt-3.5-turbo-instruct", temperature=0.7, max_tokens=500, cache_nondeterministic=False):
     """Get AI completion for a prompt"""
     try:
+        client = _openai_client()
         if not client:
              return "Error: OpenAI client not initialized."
+        
+        cache_messages = [{"role": "user", "content": prompt}]
+        key, cached = response_cache.lookup("openai-completions", model, cache_messages, temperature, max_tokens, cache_nondeterministic)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
              
         # completions are for legacy models or gpt-3.5-turbo-instruct
         response = client.completions.create(
@@ -221,7 +422,9 @@ def ai_completion(prompt, model="gpt-3.5-turbo-instruct", temperature=0.7, max_t
             frequency_penalty=0,
             presence_penalty=0
         )
-        return response.choices[0].text.strip()
+        reply = response.choices[0].text.strip()
+        response_cache.store(key, reply, time.perf_counter() - start, cache_messages)
+        return reply
     except Exception as e:
         error_msg = str(e)
         # Provide helpful error messages
@@ -229,14 +432,14 @@ def ai_completion(prompt, model="gpt-3.5-turbo-instruct", temperature=0.7, max_t
             return f"Error: The model {model} has been deprecated. Please use gpt-3.5-turbo or gpt-4 for chat completions."
         return f"Error in AI completion: {error_msg}"
 
-def save_ai_response(prompt, response, directory="Openai"):
-    """Save AI response to a file"""
+def save_ai_response(prompt, response, directory="Openai", filename=None):
+    """Save AI response to a file (filename defaults to a timestamp; batch jobs pass their own to avoid clashes)"""
     try:
         if not os.path.exists(directory):
             os.mkdir(directory)
         
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"prompt_{timestamp}.txt"
+        filename = f"prompt_{timestamp}_{filename}.txt" if filename else f"prompt_{timestamp}.txt"
         filepath = os.path.join(directory, filename)
         
         text = f"Prompt: {prompt}\n"